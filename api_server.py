@@ -0,0 +1,433 @@
+# api_server.py
+"""Headless HTTP/JSON API over DatabaseManager for scanners, POS clients and dashboards.
+
+    python api_server.py --db inventory.db --port 8765
+    curl localhost:8765/items?search=rice
+    curl -X POST localhost:8765/items/42/sell -d '{"quantity": 2}'
+
+Standard library only. ThreadingHTTPServer gives each client connection its own
+thread, and HTTP/1.1 keeps the connection open between requests. A semaphore caps
+how many requests are inside DatabaseManager at once; the rest wait briefly, then
+get 503 with Retry-After. Reads run on the worker's own pooled reader connection
+(the pool is sized to the cap). Writes share the single writer and group commit,
+so many tills can sell at once. A write is committed before its response is
+sent (concurrent requests still share commits), so a 200 means the change is
+stored and visible to the next read. Full listings (GET /items/stream, and
+GET /transactions without a limit) are streamed with chunked transfer encoding
+straight from a reader cursor.
+
+Routes:
+    GET    /health
+    GET    /items?search=&before_id=&after_id=&limit=&count=1
+    GET    /items/stream?search=
+    GET    /items/<id>                 GET /items/sku/<sku>
+    POST   /items                      {"name", "quantity", "price", "reorder_point"?, "reorder_qty"?, "sku"?}
+    PUT    /items/<id>                 same fields, all optional; omitted ones keep their value
+    DELETE /items/<id>
+    POST   /items/<id>/sell            {"quantity", "price"?}
+    POST   /items/<id>/receive         {"quantity", "price"?}
+    POST   /items/<id>/adjust          {"delta"}
+    POST   /checkout                   {"lines": [{"item_id", "quantity", "price"?}, ...]}
+    GET    /transactions?search=&item_id=&start=&end=&limit=&include_archived=1
+    GET    /changes?since=
+
+Binds to 127.0.0.1 by default and has no authentication: keep it on localhost.
+"""
+import argparse
+import json
+import re
+import sqlite3
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from database_manager import (DatabaseManager, ItemNotFound, StockError, ITEMS_PAGE_SIZE, LOW_STOCK_THRESHOLD,
+                              SCHEMA_VERSION)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_CONCURRENT_REQUESTS = 16   # requests inside DatabaseManager at once (and reader connections)
+QUEUE_TIMEOUT = 2.0            # seconds a request may wait for a slot before it gets 503
+KEEP_ALIVE_TIMEOUT = 15        # seconds an idle keep-alive connection stays open
+MAX_BODY_BYTES = 1 << 20
+MAX_PAGE_SIZE = 1000
+STREAM_CHUNK_ROWS = 1000       # rows per chunk of a streamed listing
+_KINDS = {"int": "a whole number", "number": "a non-negative number", "str": "a string"}
+
+ITEM_FIELDS = ("id", "name", "quantity", "price", "reorder_point", "reorder_qty", "sku")
+TRANSACTION_FIELDS = ("id", "item_name", "quantity", "price", "transaction_type", "date")
+
+
+class ApiError(Exception):
+    """An error with its HTTP status; the message is returned as {"error": ...}."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _item(row):
+    return dict(zip(ITEM_FIELDS, row))
+
+
+def _found(row, what="Item"):
+    if row is None:
+        raise ApiError(404, f"{what} not found.")
+    return _item(row)
+
+
+# -------------------------------
+# REQUEST PARSING
+# -------------------------------
+def _query_int(query, name, default=None, minimum=None, maximum=None):
+    value = query.get(name)
+    if value is None or value == "":
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise ApiError(400, f"'{name}' must be a whole number.")
+    if minimum is not None and number < minimum:
+        raise ApiError(400, f"'{name}' must be at least {minimum}.")
+    return number if maximum is None else min(number, maximum)
+
+
+def _field(body, name, kind, required=True, default=None):
+    """Returns body[name] checked against kind ("int", "number" or "str")."""
+    if name not in body or body[name] is None:
+        if required:
+            raise ApiError(400, f"Missing field '{name}'.")
+        return default
+    value = body[name]
+    if kind == "int":
+        ok = isinstance(value, int) and not isinstance(value, bool)
+    elif kind == "number":
+        ok = isinstance(value, (int, float)) and not isinstance(value, bool) and value >= 0
+    else:
+        ok = isinstance(value, str)
+    if not ok:
+        raise ApiError(400, f"Field '{name}' must be {_KINDS[kind]}.")
+    return float(value) if kind == "number" else value
+
+
+def _item_fields(body, current=None):
+    """Validated (name, quantity, price, reorder_point, reorder_qty, sku) from a JSON body.
+
+    With current (an item row), missing fields keep the current values.
+    """
+    required = current is None
+    name = _field(body, "name", "str", required, current and current[1])
+    if not name.strip():
+        raise ApiError(400, "Field 'name' must not be empty.")
+    values = [name.strip()]
+    for index, field, default in ((2, "quantity", 0), (4, "reorder_point", LOW_STOCK_THRESHOLD), (5, "reorder_qty", 0)):
+        value = _field(body, field, "int", required and field == "quantity",
+                       current[index] if current else default)
+        if value < 0:
+            raise ApiError(400, f"Field '{field}' cannot be negative.")
+        values.append(value)
+    values.insert(2, _field(body, "price", "number", required, current and current[3]))
+    # sku: omitted keeps it (None), "" clears it
+    values.append(_field(body, "sku", "str", required=False))
+    return values
+
+
+# -------------------------------
+# ROUTE HANDLERS
+# -------------------------------
+# Each returns (status, payload), or (status, Stream) for a chunked listing
+class Stream:
+    """A streamed JSON array: an iterator of row lists plus the function that turns a row into a dict."""
+
+    def __init__(self, chunks, to_dict):
+        self.chunks = chunks
+        self.to_dict = to_dict
+
+
+def health(db, query, body):
+    return 200, {"status": "ok", "schema_version": SCHEMA_VERSION, "pool": db.pool_stats(),
+                 "query_cache": db.cache_stats()}
+
+
+def list_items(db, query, body):
+    limit = _query_int(query, "limit", ITEMS_PAGE_SIZE, 1, MAX_PAGE_SIZE)
+    search = query.get("search") or None
+    rows = db.get_items_page(search, before_id=_query_int(query, "before_id"),
+                             after_id=_query_int(query, "after_id"), limit=limit)
+    result = {"items": [_item(row) for row in rows],
+              # Keyset cursor for the next (older) page
+              "next_before_id": rows[-1][0] if len(rows) == limit else None}
+    if query.get("count") == "1":
+        result["total"] = db.count_items(search)
+    return 200, result
+
+
+def stream_items(db, query, body):
+    return 200, Stream(db.iter_items(query.get("search") or None, STREAM_CHUNK_ROWS), _item)
+
+
+def get_item(db, query, body, item_id):
+    return 200, _item(db.get_item(int(item_id)))
+
+
+def get_item_by_sku(db, query, body, sku):
+    return 200, _found(db.get_item_by_sku(unquote(sku)))
+
+
+def create_item(db, query, body):
+    return 201, _item(db.add_item(*_item_fields(body)))
+
+
+def update_item(db, query, body, item_id):
+    current = db.get_item(int(item_id))
+    return 200, _found(db.update_item(int(item_id), *_item_fields(body, current)))
+
+
+def delete_item(db, query, body, item_id):
+    return 200, {"deleted": _found(db.delete_item(int(item_id)))}
+
+
+def move_stock(kind):
+    def handler(db, query, body, item_id):
+        if kind == "adjust":
+            row = db.adjust(int(item_id), _field(body, "delta", "int"))
+        else:
+            move = db.sell if kind == "sell" else db.receive
+            row = move(int(item_id), _field(body, "quantity", "int"), _field(body, "price", "number", required=False))
+        return 200, _item(row)
+    return handler
+
+
+def checkout(db, query, body):
+    lines = body.get("lines")
+    if not isinstance(lines, list) or not all(isinstance(line, dict) for line in lines):
+        raise ApiError(400, "Field 'lines' must be a list of {item_id, quantity, price?} objects.")
+    basket = [(_field(line, "item_id", "int"), _field(line, "quantity", "int"),
+               _field(line, "price", "number", required=False)) for line in lines]
+    return 200, {"items": [_item(row) for row in db.checkout(basket)]}
+
+
+def list_transactions(db, query, body):
+    filters = {
+        "search_term": query.get("search") or None,
+        "item_id": _query_int(query, "item_id"),
+        "start": query.get("start") or None,
+        "end": query.get("end") or None,
+        "include_archived": query.get("include_archived") == "1",
+    }
+    to_dict = lambda row: dict(zip(TRANSACTION_FIELDS, row))
+    limit = _query_int(query, "limit", None, 1)
+    if limit is None:
+        return 200, Stream(db.iter_transactions(chunk_size=STREAM_CHUNK_ROWS, **filters), to_dict)
+    return 200, {"transactions": [to_dict(row) for row in db.get_all_transactions(limit=limit, **filters)]}
+
+
+def item_changes(db, query, body):
+    last_seq, changes = db.get_item_changes(_query_int(query, "since"))
+    if changes is None:
+        return 200, {"seq": last_seq, "reload": True, "changes": []}
+    return 200, {"seq": last_seq, "reload": False,
+                 "changes": [{"id": item_id, "item": row and _item(row)} for item_id, row in changes]}
+
+
+ROUTES = [(method, re.compile(pattern), handler) for method, pattern, handler in (
+    ("GET", r"/health", health),
+    ("GET", r"/items", list_items),
+    ("GET", r"/items/stream", stream_items),
+    ("GET", r"/items/sku/([^/]+)", get_item_by_sku),
+    ("GET", r"/items/(\d+)", get_item),
+    ("POST", r"/items", create_item),
+    ("PUT", r"/items/(\d+)", update_item),
+    ("DELETE", r"/items/(\d+)", delete_item),
+    ("POST", r"/items/(\d+)/sell", move_stock("sell")),
+    ("POST", r"/items/(\d+)/receive", move_stock("receive")),
+    ("POST", r"/items/(\d+)/adjust", move_stock("adjust")),
+    ("POST", r"/checkout", checkout),
+    ("GET", r"/transactions", list_transactions),
+    ("GET", r"/changes", item_changes),
+)]
+
+
+# -------------------------------
+# HTTP PLUMBING
+# -------------------------------
+class ApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive: every response has a length or is chunked
+    disable_nagle_algorithm = True  # headers and body go out as separate writes
+    timeout = KEEP_ALIVE_TIMEOUT
+    server_version = "SmartStock"
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def _dispatch(self, method):
+        url = urlsplit(self.path)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        try:
+            body = self._read_body()  # always drained, so the connection stays usable
+            handler, args = self._route(method, url.path)
+            if not self.server.slots.acquire(timeout=QUEUE_TIMEOUT):
+                raise ApiError(503, "Server busy, retry shortly.")
+            try:
+                status, payload = self._call(handler, query, body, args)
+                if isinstance(payload, Stream):
+                    self._send_stream(status, payload)
+                else:
+                    self._send_json(status, payload)
+            finally:
+                self.server.slots.release()
+        except ApiError as e:
+            self._send_json(e.status, {"error": str(e)}, retry=e.status == 503)
+        except ConnectionError:
+            self.close_connection = True  # the client went away mid-response
+
+    def _route(self, method, path):
+        allowed = False
+        for route_method, pattern, handler in ROUTES:
+            match = pattern.fullmatch(path)
+            if match:
+                if route_method == method:
+                    return handler, match.groups()
+                allowed = True
+        raise ApiError(405 if allowed else 404, f"No route for {method} {path}.")
+
+    def _call(self, handler, query, body, args):
+        """Runs a route handler, mapping DatabaseManager errors onto HTTP statuses."""
+        try:
+            result = handler(self.server.db, query, body, *args)
+            if self.command != "GET":
+                # Acknowledge only committed writes; requests that arrive together still share one commit
+                self.server.db.flush()
+            return result
+        except ApiError:
+            raise
+        except ItemNotFound as e:
+            raise ApiError(404, str(e))
+        except StockError as e:
+            raise ApiError(409, str(e))
+        except sqlite3.IntegrityError as e:
+            raise ApiError(409, f"Conflicts with an existing item: {e}")
+        except sqlite3.OperationalError as e:
+            if "locked" in str(e) or "busy" in str(e):
+                raise ApiError(503, "Database busy, retry shortly.")
+            raise ApiError(500, f"Database error: {e}")
+        except ValueError as e:
+            raise ApiError(400, str(e))
+        except Exception as e:
+            self.log_error("Unhandled error in %s: %r", handler.__name__, e)
+            raise ApiError(500, "Internal server error.")
+
+    def _read_body(self):
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            self.close_connection = True
+            raise ApiError(400, "Invalid Content-Length.")
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True  # the unread body would be taken for the next request
+            raise ApiError(413, f"Request body over {MAX_BODY_BYTES:,} bytes.")
+        if not length:
+            return {}
+        try:
+            body = json.loads(self.rfile.read(length))
+        except (ValueError, UnicodeDecodeError):
+            raise ApiError(400, "Request body is not valid JSON.")
+        if not isinstance(body, dict):
+            raise ApiError(400, "Request body must be a JSON object.")
+        return body
+
+    def _send_json(self, status, payload, retry=False):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        if retry:
+            self.send_header("Retry-After", "1")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_stream(self, status, stream):
+        """Writes a JSON array in HTTP chunks as rows come off the reader cursor."""
+        # The query runs on the first fetch; do it before the headers so a failure still gets a status
+        try:
+            rows = next(stream.chunks, [])
+        except sqlite3.Error as e:
+            stream.chunks.close()
+            raise ApiError(500, f"Database error: {e}")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            self._write_chunk(b"[")
+            separator = b""
+            while rows:
+                self._write_chunk(separator + ",".join(json.dumps(stream.to_dict(row)) for row in rows).encode("utf-8"))
+                separator = b","
+                rows = next(stream.chunks, [])
+            self._write_chunk(b"]")
+            self.wfile.write(b"0\r\n\r\n")
+        except (OSError, sqlite3.Error) as e:
+            # Headers are gone, so the only signal left is an unterminated body
+            self.close_connection = True
+            self.log_error("Stream aborted: %r", e)
+        finally:
+            stream.chunks.close()  # returns the reader connection even if the client left early
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+    def log_message(self, format, *args):
+        if self.server.access_log:
+            super().log_message(format, *args)
+
+
+class ApiServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer bound to one DatabaseManager, with a cap on concurrent requests."""
+    daemon_threads = True
+    request_queue_size = 128   # listen backlog for bursts of new connections
+
+    def __init__(self, db, address=(DEFAULT_HOST, DEFAULT_PORT), max_concurrent=MAX_CONCURRENT_REQUESTS,
+                 access_log=False):
+        self.db = db
+        self.slots = threading.BoundedSemaphore(max_concurrent)
+        self.access_log = access_log
+        super().__init__(address, ApiHandler)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="smartstock-api", description="SmartStock HTTP/JSON API")
+    parser.add_argument("--db", default="inventory.db", help="SQLite database file (default: inventory.db)")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"address to bind (default: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"port (default: {DEFAULT_PORT})")
+    parser.add_argument("--max-concurrent", type=int, default=MAX_CONCURRENT_REQUESTS,
+                        help=f"requests served at once (default: {MAX_CONCURRENT_REQUESTS})")
+    parser.add_argument("--access-log", action="store_true", help="log every request to stderr")
+    args = parser.parse_args(argv)
+
+    # One reader connection per concurrent request, so reads never queue for a connection
+    db = DatabaseManager(args.db, pool_size=args.max_concurrent)
+    server = ApiServer(db, (args.host, args.port), args.max_concurrent, args.access_log)
+    print(f"🌐 SmartStock API listening on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
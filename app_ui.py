@@ -1,8 +1,17 @@
 # app_ui.py
 import tkinter as tk
-from tkinter import ttk, messagebox
-from database_manager import DatabaseManager
+from tkinter import ttk, messagebox, filedialog, simpledialog
+from database_manager import (DatabaseManager, ITEMS_PAGE_SIZE, LOW_STOCK_THRESHOLD, ARCHIVE_AFTER_DAYS, name_matches,
+                              range_matches, item_sort_key)
+from db_executor import DatabaseExecutor
+from reporting import SalesReports, PERIODS
+from backup import BackupManager, BackupCancelled
+import forecasting
+from stores import StoreManager, ALL_STORES, HOME_STORE, registry_path
+from ui_helpers import center_window
+from datetime import date, timedelta
 import locale
+import os
 
 # -------------------------------
 # DEFAULT STYLE AND SETTINGS
@@ -17,8 +26,44 @@ COLOR_HEADER_TEXT = "#ffffff"
 COLOR_BUTTON_ADD = "#28a745"
 COLOR_BUTTON_UPDATE = "#007bff"
 COLOR_BUTTON_DELETE = "#dc3545"
+COLOR_LOW_STOCK = "#B58105"
 
-LOW_STOCK_THRESHOLD = 5
+# Virtualized grid: only a window of rows lives in the Treeview at a time
+GRID_MAX_ROWS = ITEMS_PAGE_SIZE * 5   # rows kept before trimming the far end
+GRID_PREFETCH_EDGE = 0.15             # fetch the next page within this fraction of either end
+# Sortable grid columns -> ITEM_SORTS key; the database sorts, the grid only shows the arrow
+GRID_SORTS = {"ID": "id", "Name": "name", "Quantity": "quantity", "Price": "price"}
+
+# Live search
+SEARCH_DEBOUNCE_MS = 250   # quiet time after the last keystroke before querying
+
+# Low-stock watcher
+LOW_STOCK_POLL_MS = 15000  # how often the partial-index low-stock query runs
+
+# Change feed from other terminals sharing the database
+CHANGE_POLL_MS = 1000      # idle polls are answered by the read cache
+
+# Barcode scanner: what a scan does; "3*4800016" scans three units at once
+SCAN_MODES = {"Sell": "sell", "Receive": "receive", "Look up": None}
+
+# Reports tab: label -> days back from today (None = all time)
+REPORT_RANGES = {"Last 7 days": 7, "Last 30 days": 30, "Last 90 days": 90, "Last 365 days": 365, "All time": None}
+REPORT_TOP_ITEMS = 10
+
+# Reorder suggestions tab (needs NumPy): label -> forecast method, and rows shown at once
+REORDER_METHODS = {"Smoothed (EWMA)": "ewma", "28-day average": "moving_average"}
+REORDER_ROWS = 500
+
+# Stores tab: items shown at once (first names A to Z, merged across the selected stores)
+STORE_ROWS = 500
+
+# Database stats window (admin)
+STATS_REFRESH_MS = 1000
+
+# Housekeeping: free pages (e.g. after archiving) are reclaimed in small steps while idle
+IDLE_VACUUM_MS = 5000       # check for free pages this often
+IDLE_VACUUM_STEP_MS = 250   # next step while there is still work and nobody is waiting
+BACKUP_CHECK_MS = 60_000    # how often the daily backup schedule is checked
 
 # Set locale for currency formatting
 try:
@@ -30,22 +75,54 @@ except locale.Error:
         pass
 
 
-
-def center_window(window, width, height):
-    screen_width = window.winfo_screenwidth()
-    screen_height = window.winfo_screenheight()
-    x = (screen_width / 2) - (width / 2)
-    y = (screen_height / 2) - (height / 2)
-    window.geometry(f'{width}x{height}+{int(x)}+{int(y)}')
+def format_currency(value):
+    try:
+        return locale.currency(value, grouping=True, symbol="₱")
+    except ValueError:
+        return f"₱{value:,.2f}"  # the 'C' locale has no currency format
 
 
 class InventoryApp(tk.Tk):
-    def __init__(self, db_manager: DatabaseManager, role: str):
+    def __init__(self, db_manager: DatabaseManager, role: str, executor: DatabaseExecutor = None):
         super().__init__()
         self.db = db_manager
+        self.reports = SalesReports(db_manager)
         self.role = role
+        self.executor = executor or DatabaseExecutor()
+        # Live search gets its own lane so a slow query never queues behind edits.
+        self.search_executor = DatabaseExecutor(name="smartstock-search")
+        # So do backups: a long copy must never hold up a sale
+        self.backups = BackupManager(db_manager)
+        self.backup_executor = DatabaseExecutor(name="smartstock-backup")
+        self._backup_running = False
+        # And so do forecasts, which read the whole sales history
+        self.forecaster = forecasting.ReorderEngine(db_manager) if forecasting.AVAILABLE else None
+        self.forecast_executor = DatabaseExecutor(name="smartstock-forecast")
+        self.suggestions = None
+        self._suggestion_sort = ("days_of_cover", False)
+        # Other branches' databases (see stores.json), read side by side on their own lane
+        self.stores = StoreManager.for_database(db_manager)
+        self.store_executor = DatabaseExecutor(name="smartstock-stores")
+        self._stores_loaded = False
         self.selected_item_id = None
 
+        # Virtualized grid state
+        self._grid_search = None
+        self._grid_has_older = False
+        self._grid_has_newer = False
+        self._grid_fetch_pending = False
+        self._grid_sort = ("id", True)   # (ITEM_SORTS key, descending): newest first
+        self._grid_ranges = {}           # {"quantity"/"price": (low, high)}, applied in SQL
+
+        # Bumped by every reload/search so late results from older requests are dropped
+        self._grid_generation = 0
+
+        # Live search state
+        self._search_after_id = None
+
+        # Database stats window (admin only), created on demand
+        self.stats_window = None
+
         self.title(f"SmartStock - Inventory Management ({self.role.upper()})")
         center_window(self, 1100, 700)
         self.configure(bg=COLOR_APP_BG)
@@ -55,10 +132,27 @@ class InventoryApp(tk.Tk):
         self.style.theme_use("clam")
         self._configure_styles()
 
+        self._create_menu()
         self._create_header()
+        self._create_tabs()
+        self._create_dashboard()
         self._create_widgets()
+        self._create_reports()
+        self._create_reorder()
+        self._create_stores()
         self._create_status_bar()
+        self.executor.add_busy_listener(self._on_busy_changed)
+        self.search_executor.add_busy_listener(self._on_busy_changed)
+        self.forecast_executor.add_busy_listener(self._on_busy_changed)
+        self.store_executor.add_busy_listener(self._on_busy_changed)
+        # Queued before the first page so no write between the two can be missed
+        self._change_seq = None
+        self._watch_changes()
         self.load_inventory()
+        self._low_stock_ids = None
+        self._watch_low_stock()
+        self.after(IDLE_VACUUM_MS, self._vacuum_when_idle)
+        self.after(BACKUP_CHECK_MS, self._backup_when_due)
 
     # ---------------------------
     # STYLE CONFIGURATION
@@ -104,6 +198,31 @@ class InventoryApp(tk.Tk):
         self.style.map("Update.TButton", background=[("active", "#0069d9")])
         self.style.map("Delete.TButton", background=[("active", "#c82333")])
 
+    # ---------------------------
+    # MENU BAR
+    # ---------------------------
+    def _create_menu(self):
+        menubar = tk.Menu(self)
+        self.file_menu = tk.Menu(menubar, tearoff=False)
+        self.file_menu.add_command(label="Import Items CSV…", command=self.import_items_ui,
+                                   state=tk.NORMAL if self.role == "admin" else tk.DISABLED)
+        self.file_menu.add_separator()
+        self.file_menu.add_command(label="Export Items CSV…", command=lambda: self.export_csv_ui("items"))
+        self.file_menu.add_command(label="Export Transactions CSV…", command=lambda: self.export_csv_ui("transactions"))
+        self.file_menu.add_separator()
+        self.file_menu.add_command(label="Exit", command=self.on_closing)
+        menubar.add_cascade(label="File", menu=self.file_menu)
+
+        tools_menu = tk.Menu(menubar, tearoff=False)
+        tools_menu.add_command(label="Database Stats…", command=self.show_stats_window,
+                               state=tk.NORMAL if self.role == "admin" else tk.DISABLED)
+        tools_menu.add_command(label="Archive Old Transactions…", command=self.archive_transactions_ui,
+                               state=tk.NORMAL if self.role == "admin" else tk.DISABLED)
+        tools_menu.add_separator()
+        tools_menu.add_command(label="Back Up Now", command=self.backup_now)
+        menubar.add_cascade(label="Tools", menu=tools_menu)
+        self.config(menu=menubar)
+
     # ---------------------------
     # HEADER BAR
     # ---------------------------
@@ -127,38 +246,185 @@ class InventoryApp(tk.Tk):
             font=("Segoe UI", 10, "italic")
         ).pack(side="right", padx=20)
 
+    # ---------------------------
+    # TABS
+    # ---------------------------
+    def _create_tabs(self):
+        self.notebook = ttk.Notebook(self)
+        self.notebook.pack(fill="both", expand=True)
+        self.inventory_tab = tk.Frame(self.notebook, bg=COLOR_APP_BG)
+        self.reports_tab = tk.Frame(self.notebook, bg=COLOR_APP_BG)
+        self.reorder_tab = tk.Frame(self.notebook, bg=COLOR_APP_BG)
+        self.stores_tab = tk.Frame(self.notebook, bg=COLOR_APP_BG)
+        self.notebook.add(self.inventory_tab, text="Inventory")
+        self.notebook.add(self.reports_tab, text="Reports")
+        self.notebook.add(self.reorder_tab, text="Reorder Suggestions")
+        self.notebook.add(self.stores_tab, text="Stores")
+        self.notebook.bind("<<NotebookTabChanged>>", self._on_tab_changed)
+
+    def _on_tab_changed(self, _event):
+        # Reports are only queried when someone actually looks at them
+        if self.notebook.select() == str(self.reports_tab):
+            self.refresh_reports()
+        # The forecast reads all sales history: run it once, then on Refresh
+        elif self.notebook.select() == str(self.reorder_tab) and self.forecaster and self.suggestions is None:
+            self.refresh_suggestions()
+        # Other stores' files may sit on slow shares: open them only once asked to
+        elif self.notebook.select() == str(self.stores_tab) and not self._stores_loaded:
+            self.refresh_stores()
+
+    # ---------------------------
+    # DASHBOARD (trigger-maintained summary, O(1) to render)
+    # ---------------------------
+    def _create_dashboard(self):
+        dashboard = tk.Frame(self.inventory_tab, bg=COLOR_APP_BG)
+        dashboard.pack(fill="x", padx=20, pady=(10, 0))
+
+        self.dashboard_vars = {}
+        cards = [
+            ("total_skus", "Total SKUs", "#2E2E2E"),
+            ("total_units", "Units in Stock", "#2E2E2E"),
+            ("total_value", "Inventory Value", "#2E2E2E"),
+            ("low_stock_count", "Low Stock Items", COLOR_LOW_STOCK),
+        ]
+        for column, (key, title, color) in enumerate(cards):
+            card = tk.Frame(dashboard, bg=COLOR_FRAME_BG, padx=15, pady=8,
+                            highlightbackground="#dcdcdc", highlightthickness=1)
+            card.grid(row=0, column=column, padx=(0 if column == 0 else 10, 0), sticky="ew")
+            dashboard.grid_columnconfigure(column, weight=1)
+            tk.Label(card, text=title, bg=COLOR_FRAME_BG, fg="#6c757d", font=("Segoe UI", 9)).pack(anchor="w")
+            self.dashboard_vars[key] = tk.StringVar(value="—")
+            tk.Label(card, textvariable=self.dashboard_vars[key], bg=COLOR_FRAME_BG, fg=color,
+                     font=("Segoe UI Semibold", 14)).pack(anchor="w")
+
+    def _refresh_dashboard(self):
+        self.executor.run(self, self.db.get_inventory_summary, on_success=self._show_dashboard)
+
+    def _show_dashboard(self, summary):
+        self.dashboard_vars["total_skus"].set(f"{summary['total_skus']:,}")
+        self.dashboard_vars["total_units"].set(f"{summary['total_units']:,}")
+        self.dashboard_vars["total_value"].set(format_currency(summary["total_value"]))
+        self.dashboard_vars["low_stock_count"].set(f"{summary['low_stock_count']:,}")
+
+    # ---------------------------
+    # LOW-STOCK WATCHER
+    # ---------------------------
+    def _watch_low_stock(self):
+        self.executor.run(self, self.db.get_low_stock_items, on_success=self._low_stock_checked, background=True)
+        self.after(LOW_STOCK_POLL_MS, self._watch_low_stock)
+
+    def _low_stock_checked(self, rows):
+        current = {row[0]: row for row in rows}
+        if self._low_stock_ids is None:
+            # First pass: report the backlog once instead of one alert per item
+            if current:
+                self.set_status(f"⚠️ {len(current):,} item(s) at or below their reorder point.")
+        else:
+            crossed = [current[item_id] for item_id in current.keys() - self._low_stock_ids]
+            if len(crossed) == 1:
+                _, name, quantity, _, reorder_qty = crossed[0]
+                hint = f", reorder {reorder_qty}" if reorder_qty else ""
+                self.set_status(f"⚠️ Low stock: '{name}' is down to {quantity}{hint}.")
+            elif crossed:
+                self.set_status(f"⚠️ {len(crossed)} more item(s) reached their reorder point.")
+        # Items that recovered drop out, so crossing again alerts again
+        self._low_stock_ids = set(current)
+
+    # ---------------------------
+    # CHANGE FEED (writes from other terminals)
+    # ---------------------------
+    def _watch_changes(self):
+        self.executor.run(self, self.db.get_item_changes, self._change_seq,
+                          on_success=self._apply_changes, background=True)
+        self.after(CHANGE_POLL_MS, self._watch_changes)
+
+    def _apply_changes(self, result):
+        last_seq, changes = result
+        if self._change_seq is None or last_seq < self._change_seq:
+            self._change_seq = last_seq  # first poll (or an older poll answering late)
+            return
+        self._change_seq = last_seq
+        if changes is None:
+            # Too far behind (or a bulk import): one reload beats many single-row patches
+            self.load_inventory(self._grid_search)
+            return
+        if not changes:
+            return
+        # Our own writes come back too; patching the same values again is harmless
+        for item_id, row in changes:
+            if row is None:
+                self._remove_row(item_id, refresh=False)
+            else:
+                self._patch_row(row, refresh=False)
+        self._update_grid_info()
+        self._refresh_dashboard()
+
     # ---------------------------
     # MAIN LAYOUT / WIDGETS
     # ---------------------------
     def _create_widgets(self):
         # 🔍 Search bar
-        search_frame = tk.Frame(self, bg=COLOR_APP_BG)
+        search_frame = tk.Frame(self.inventory_tab, bg=COLOR_APP_BG)
         search_frame.pack(fill="x", padx=20, pady=(10, 5))
 
         tk.Label(search_frame, text="Search Item:", bg=COLOR_APP_BG, font=FONT_MAIN).pack(side="left", padx=(0, 8))
         self.search_var = tk.StringVar()
         search_entry = ttk.Entry(search_frame, textvariable=self.search_var, width=30)
         search_entry.pack(side="left", padx=(0, 10))
+        self.search_var.trace_add("write", self._on_search_changed)
         ttk.Button(search_frame, text="Search", command=self.search_items, style="Update.TButton").pack(side="left")
-        ttk.Button(search_frame, text="Reset", command=self.load_inventory, style="Delete.TButton").pack(side="left", padx=(5, 0))
+        ttk.Button(search_frame, text="Reset", command=self.reset_search, style="Delete.TButton").pack(side="left", padx=(5, 0))
+
+        # 🏷️ Barcode scanner: keystrokes only buffer in the entry; the trailing Enter does the work
+        self.scanner_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(search_frame, text="Scanner", variable=self.scanner_var,
+                        command=self._toggle_scanner).pack(side="left", padx=(25, 8))
+        self.scan_mode_var = tk.StringVar(value="Sell")
+        ttk.Combobox(search_frame, textvariable=self.scan_mode_var, values=list(SCAN_MODES),
+                     state="readonly", width=9).pack(side="left", padx=(0, 5))
+        self.scan_var = tk.StringVar()
+        self.scan_entry = ttk.Entry(search_frame, textvariable=self.scan_var, width=18, state=tk.DISABLED)
+        self.scan_entry.pack(side="left")
+        self.scan_entry.bind("<Return>", self._on_scan)
+        self.scan_entry.bind("<KP_Enter>", self._on_scan)
+        self.grid_info_var = tk.StringVar()
+        tk.Label(search_frame, textvariable=self.grid_info_var, bg=COLOR_APP_BG, fg="#6c757d", font=FONT_MAIN).pack(side="right")
+
+        # Range filters (inclusive, either end may be left blank); Enter applies them
+        filter_frame = tk.Frame(self.inventory_tab, bg=COLOR_APP_BG)
+        filter_frame.pack(fill="x", padx=20, pady=(0, 5))
+        self.filter_entries = {}
+        for column, text in (("quantity", "Qty. from:"), ("price", "Price from:")):
+            tk.Label(filter_frame, text=text, bg=COLOR_APP_BG, font=FONT_MAIN).pack(side="left", padx=(0, 5))
+            low = ttk.Entry(filter_frame, width=8)
+            low.pack(side="left")
+            tk.Label(filter_frame, text="to", bg=COLOR_APP_BG, font=FONT_MAIN).pack(side="left", padx=5)
+            high = ttk.Entry(filter_frame, width=8)
+            high.pack(side="left", padx=(0, 15))
+            for entry in (low, high):
+                entry.bind("<Return>", lambda _e: self.apply_filters())
+            self.filter_entries[column] = (low, high)
+        ttk.Button(filter_frame, text="Filter", command=self.apply_filters, style="Update.TButton").pack(side="left")
+        ttk.Button(filter_frame, text="Clear", command=self.clear_filters, style="Delete.TButton").pack(side="left", padx=(5, 0))
 
         # Input frame
-        frame_input = tk.Frame(self, bg=COLOR_FRAME_BG, padx=15, pady=15)
+        frame_input = tk.Frame(self.inventory_tab, bg=COLOR_FRAME_BG, padx=15, pady=15)
         frame_input.pack(fill="x", padx=20, pady=(10, 8))
 
-        labels = ["Name:", "Quantity:", "Price:"]
+        labels = ["Name:", "Quantity:", "Price:", "Reorder Pt:", "Reorder Qty:", "Move Qty:", "SKU:"]
         self.entries = {}
         for i, text in enumerate(labels):
+            row, column = divmod(i, 3)
             tk.Label(frame_input, text=text, bg=COLOR_FRAME_BG, font=FONT_MAIN).grid(
-                row=0, column=i * 2, padx=(10, 5), pady=5, sticky="w"
+                row=row, column=column * 2, padx=(10, 5), pady=5, sticky="w"
             )
             entry = ttk.Entry(frame_input, width=15, font=FONT_MAIN)
-            entry.grid(row=0, column=i * 2 + 1, padx=(0, 15), pady=5, sticky="ew")
-            self.entries[text.split(":")[0].lower()] = entry
+            entry.grid(row=row, column=column * 2 + 1, padx=(0, 15), pady=5, sticky="ew")
+            self.entries[text.split(":")[0].lower().replace(" ", "_")] = entry
 
         # Buttons
         frame_buttons = tk.Frame(frame_input, bg=COLOR_FRAME_BG)
-        frame_buttons.grid(row=0, column=6, rowspan=2, padx=10, sticky="nsew")
+        frame_buttons.grid(row=0, column=6, padx=10, sticky="nsew")
 
         ttk.Button(frame_buttons, text="Add", style="Add.TButton",
                    command=self.add_item_ui,
@@ -170,55 +436,154 @@ class InventoryApp(tk.Tk):
                    command=self.delete_item_ui,
                    state=tk.NORMAL if self.role == "admin" else tk.DISABLED).pack(side=tk.LEFT, padx=5)
 
+        # Stock movements: relative and atomic, so every register may use them
+        frame_moves = tk.Frame(frame_input, bg=COLOR_FRAME_BG)
+        frame_moves.grid(row=1, column=6, padx=10, sticky="nsew")
+        ttk.Button(frame_moves, text="Sell", style="Update.TButton",
+                   command=lambda: self.move_stock_ui("sell")).pack(side=tk.LEFT, padx=5)
+        ttk.Button(frame_moves, text="Receive", style="Add.TButton",
+                   command=lambda: self.move_stock_ui("receive")).pack(side=tk.LEFT, padx=5)
+
         # Inventory Table
-        frame_inventory = tk.Frame(self, bg=COLOR_FRAME_BG, padx=20, pady=15)
+        frame_inventory = tk.Frame(self.inventory_tab, bg=COLOR_FRAME_BG, padx=20, pady=15)
         frame_inventory.pack(fill="both", expand=True, padx=20, pady=(5, 15))
 
-        scrollbar = ttk.Scrollbar(frame_inventory, orient="vertical")
-        scrollbar.pack(side="right", fill="y")
+        self.inventory_scrollbar = ttk.Scrollbar(frame_inventory, orient="vertical")
+        self.inventory_scrollbar.pack(side="right", fill="y")
 
         self.inventory_tree = ttk.Treeview(
             frame_inventory,
-            columns=("ID", "Name", "Quantity", "Price"),
+            # RawPrice (hidden) keeps the unformatted price for placing patched rows in price order
+            columns=("ID", "Name", "Quantity", "Price", "Reorder", "ReorderQty", "SKU", "RawPrice"),
+            displaycolumns=("ID", "Name", "Quantity", "Price", "Reorder", "ReorderQty", "SKU"),
             show="headings",
-            yscrollcommand=scrollbar.set,
+            yscrollcommand=self._on_tree_scroll,
         )
         self.inventory_tree.pack(fill="both", expand=True)
-        scrollbar.config(command=self.inventory_tree.yview)
+        self.inventory_scrollbar.config(command=self.inventory_tree.yview)
 
         self.inventory_tree.heading("ID", text="ID", anchor="center")
         self.inventory_tree.heading("Name", text="Item Name")
         self.inventory_tree.heading("Quantity", text="Qty.", anchor="center")
         self.inventory_tree.heading("Price", text="Price", anchor="e")
+        self.inventory_tree.heading("Reorder", text="Reorder Pt.", anchor="center")
+        self.inventory_tree.heading("ReorderQty", text="Reorder Qty", anchor="center")
+        self.inventory_tree.heading("SKU", text="SKU / Barcode")
+        self.grid_headings = {column: self.inventory_tree.heading(column, "text") for column in GRID_SORTS}
+        for column, key in GRID_SORTS.items():
+            self.inventory_tree.heading(column, command=lambda k=key: self._sort_grid(k))
+        self._show_grid_sort()
 
         self.inventory_tree.column("ID", width=60, anchor="center")
-        self.inventory_tree.column("Name", width=350, stretch=tk.YES)
-        self.inventory_tree.column("Quantity", width=100, anchor="center")
-        self.inventory_tree.column("Price", width=150, anchor="e")
+        self.inventory_tree.column("Name", width=300, stretch=tk.YES)
+        self.inventory_tree.column("Quantity", width=90, anchor="center")
+        self.inventory_tree.column("Price", width=140, anchor="e")
+        self.inventory_tree.column("Reorder", width=100, anchor="center")
+        self.inventory_tree.column("ReorderQty", width=100, anchor="center")
+        self.inventory_tree.column("SKU", width=140)
 
         # Row tag styles
         self.inventory_tree.tag_configure("low_stock", background="#FFF3CD")  # light yellow for low stock
         self.inventory_tree.bind("<<TreeviewSelect>>", self.item_selected)
 
     # ---------------------------
-    # SEARCH FEATURE
+    # SEARCH FEATURE (search-as-you-type)
     # ---------------------------
     def search_items(self):
-        term = self.search_var.get().strip()
-        self.load_inventory(search_term=term)
+        self._cancel_pending_search()
+        self._start_live_search()
+
+    def reset_search(self):
+        self.search_var.set("")
+        self._clear_filter_entries()
+        self._cancel_pending_search()
+        self.load_inventory()
+
+    def apply_filters(self):
+        ranges = {}
+        for column, parse in (("quantity", int), ("price", float)):
+            bounds = []
+            for entry in self.filter_entries[column]:
+                text = entry.get().strip().replace(",", "")
+                try:
+                    bounds.append(parse(text) if text else None)
+                except ValueError:
+                    self.set_status(f"⚠️ Invalid {column} filter: {text!r}")
+                    return
+            if bounds != [None, None]:
+                ranges[column] = tuple(bounds)
+        self._grid_ranges = ranges
+        self.search_items()
+
+    def clear_filters(self):
+        self._clear_filter_entries()
+        self.search_items()
+
+    def _clear_filter_entries(self):
+        for entries in self.filter_entries.values():
+            for entry in entries:
+                entry.delete(0, tk.END)
+        self._grid_ranges = {}
+
+    def _on_search_changed(self, *_):
+        self._cancel_pending_search()
+        self._search_after_id = self.after(SEARCH_DEBOUNCE_MS, self._start_live_search)
+
+    def _cancel_pending_search(self):
+        if self._search_after_id is not None:
+            self.after_cancel(self._search_after_id)
+            self._search_after_id = None
+
+    def _start_live_search(self):
+        self._search_after_id = None
+        term = self.search_var.get().strip() or None
+        # Bumping the generation makes any in-flight query abort at its next progress check.
+        generation = self._next_grid_generation()
+        sort, descending = self._grid_sort
+        ranges = self._grid_ranges
+        self.search_executor.run(
+            self, self.db.search_items, term,
+            cancelled=lambda: generation != self._grid_generation,
+            sort=sort, descending=descending, ranges=ranges,
+            on_success=lambda result: self._show_search_results(generation, term, ranges, *result),
+            on_error=lambda e: self._search_failed(generation, e),
+        )
+
+    def _search_failed(self, generation, error):
+        if generation == self._grid_generation:
+            self.set_status(f"⚠️ Search failed: {error}")
+
+    def _show_search_results(self, generation, term, ranges, rows, total, write_count):
+        if generation != self._grid_generation:
+            return  # a newer keystroke superseded this query
+        self._reset_grid(term, [self._row_display(row) for row in rows])
+        self.db.prime_count_cache(term, total, write_count, ranges)
+        self.grid_info_var.set(f"{total:,} item(s)")
 
     # ---------------------------
     # STATUS BAR (non-blocking messages)
     # ---------------------------
     def _create_status_bar(self):
         self.status_var = tk.StringVar(value="Ready.")
-        self.status_bar = tk.Label(self, textvariable=self.status_var, bg="#E9ECEF", fg="#333", anchor="w", padx=10)
-        self.status_bar.pack(fill="x", side="bottom")
+        status_frame = tk.Frame(self, bg="#E9ECEF")
+        status_frame.pack(fill="x", side="bottom")
+        self.busy_var = tk.StringVar()
+        tk.Label(status_frame, textvariable=self.busy_var, bg="#E9ECEF", fg="#6c757d", anchor="e", padx=10).pack(side="right")
+        self.status_bar = tk.Label(status_frame, textvariable=self.status_var, bg="#E9ECEF", fg="#333", anchor="w", padx=10)
+        self.status_bar.pack(fill="x", side="left", expand=True)
 
     def set_status(self, message):
         self.status_var.set(message)
         self.after(2500, lambda: self.status_var.set("Ready."))
 
+    def _on_busy_changed(self, _pending):
+        jobs = (self.executor.busy or self.search_executor.busy or self.forecast_executor.busy
+                or self.store_executor.busy)
+        self.busy_var.set("⏳ Working…" if jobs else "")
+
+    def _db_error(self, title, prefix):
+        return lambda e: messagebox.showerror(title, f"{prefix}: {e}")
+
     # ---------------------------
     # EVENT HANDLERS
     # ---------------------------
@@ -226,32 +591,226 @@ class InventoryApp(tk.Tk):
         selected_item = self.inventory_tree.focus()
         if selected_item:
             values = self.inventory_tree.item(selected_item, "values")
-            for entry in self.entries.values():
-                entry.delete(0, tk.END)
+            self._clear_entries()
             self.entries["name"].insert(0, values[1])
             self.entries["quantity"].insert(0, values[2])
             raw_price = values[3].lstrip("₱").replace(",", "")
             self.entries["price"].insert(0, raw_price)
+            self.entries["reorder_pt"].insert(0, values[4])
+            self.entries["reorder_qty"].insert(0, values[5])
+            self.entries["sku"].insert(0, values[6])
             self.selected_item_id = values[0]
         else:
             self.selected_item_id = None
 
     # ---------------------------
-    # LOAD INVENTORY
+    # LOAD INVENTORY (virtualized grid)
     # ---------------------------
     def load_inventory(self, search_term=None):
+        search_term = search_term or None
+        generation = self._next_grid_generation()
+        sort, descending = self._grid_sort
+        self.executor.run(
+            self, self.db.get_items_page, search_term, format_row=self._row_display,
+            sort=sort, descending=descending, ranges=self._grid_ranges,
+            on_success=lambda rows: self._show_first_page(generation, search_term, rows),
+            on_error=self._db_error("Database Error", "Could not load inventory"),
+        )
+
+    def _sort_grid(self, key):
+        sort, descending = self._grid_sort
+        # Same column flips the order; a new one starts ascending, except ID (newest first)
+        self._grid_sort = (key, not descending) if key == sort else (key, key == "id")
+        self._show_grid_sort()
+        self.load_inventory(self._grid_search)
+
+    def _show_grid_sort(self):
+        sort, descending = self._grid_sort
+        for column, key in GRID_SORTS.items():
+            arrow = (" ▼" if descending else " ▲") if key == sort else ""
+            self.inventory_tree.heading(column, text=self.grid_headings[column] + arrow)
+
+    def _next_grid_generation(self):
+        self._grid_generation += 1
+        self.db.cancel_search()
+        return self._grid_generation
+
+    def _show_first_page(self, generation, search_term, rows):
+        if generation != self._grid_generation:
+            return
+        self._reset_grid(search_term, rows)
+        self._update_grid_info()
+        self._refresh_dashboard()
+
+    def _reset_grid(self, search_term, rows):
         for item in self.inventory_tree.get_children():
             self.inventory_tree.delete(item)
-        try:
-            items = self.db.get_all_items(search_term)
-            for item in items:
-                quantity = item[2]
-                row_tags = ("low_stock",) if quantity <= LOW_STOCK_THRESHOLD else ()
-                formatted_price = locale.currency(item[3], grouping=True, symbol="₱")
-                self.inventory_tree.insert("", tk.END, values=(item[0], item[1], item[2], formatted_price), tags=row_tags)
-        except Exception as e:
+        self._grid_search = search_term
+        self._grid_has_newer = False
+        self._grid_has_older = len(rows) == ITEMS_PAGE_SIZE
+        self._insert_rows(rows, tk.END)
+
+    def _row_display(self, item):
+        """Returns (values, tags) for one item row; pages arrive pre-formatted from the read cache."""
+        quantity, reorder_point = item[2], item[4]
+        row_tags = ("low_stock",) if quantity <= reorder_point else ()
+        formatted_price = format_currency(item[3])
+        return (item[0], item[1], quantity, formatted_price, reorder_point, item[5], item[6] or "", item[3]), row_tags
+
+    def _insert_rows(self, display_rows, index):
+        for offset, (values, row_tags) in enumerate(display_rows):
+            position = index if index == tk.END else index + offset
+            self.inventory_tree.insert("", position, iid=str(values[0]), values=values, tags=row_tags)
+
+    # ---------------------------
+    # INCREMENTAL GRID UPDATES
+    # ---------------------------
+    def _patch_row(self, item, refresh=True):
+        """Inserts, updates or drops one row in place, honouring the active search, filters and sort."""
+        iid = str(item[0])
+        tree = self.inventory_tree
+        if not (name_matches(item[1], self._grid_search) and range_matches(item, self._grid_ranges)):
+            self._remove_row(item[0], refresh)
+            return
+        sort = self._grid_sort[0]
+        values, row_tags = self._row_display(item)
+        if tree.exists(iid) and self._grid_key(tree.item(iid, "values")) == item_sort_key(item, sort):
+            tree.item(iid, values=values, tags=row_tags)
+        else:
+            if tree.exists(iid):
+                tree.delete(iid)  # its sort value changed: move it
+            position = self._row_position(item_sort_key(item, sort))
+            if position is not None:
+                children = tree.get_children()
+                top = self._first_visible_index(children) if children else 0
+                self._insert_rows([(values, row_tags)], position)
+                if position < top:
+                    tree.yview_moveto((top + 1) / len(tree.get_children()))
+        if refresh:
+            self._update_grid_info()
+            self._refresh_dashboard()
+
+    def _grid_key(self, values):
+        """item_sort_key for a row already in the grid, rebuilt from its displayed values."""
+        item_id, name, quantity, price = values[0], values[1], values[2], values[7]
+        return item_sort_key((int(item_id), str(name), int(quantity), float(price)), self._grid_sort[0])
+
+    def _row_position(self, key):
+        """Index that keeps the window in grid order, or None if the key lies outside the loaded window.
+
+        A binary search over the window; only the rows it probes are read back from the Treeview.
+        """
+        tree = self.inventory_tree
+        children = tree.get_children()
+        if not children:
+            return 0
+        descending = self._grid_sort[1]
+
+        def above(child):  # does key sort before this row in display order?
+            child_key = self._grid_key(tree.item(child, "values"))
+            return key > child_key if descending else key < child_key
+
+        if above(children[0]):
+            return None if self._grid_has_newer else 0
+        if not above(children[-1]):
+            return None if self._grid_has_older else len(children)
+        low, high = 0, len(children) - 1
+        while low < high:
+            middle = (low + high) // 2
+            if above(children[middle]):
+                high = middle
+            else:
+                low = middle + 1
+        return low
+
+    def _remove_row(self, item_id, refresh=True):
+        iid = str(item_id)
+        if self.inventory_tree.exists(iid):
+            self.inventory_tree.delete(iid)
+        if refresh:
+            self._update_grid_info()
+            self._refresh_dashboard()
+
+    def _clear_entries(self):
+        for entry in self.entries.values():
+            entry.delete(0, tk.END)
+
+    def _update_grid_info(self):
+        generation = self._grid_generation
+
+        def show(total):
+            if generation == self._grid_generation:
+                self.grid_info_var.set(f"{total:,} item(s)")
+
+        self.executor.run(self, self.db.count_items, self._grid_search, self._grid_ranges, on_success=show)
+
+    def _on_tree_scroll(self, first, last):
+        self.inventory_scrollbar.set(first, last)
+        # Fetching from inside yscrollcommand would re-enter it; defer to idle time.
+        if not self._grid_fetch_pending:
+            self._grid_fetch_pending = True
+            self.after_idle(self._prefetch_rows)
+
+    def _prefetch_rows(self):
+        first, last = self.inventory_tree.yview()
+        children = self.inventory_tree.get_children()
+        if children and last >= 1 - GRID_PREFETCH_EDGE and self._grid_has_older:
+            self._fetch_page(older=True, boundary_id=int(children[-1]))
+        elif children and first <= GRID_PREFETCH_EDGE and self._grid_has_newer:
+            self._fetch_page(older=False, boundary_id=int(children[0]))
+        else:
+            self._grid_fetch_pending = False
+
+    def _fetch_page(self, older, boundary_id):
+        generation = self._grid_generation
+        keyset = {"before_id": boundary_id} if older else {"after_id": boundary_id}
+        sort, descending = self._grid_sort
+
+        def apply(rows):
+            self._grid_fetch_pending = False
+            if generation != self._grid_generation:
+                return
+            if older:
+                self._append_older_rows(rows)
+            else:
+                self._prepend_newer_rows(rows)
+
+        def failed(e):
+            self._grid_fetch_pending = False
             messagebox.showerror("Database Error", f"Could not load inventory: {e}")
 
+        self.executor.run(self, self.db.get_items_page, self._grid_search, format_row=self._row_display,
+                          sort=sort, descending=descending, ranges=self._grid_ranges,
+                          on_success=apply, on_error=failed, **keyset)
+
+    def _first_visible_index(self, children):
+        return round(self.inventory_tree.yview()[0] * len(children))
+
+    def _append_older_rows(self, rows):
+        top = self._first_visible_index(self.inventory_tree.get_children())
+        self._grid_has_older = len(rows) == ITEMS_PAGE_SIZE
+        self._insert_rows(rows, tk.END)
+
+        children = self.inventory_tree.get_children()
+        excess = len(children) - GRID_MAX_ROWS
+        if excess > 0:
+            self.inventory_tree.delete(*children[:excess])
+            self._grid_has_newer = True
+            # Keep the same row at the top of the viewport after trimming above it.
+            self.inventory_tree.yview_moveto(max(top - excess, 0) / (len(children) - excess))
+
+    def _prepend_newer_rows(self, rows):
+        top = self._first_visible_index(self.inventory_tree.get_children())
+        self._grid_has_newer = len(rows) == ITEMS_PAGE_SIZE
+        self._insert_rows(rows, 0)
+
+        children = self.inventory_tree.get_children()
+        excess = len(children) - GRID_MAX_ROWS
+        if excess > 0:
+            self.inventory_tree.delete(*children[-excess:])
+            self._grid_has_older = True
+        self.inventory_tree.yview_moveto((top + len(rows)) / len(self.inventory_tree.get_children()))
+
     # ---------------------------
     # VALIDATION
     # ---------------------------
@@ -278,6 +837,19 @@ class InventoryApp(tk.Tk):
 
         return quantity, price
 
+    def _validate_reorder(self, point_str: str, qty_str: str, keep_blank=False):
+        """Parses the reorder fields; blanks become defaults, or None (unchanged) with keep_blank."""
+        values = []
+        for text, label, default in ((point_str, "Reorder point", LOW_STOCK_THRESHOLD), (qty_str, "Reorder qty", 0)):
+            text = text.strip()
+            if not text:
+                values.append(None if keep_blank else default)
+            elif not text.isdigit():
+                raise ValueError(f"{label} must be a whole number.")
+            else:
+                values.append(int(text))
+        return values
+
     # ---------------------------
     # CRUD OPERATIONS
     # ---------------------------
@@ -292,56 +864,694 @@ class InventoryApp(tk.Tk):
 
         try:
             quantity, price = self._validate_input(qty_str, price_str)
-            self.db.add_item(name, quantity, price)
-            self.load_inventory()
-            self.set_status(f"✅ '{name}' added successfully.")
-            for entry in self.entries.values():
-                entry.delete(0, tk.END)
-        except Exception as e:
+            reorder_point, reorder_qty = self._validate_reorder(
+                self.entries["reorder_pt"].get(), self.entries["reorder_qty"].get())
+        except ValueError as e:
             messagebox.showerror("Error", str(e))
+            return
+
+        def added(row):
+            self._patch_row(row)
+            self.set_status(f"✅ '{name}' added successfully.")
+            self._clear_entries()
+
+        self.executor.run(self, self.db.add_item, name, quantity, price, reorder_point, reorder_qty,
+                          self.entries["sku"].get(), on_success=added, on_error=self._db_error("Error", "Failed to add item"))
 
     def update_item_ui(self):
         if self.selected_item_id is None:
             messagebox.showwarning("Selection Error", "Please select an item to update.")
             return
 
+        item_id = self.selected_item_id
         name = self.entries["name"].get().strip()
         qty_str = self.entries["quantity"].get().strip()
         price_str = self.entries["price"].get().strip()
 
         try:
             quantity, price = self._validate_input(qty_str, price_str)
-            self.db.update_item(self.selected_item_id, name, quantity, price)
-            self.load_inventory()
-            self.set_status(f"✅ Item ID {self.selected_item_id} updated.")
-            for entry in self.entries.values():
-                entry.delete(0, tk.END)
-            self.selected_item_id = None
-        except Exception as e:
+            reorder_point, reorder_qty = self._validate_reorder(
+                self.entries["reorder_pt"].get(), self.entries["reorder_qty"].get(), keep_blank=True)
+        except ValueError as e:
             messagebox.showerror("Error", str(e))
+            return
+
+        def updated(row):
+            if row is None:
+                self._remove_row(item_id)
+                messagebox.showerror("Error", f"Item ID {item_id} no longer exists.")
+                return
+            self._patch_row(row)
+            self.set_status(f"✅ Item ID {item_id} updated.")
+            self._clear_entries()
+            self.selected_item_id = None
+
+        # A cleared SKU field removes the item's SKU ("" rather than None)
+        self.executor.run(self, self.db.update_item, item_id, name, quantity, price, reorder_point, reorder_qty,
+                          self.entries["sku"].get(), on_success=updated, on_error=self._db_error("Error", "Failed to update item"))
 
     def delete_item_ui(self):
         if self.selected_item_id is None:
             messagebox.showwarning("Selection Error", "Please select an item to delete.")
             return
 
+        item_id = self.selected_item_id
         item_name = self.entries["name"].get()
         if messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete '{item_name}'?"):
-            try:
-                self.db.delete_item(self.selected_item_id)
-                self.load_inventory()
+            def deleted(_row):
+                self._remove_row(item_id)
                 self.set_status(f"🗑️ '{item_name}' deleted.")
-                for entry in self.entries.values():
-                    entry.delete(0, tk.END)
+                self._clear_entries()
                 self.selected_item_id = None
-            except Exception as e:
-                messagebox.showerror("Database Error", f"Failed to delete item: {e}")
+
+            self.executor.run(self, self.db.delete_item, item_id,
+                              on_success=deleted, on_error=self._db_error("Database Error", "Failed to delete item"))
+
+    def move_stock_ui(self, kind):
+        """Sells or receives "Move Qty" units of the selected item without touching other fields."""
+        if self.selected_item_id is None:
+            messagebox.showwarning("Selection Error", "Please select an item first.")
+            return
+
+        item_id = self.selected_item_id
+        qty_str = self.entries["move_qty"].get().strip()
+        if not qty_str.isdigit() or int(qty_str) <= 0:
+            messagebox.showerror("Input Error", "Move Qty must be a positive whole number.")
+            return
+        quantity = int(qty_str)
+        move = self.db.sell if kind == "sell" else self.db.receive
+
+        def moved(row):
+            self._patch_row(row)
+            self.entries["move_qty"].delete(0, tk.END)
+            self.entries["quantity"].delete(0, tk.END)
+            self.entries["quantity"].insert(0, row[2])
+            verb = "Sold" if kind == "sell" else "Received"
+            self.set_status(f"✅ {verb} {quantity} × '{row[1]}' — {row[2]} left.")
+
+        self.executor.run(self, move, int(item_id), quantity,
+                          on_success=moved, on_error=self._db_error("Stock Error", f"Could not {kind} item"))
+
+    # ---------------------------
+    # BARCODE SCANNER MODE
+    # ---------------------------
+    def _toggle_scanner(self):
+        if self.scanner_var.get():
+            self.scan_entry.config(state=tk.NORMAL)
+            self.scan_entry.focus_set()
+        else:
+            self.scan_var.set("")
+            self.scan_entry.config(state=tk.DISABLED)
+
+    def _on_scan(self, _event=None):
+        code = self.scan_var.get().strip()
+        self.scan_var.set("")  # ready for the next burst before this one is resolved
+        if not code:
+            return "break"
+        quantity = 1
+        count, star, rest = code.partition("*")
+        if star and count.isdigit() and int(count) > 0 and rest.strip():
+            quantity, code = int(count), rest.strip()
+        kind = SCAN_MODES[self.scan_mode_var.get()]
+        move = {"sell": self.db.sell, "receive": self.db.receive}.get(kind)
+
+        def resolve():
+            # Runs on the worker: one index probe, then (optionally) one atomic movement
+            item = self.db.get_item_by_sku(code)
+            if item is None:
+                raise LookupError(f"No item has SKU '{code}'.")
+            return item if move is None else move(item[0], quantity)
+
+        def resolved(row):
+            self._patch_row(row)
+            if move is None:
+                iid = str(row[0])
+                if self.inventory_tree.exists(iid):
+                    self.inventory_tree.selection_set(iid)
+                    self.inventory_tree.focus(iid)
+                    self.inventory_tree.see(iid)
+                self.set_status(f"🏷️ {code}: '{row[1]}' — {row[2]} in stock at {format_currency(row[3])}.")
+            else:
+                verb = "Sold" if kind == "sell" else "Received"
+                self.set_status(f"✅ {verb} {quantity} × '{row[1]}' — {row[2]} left.")
+
+        def failed(e):
+            # No dialog: a modal box would swallow the next scans
+            self.bell()
+            self.set_status(f"⚠️ Scan {code}: {e}")
+
+        self.executor.run(self, resolve, on_success=resolved, on_error=failed)
+        return "break"
+
+    # ---------------------------
+    # BULK CSV IMPORT / EXPORT
+    # ---------------------------
+    def import_items_ui(self):
+        path = filedialog.askopenfilename(title="Import Items", filetypes=[("CSV files", "*.csv"), ("All files", "*.*")])
+        if not path:
+            return
+        progress, report = self._start_progress("Importing")
+
+        def done(stats):
+            progress["done"] = True
+            self.set_status(f"✅ Imported {stats['inserted']:,} new, {stats['updated']:,} updated, "
+                            f"{stats['skipped']:,} skipped.")
+            self.load_inventory(self._grid_search)
+
+        def failed(e):
+            progress["done"] = True
+            messagebox.showerror("Import Failed", f"Nothing was imported: {e}")
+
+        self.executor.run(self, self.db.import_items_csv, path, progress=report,
+                          on_success=done, on_error=failed)
+
+    def export_csv_ui(self, table):
+        path = filedialog.asksaveasfilename(title=f"Export {table.title()}", defaultextension=".csv",
+                                            initialfile=f"{table}.csv", filetypes=[("CSV files", "*.csv")])
+        if not path:
+            return
+        if table == "items":
+            export = self.db.export_items_csv
+        else:
+            def export(path, progress):
+                return self.db.export_transactions_csv(path, progress, include_archived=True)
+        progress, report = self._start_progress("Exporting")
+
+        def done(count):
+            progress["done"] = True
+            self.set_status(f"✅ Exported {count:,} {table} to {path}.")
+
+        def failed(e):
+            progress["done"] = True
+            messagebox.showerror("Export Failed", f"Could not export {table}: {e}")
+
+        self.executor.run(self, export, path, progress=report, on_success=done, on_error=failed)
+
+    def _start_progress(self, label, unit="rows"):
+        """Shows a row counter in the status bar; workers only write the shared dict."""
+        progress = {"rows": 0, "done": False}
+
+        def report(rows):
+            progress["rows"] = rows
+
+        def refresh():
+            if not progress["done"]:
+                self.status_var.set(f"⏳ {label}… {progress['rows']:,} {unit}")
+                self.after(200, refresh)
+
+        refresh()
+        return progress, report
+
+    # ---------------------------
+    # HOUSEKEEPING (archival, idle incremental vacuum)
+    # ---------------------------
+    def archive_transactions_ui(self):
+        days = simpledialog.askinteger(
+            "Archive Transactions", "Move transactions older than how many days\ninto the yearly archive files?",
+            initialvalue=ARCHIVE_AFTER_DAYS, minvalue=1, parent=self)
+        if days is None:
+            return
+        progress, report = self._start_progress("Archiving")
+
+        def done(moved):
+            progress["done"] = True
+            self.set_status(f"🗄️ Archived {moved:,} transactions older than {days} days." if moved
+                            else f"✅ No transactions older than {days} days.")
+
+        def failed(e):
+            progress["done"] = True
+            messagebox.showerror("Archive Failed", f"Archiving stopped: {e}\nBatches already moved stay archived.")
+
+        self.executor.run(self, self.db.archive_transactions, days, progress=report,
+                          on_success=done, on_error=failed)
+
+    def _vacuum_when_idle(self):
+        if self.executor.busy:
+            self.after(IDLE_VACUUM_MS, self._vacuum_when_idle)
+            return
+
+        def stepped(reclaimed):
+            self.after(IDLE_VACUUM_STEP_MS if reclaimed else IDLE_VACUUM_MS, self._vacuum_when_idle)
+
+        self.executor.run(self, self.db.vacuum_step, on_success=stepped,
+                          on_error=lambda _e: self.after(IDLE_VACUUM_MS, self._vacuum_when_idle), background=True)
+
+    def backup_now(self, scheduled=False):
+        if self._backup_running:
+            self.set_status("⏳ A backup is already running.")
+            return
+        self._backup_running = True
+        progress, report = self._start_progress("Backing up", unit="pages")
+
+        def done(result):
+            self._backup_running = False
+            progress["done"] = True
+            path, removed = result
+            rotated = f" ({len(removed)} old file(s) rotated out)" if removed else ""
+            self.set_status(f"💾 Backup verified: {path}{rotated}")
+
+        def failed(e):
+            self._backup_running = False
+            progress["done"] = True
+            if isinstance(e, BackupCancelled):
+                return
+            if scheduled:
+                self.set_status(f"⚠️ Scheduled backup failed: {e}")
+            else:
+                messagebox.showerror("Backup Failed", f"No backup was saved: {e}")
+
+        self.backup_executor.run(self, self.backups.run, progress=lambda copied, _total: report(copied),
+                                 on_success=done, on_error=failed)
+
+    def _backup_when_due(self):
+        if not self._backup_running and self.backups.due():
+            self.backup_now(scheduled=True)
+        self.after(BACKUP_CHECK_MS, self._backup_when_due)
+
+    # ---------------------------
+    # SALES REPORTS (read from the DailyRollup table)
+    # ---------------------------
+    def _create_reports(self):
+        controls = tk.Frame(self.reports_tab, bg=COLOR_APP_BG)
+        controls.pack(fill="x", padx=20, pady=(10, 5))
+
+        tk.Label(controls, text="Group by:", bg=COLOR_APP_BG, font=FONT_MAIN).pack(side="left", padx=(0, 8))
+        self.report_period_var = tk.StringVar(value="day")
+        ttk.Combobox(controls, textvariable=self.report_period_var, values=list(PERIODS),
+                     state="readonly", width=8).pack(side="left", padx=(0, 15))
+        tk.Label(controls, text="Range:", bg=COLOR_APP_BG, font=FONT_MAIN).pack(side="left", padx=(0, 8))
+        self.report_range_var = tk.StringVar(value="Last 30 days")
+        ttk.Combobox(controls, textvariable=self.report_range_var, values=list(REPORT_RANGES),
+                     state="readonly", width=14).pack(side="left", padx=(0, 15))
+        ttk.Button(controls, text="Refresh", command=self.refresh_reports, style="Update.TButton").pack(side="left")
+
+        tables = tk.Frame(self.reports_tab, bg=COLOR_APP_BG)
+        tables.pack(fill="both", expand=True, padx=20, pady=(5, 15))
+        tables.grid_columnconfigure(0, weight=1)
+        tables.grid_columnconfigure(1, weight=1)
+        tables.grid_rowconfigure(0, weight=1)
+
+        self.totals_tree = self._report_tree(tables, 0, "Totals by Period",
+                                             [("Period", "Period", 110, "w"), ("Type", "Type", 80, "w"),
+                                              ("Qty", "Qty.", 70, "center"), ("Amount", "Amount", 110, "e"),
+                                              ("Count", "Txns", 60, "center")])
+        self.top_items_tree = self._report_tree(tables, 1, f"Top {REPORT_TOP_ITEMS} Items by Sales",
+                                                [("Name", "Item Name", 180, "w"), ("Qty", "Qty. Sold", 80, "center"),
+                                                 ("Amount", "Amount", 110, "e"), ("Velocity", "Units/Day", 80, "center")])
+
+    def _report_tree(self, parent, column, title, columns):
+        frame = tk.Frame(parent, bg=COLOR_FRAME_BG, padx=15, pady=10)
+        frame.grid(row=0, column=column, padx=(0 if column == 0 else 10, 0), sticky="nsew")
+        tk.Label(frame, text=title, bg=COLOR_FRAME_BG, font=("Segoe UI Semibold", 11)).pack(anchor="w", pady=(0, 5))
+        tree = ttk.Treeview(frame, columns=[c[0] for c in columns], show="headings")
+        for key, text, width, anchor in columns:
+            tree.heading(key, text=text, anchor=anchor)
+            tree.column(key, width=width, anchor=anchor)
+        tree.pack(fill="both", expand=True)
+        return tree
+
+    def refresh_reports(self):
+        days = REPORT_RANGES[self.report_range_var.get()]
+        start = date.today() - timedelta(days=days - 1) if days else None
+        period = self.report_period_var.get()
+
+        def query():
+            # One worker round-trip for all three rollup queries
+            totals = self.reports.totals(period, start=start)
+            top = self.reports.top_items(REPORT_TOP_ITEMS, start=start)
+            velocity = {row[0]: row[3] for row in self.reports.item_velocity(days or 30)}
+            return totals, top, velocity
+
+        self.executor.run(self, query, on_success=self._show_reports,
+                          on_error=self._db_error("Report Error", "Could not load sales reports"))
+
+    def _show_reports(self, result):
+        totals, top, velocity = result
+        self.totals_tree.delete(*self.totals_tree.get_children())
+        for bucket, tx_type, quantity, amount, tx_count in totals:
+            self.totals_tree.insert("", "end", values=(bucket, tx_type, f"{quantity:,}",
+                                                       format_currency(amount), f"{tx_count:,}"))
+        self.top_items_tree.delete(*self.top_items_tree.get_children())
+        for item_id, name, quantity, amount, _ in top:
+            self.top_items_tree.insert("", "end", values=(name, f"{quantity:,}",
+                                                          format_currency(amount),
+                                                          velocity.get(item_id, 0)))
+
+    # ---------------------------
+    # REORDER SUGGESTIONS (NumPy demand forecast over DailyRollup)
+    # ---------------------------
+    def _create_reorder(self):
+        if self.forecaster is None:
+            tk.Label(self.reorder_tab, text="Reorder suggestions need NumPy. Install it with: pip install numpy",
+                     bg=COLOR_APP_BG, font=FONT_MAIN).pack(anchor="w", padx=20, pady=20)
+            return
+        controls = tk.Frame(self.reorder_tab, bg=COLOR_APP_BG)
+        controls.pack(fill="x", padx=20, pady=(10, 5))
+
+        tk.Label(controls, text="Forecast:", bg=COLOR_APP_BG, font=FONT_MAIN).pack(side="left", padx=(0, 8))
+        self.reorder_method_var = tk.StringVar(value=next(iter(REORDER_METHODS)))
+        method_combo = ttk.Combobox(controls, textvariable=self.reorder_method_var, values=list(REORDER_METHODS),
+                                    state="readonly", width=16)
+        method_combo.pack(side="left", padx=(0, 15))
+        method_combo.bind("<<ComboboxSelected>>", lambda _e: self.refresh_suggestions())
+        self.reorder_all_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(controls, text="Show all items", variable=self.reorder_all_var,
+                        command=self._show_suggestions).pack(side="left", padx=(0, 15))
+        ttk.Button(controls, text="Refresh", command=self.refresh_suggestions, style="Update.TButton").pack(side="left")
+        self.reorder_info = tk.Label(controls, text="", bg=COLOR_APP_BG, font=FONT_MAIN)
+        self.reorder_info.pack(side="left", padx=15)
+
+        frame = tk.Frame(self.reorder_tab, bg=COLOR_FRAME_BG, padx=15, pady=10)
+        frame.pack(fill="both", expand=True, padx=20, pady=(5, 15))
+        scrollbar = ttk.Scrollbar(frame, orient="vertical")
+        scrollbar.pack(side="right", fill="y")
+        # Column keys are ReorderSuggestions columns, so a heading click sorts by its own key
+        self.reorder_headings = {"name": "Item Name", "sku": "SKU / Barcode", "quantity": "On Hand",
+                                 "demand": "Units/Day", "days_of_cover": "Days of Cover", "suggested": "Order Qty."}
+        self.reorder_tree = ttk.Treeview(frame, columns=list(self.reorder_headings), show="headings",
+                                         yscrollcommand=scrollbar.set)
+        self.reorder_tree.pack(fill="both", expand=True)
+        scrollbar.config(command=self.reorder_tree.yview)
+        for key, width, anchor in [("name", 260, "w"), ("sku", 140, "w"), ("quantity", 90, "center"),
+                                   ("demand", 90, "center"), ("days_of_cover", 110, "center"),
+                                   ("suggested", 100, "center")]:
+            self.reorder_tree.heading(key, text=self.reorder_headings[key], anchor=anchor,
+                                      command=lambda k=key: self._sort_suggestions(k))
+            self.reorder_tree.column(key, width=width, anchor=anchor, stretch=key == "name")
+
+    def refresh_suggestions(self):
+        method = REORDER_METHODS[self.reorder_method_var.get()]
+        self.reorder_info.config(text="Forecasting demand…")
+        self.forecast_executor.run(self, self.forecaster.suggest, method, on_success=self._suggestions_ready,
+                                   on_error=self._db_error("Forecast Error", "Could not compute reorder suggestions"))
+
+    def _suggestions_ready(self, suggestions):
+        self.suggestions = suggestions
+        self._show_suggestions()
+
+    def _sort_suggestions(self, key):
+        sort_by, descending = self._suggestion_sort
+        # Same column flips the order; a new one starts with the most urgent end (biggest demand/order first)
+        self._suggestion_sort = (key, not descending) if key == sort_by else (key, key in ("demand", "suggested"))
+        self._show_suggestions()
+
+    def _show_suggestions(self):
+        if self.suggestions is None:
+            return
+        sort_by, descending = self._suggestion_sort
+        # Sorting happens on the NumPy columns; only the top REORDER_ROWS ever become Treeview rows
+        rows = self.suggestions.rows(sort_by, descending, limit=REORDER_ROWS,
+                                     needed_only=not self.reorder_all_var.get())
+        self.reorder_tree.delete(*self.reorder_tree.get_children())
+        for _item_id, name, sku, quantity, demand, cover, suggested in rows:
+            self.reorder_tree.insert("", "end", values=(name, sku, f"{quantity:,}", demand,
+                                                        "—" if cover is None else cover, f"{suggested:,}"))
+        for key, text in self.reorder_headings.items():
+            arrow = (" ▼" if descending else " ▲") if key == sort_by else ""
+            self.reorder_tree.heading(key, text=text + arrow)
+        self.reorder_info.config(text=f"{self.suggestions.needed:,} of {len(self.suggestions):,} items need "
+                                      f"reordering (sales up to {self.suggestions.as_of:%b %d, %Y}); "
+                                      f"showing {len(rows):,}")
+
+    # ---------------------------
+    # STORES (every branch's database, read in parallel)
+    # ---------------------------
+    def _create_stores(self):
+        controls = tk.Frame(self.stores_tab, bg=COLOR_APP_BG)
+        controls.pack(fill="x", padx=20, pady=(10, 5))
+
+        tk.Label(controls, text="Store:", bg=COLOR_APP_BG, font=FONT_MAIN).pack(side="left", padx=(0, 8))
+        self.store_var = tk.StringVar(value=ALL_STORES)
+        self.store_selector = ttk.Combobox(controls, textvariable=self.store_var, state="readonly", width=18)
+        self.store_selector.pack(side="left", padx=(0, 15))
+        self.store_selector.bind("<<ComboboxSelected>>", lambda _e: self.refresh_stores())
+        self._update_store_selector()
+        tk.Label(controls, text="Search:", bg=COLOR_APP_BG, font=FONT_MAIN).pack(side="left", padx=(0, 8))
+        self.store_search_var = tk.StringVar()
+        search_entry = ttk.Entry(controls, textvariable=self.store_search_var, width=18)
+        search_entry.pack(side="left", padx=(0, 15))
+        search_entry.bind("<Return>", lambda _e: self.refresh_stores())
+        tk.Label(controls, text="Sales:", bg=COLOR_APP_BG, font=FONT_MAIN).pack(side="left", padx=(0, 8))
+        self.store_period_var = tk.StringVar(value="day")
+        ttk.Combobox(controls, textvariable=self.store_period_var, values=list(PERIODS),
+                     state="readonly", width=8).pack(side="left", padx=(0, 5))
+        self.store_range_var = tk.StringVar(value="Last 30 days")
+        ttk.Combobox(controls, textvariable=self.store_range_var, values=list(REPORT_RANGES),
+                     state="readonly", width=14).pack(side="left", padx=(0, 15))
+        ttk.Button(controls, text="Refresh", command=self.refresh_stores, style="Update.TButton").pack(side="left")
+        admin = tk.NORMAL if self.role == "admin" else tk.DISABLED
+        ttk.Button(controls, text="Add Store…", command=self.add_store_ui, style="Add.TButton",
+                   state=admin).pack(side="left", padx=(5, 0))
+        ttk.Button(controls, text="Remove Store", command=self.remove_store_ui, style="Delete.TButton",
+                   state=admin).pack(side="left", padx=(5, 0))
+        self.stores_info = tk.Label(controls, text="", bg=COLOR_APP_BG, fg="#6c757d", font=FONT_MAIN)
+        self.stores_info.pack(side="right")
+
+        tables = tk.Frame(self.stores_tab, bg=COLOR_APP_BG)
+        tables.pack(fill="both", expand=True, padx=20, pady=(5, 15))
+        tables.grid_columnconfigure(0, weight=3)
+        tables.grid_columnconfigure(1, weight=2)
+        tables.grid_rowconfigure(0, weight=1)
+
+        self.store_stock_tree = self._report_tree(tables, 0, "Stock on Hand",
+                                                  [("Name", "Item Name", 180, "w"), ("SKU", "SKU / Barcode", 110, "w"),
+                                                   ("Total", "Total Qty.", 80, "center"),
+                                                   ("Stores", "By Store", 220, "w")])
+        self.store_sales_tree = self._report_tree(tables, 1, "Sales by Period",
+                                                  [("Period", "Period", 100, "w"), ("Type", "Type", 70, "w"),
+                                                   ("Qty", "Qty.", 70, "center"), ("Amount", "Amount", 110, "e"),
+                                                   ("Count", "Txns", 60, "center")])
+
+    def _update_store_selector(self):
+        self.store_selector["values"] = [ALL_STORES] + self.stores.names
+
+    def refresh_stores(self):
+        self._stores_loaded = True
+        choice = self.store_var.get()
+        stores = None if choice == ALL_STORES else [choice]
+        term = self.store_search_var.get().strip() or None
+        days = REPORT_RANGES[self.store_range_var.get()]
+        start = date.today() - timedelta(days=days - 1) if days else None
+        period = self.store_period_var.get()
+
+        def query():
+            # Each view fans out over the selected stores and merges their answers as they arrive
+            stock = self.stores.stock_totals(term, stores, limit=STORE_ROWS)
+            sales = self.stores.sales_totals(period, start=start, stores=stores)
+            return stock, sales
+
+        self.stores_info.config(text="Reading stores…")
+        self.store_executor.run(self, query, on_success=self._show_stores, on_error=self._stores_failed)
+
+    def _show_stores(self, result):
+        stock, sales = result
+        names = self.stores.names
+        self.store_stock_tree.delete(*self.store_stock_tree.get_children())
+        for name, sku, total, per_store in stock:
+            # Registry order, not the order the stores happened to answer in
+            breakdown = ", ".join(f"{store}: {per_store[store]:,}" for store in names if store in per_store)
+            self.store_stock_tree.insert("", "end", values=(name, sku, f"{total:,}", breakdown))
+        self.store_sales_tree.delete(*self.store_sales_tree.get_children())
+        for bucket, tx_type, quantity, amount, tx_count in sales:
+            self.store_sales_tree.insert("", "end", values=(bucket, tx_type, f"{quantity:,}",
+                                                            format_currency(amount), f"{tx_count:,}"))
+        shown = len(names) if self.store_var.get() == ALL_STORES else 1
+        more = f" (first {STORE_ROWS:,} A-Z)" if len(stock) == STORE_ROWS else ""
+        self.stores_info.config(text=f"{len(stock):,} item(s){more} across {shown} store(s)")
+
+    def _stores_failed(self, error):
+        self.stores_info.config(text="")
+        messagebox.showerror("Stores Error", f"Could not read the stores: {error}")
+
+    def add_store_ui(self):
+        path = filedialog.askopenfilename(title="Add Store Database",
+                                          filetypes=[("SQLite databases", "*.db"), ("All files", "*.*")])
+        if not path:
+            return
+        name = simpledialog.askstring("Add Store", "Store name:", parent=self,
+                                      initialvalue=os.path.splitext(os.path.basename(path))[0])
+        name = (name or "").strip()
+        if not name:
+            return
+
+        def add():
+            self.stores.add_store(name, path)
+            try:
+                self.stores.database(name)  # read-only; raises StoreError unless it is a SmartStock database
+            except Exception:
+                self.stores.remove_store(name)
+                raise
+            self.stores.save(registry_path(self.db.db_file))
+
+        self.store_executor.run(self, add, on_success=lambda _: self._stores_changed(f"🏬 Added store {name}."),
+                                on_error=self._db_error("Add Store", f"Could not add {name}"))
+
+    def remove_store_ui(self):
+        name = self.store_var.get()
+        if name in (ALL_STORES, HOME_STORE):
+            messagebox.showinfo("Remove Store", "Pick one of the other stores in the Store list first.")
+            return
+        if not messagebox.askyesno("Remove Store", f"Stop reading {name}?\nIts database file is left untouched."):
+            return
+
+        def remove():
+            self.stores.remove_store(name)
+            self.stores.save(registry_path(self.db.db_file))
+
+        def removed(_):
+            self.store_var.set(ALL_STORES)
+            self._stores_changed(f"🏬 Removed store {name}.")
+
+        self.store_executor.run(self, remove, on_success=removed,
+                                on_error=self._db_error("Remove Store", f"Could not remove {name}"))
+
+    def _stores_changed(self, message):
+        self._update_store_selector()
+        self.set_status(message)
+        self.refresh_stores()
+
+    # ---------------------------
+    # DATABASE STATS (admin, live instrumentation view)
+    # ---------------------------
+    def show_stats_window(self):
+        if self.role != "admin":
+            return
+        if self.stats_window is not None and self.stats_window.winfo_exists():
+            self.stats_window.lift()
+            return
+
+        window = self.stats_window = tk.Toplevel(self)
+        window.title("Database Stats")
+        window.configure(bg=COLOR_APP_BG)
+        center_window(window, 900, 560)
+
+        controls = tk.Frame(window, bg=COLOR_APP_BG)
+        controls.pack(fill="x", padx=15, pady=(10, 5))
+        self.stats_enabled_var = tk.BooleanVar(value=self.db.instrumentation is not None)
+        ttk.Checkbutton(controls, text="Instrumentation enabled", variable=self.stats_enabled_var,
+                        command=self._toggle_instrumentation).pack(side="left")
+        ttk.Button(controls, text="Export Prometheus…", style="Update.TButton",
+                   command=lambda: self._export_stats("prometheus")).pack(side="right")
+        ttk.Button(controls, text="Export JSON…", style="Update.TButton",
+                   command=lambda: self._export_stats("json")).pack(side="right", padx=5)
+        ttk.Button(controls, text="Reset", style="Delete.TButton",
+                   command=self._reset_stats).pack(side="right", padx=5)
+
+        self.stats_pool_var = tk.StringVar()
+        tk.Label(window, textvariable=self.stats_pool_var, bg=COLOR_APP_BG, fg="#6c757d",
+                 font=FONT_MAIN, anchor="w").pack(fill="x", padx=15)
+
+        methods = tk.Frame(window, bg=COLOR_FRAME_BG, padx=10, pady=10)
+        methods.pack(fill="both", expand=True, padx=15, pady=(5, 5))
+        columns = [("Method", 200, "w"), ("Calls", 70, "center"), ("Errors", 60, "center"), ("SQL", 60, "center"),
+                   ("Mean", 80, "e"), ("p50", 80, "e"), ("p95", 80, "e"), ("Max", 80, "e")]
+        self.stats_tree = ttk.Treeview(methods, columns=[c[0] for c in columns], show="headings", height=8)
+        for name, width, anchor in columns:
+            self.stats_tree.heading(name, text=name if name in ("Method", "Calls", "Errors", "SQL") else f"{name} ms",
+                                    anchor=anchor)
+            self.stats_tree.column(name, width=width, anchor=anchor)
+        self.stats_tree.pack(fill="both", expand=True)
+
+        slow = tk.Frame(window, bg=COLOR_FRAME_BG, padx=10, pady=10)
+        slow.pack(fill="both", expand=True, padx=15, pady=(5, 15))
+        self.stats_slow_title = tk.StringVar()
+        tk.Label(slow, textvariable=self.stats_slow_title, bg=COLOR_FRAME_BG,
+                 font=("Segoe UI Semibold", 10)).pack(anchor="w")
+        self.slow_tree = ttk.Treeview(slow, columns=("Time", "Method", "ms", "SQL"), show="headings", height=6)
+        for name, width, anchor in (("Time", 140, "w"), ("Method", 150, "w"), ("ms", 70, "e"), ("SQL", 480, "w")):
+            self.slow_tree.heading(name, text=name, anchor=anchor)
+            self.slow_tree.column(name, width=width, anchor=anchor)
+        self.slow_tree.pack(fill="both", expand=True)
+        self.slow_tree.bind("<<TreeviewSelect>>", self._show_slow_plan)
+        self.stats_plan_var = tk.StringVar()
+        tk.Label(slow, textvariable=self.stats_plan_var, bg=COLOR_FRAME_BG, fg="#6c757d", justify="left",
+                 anchor="w", wraplength=840, font=("Consolas", 9)).pack(fill="x", pady=(5, 0))
+
+        self._slow_entries = []
+        self._refresh_stats()
+
+    def _toggle_instrumentation(self):
+        if self.stats_enabled_var.get():
+            self.db.enable_instrumentation()
+        else:
+            self.db.disable_instrumentation()
+        self._refresh_stats(reschedule=False)
+
+    def _reset_stats(self):
+        if self.db.instrumentation is not None:
+            self.db.instrumentation.reset()
+        self._refresh_stats(reschedule=False)
+
+    def _refresh_stats(self, reschedule=True):
+        # Snapshots are in-memory counters, cheap enough to read on the Tk thread
+        if self.stats_window is None or not self.stats_window.winfo_exists():
+            return
+        pool = self.db.pool_stats()
+        cache = self.db.cache_stats()
+        self.stats_pool_var.set(
+            f"Readers {pool['readers_open']}/{pool['max_readers']} open, {pool['readers_idle']} idle · "
+            f"reader waits {pool['reader_waits']:,} · writer waits {pool['writer_waits']:,} "
+            f"(max {pool['writer_max_wait'] * 1000:.1f} ms) · "
+            f"read cache {cache['hit_rate']:.0%} hits, {cache['entries']} queries / {cache['rows']:,} rows")
+
+        instrumentation = self.db.instrumentation
+        snapshot = instrumentation.snapshot() if instrumentation is not None else {"methods": {}, "slow_queries": []}
+        self.stats_tree.delete(*self.stats_tree.get_children())
+        for name, m in snapshot["methods"].items():
+            self.stats_tree.insert("", "end", values=(name, f"{m['calls']:,}", m["errors"], f"{m['statements']:,}",
+                                                      f"{m['mean_ms']:.2f}", f"{m['p50_ms']:.2f}",
+                                                      f"{m['p95_ms']:.2f}", f"{m['max_ms']:.2f}"))
+
+        slow_entries = snapshot["slow_queries"][::-1]
+        if slow_entries != self._slow_entries:
+            # Rebuilding only on change keeps the user's selection while they read a plan
+            self._slow_entries = slow_entries
+            self.slow_tree.delete(*self.slow_tree.get_children())
+            for index, entry in enumerate(slow_entries):
+                self.slow_tree.insert("", "end", iid=str(index), values=(
+                    entry["time"], entry["method"], f"{entry['ms']:.1f}", " ".join(entry["sql"].split())))
+        if instrumentation is None:
+            self.stats_slow_title.set("Slow statements (instrumentation is off)")
+        else:
+            self.stats_slow_title.set(f"Slow statements (≥ {instrumentation.slow_ms:g} ms, newest first)"
+                                      " — select one to see its query plan")
+        if reschedule:
+            self.stats_window.after(STATS_REFRESH_MS, self._refresh_stats)
+
+    def _show_slow_plan(self, _event):
+        selected = self.slow_tree.focus()
+        if selected and int(selected) < len(self._slow_entries):
+            plan = self._slow_entries[int(selected)]["plan"]
+            self.stats_plan_var.set("\n".join(plan) if plan else "(no query plan for this statement)")
+
+    def _export_stats(self, fmt):
+        instrumentation = self.db.instrumentation
+        if instrumentation is None:
+            messagebox.showwarning("Database Stats", "Enable instrumentation first.", parent=self.stats_window)
+            return
+        extension = ".prom" if fmt == "prometheus" else ".json"
+        path = filedialog.asksaveasfilename(parent=self.stats_window, title="Export Database Stats",
+                                            defaultextension=extension, initialfile=f"smartstock_stats{extension}")
+        if not path:
+            return
+        try:
+            instrumentation.export(path, fmt)
+            self.set_status(f"✅ Database stats exported to {path}.")
+        except OSError as e:
+            messagebox.showerror("Export Failed", f"Could not export stats: {e}", parent=self.stats_window)
 
     # ---------------------------
     # EXIT HANDLER
     # ---------------------------
     def on_closing(self):
         if messagebox.askokcancel("Quit", "Do you want to quit SmartStock?"):
+            self.executor.remove_busy_listener(self._on_busy_changed)
+            self.search_executor.shutdown(wait=False)
+            self.backups.cancel()
+            self.backup_executor.shutdown(wait=False)
+            self.forecast_executor.shutdown(wait=False)
+            self.store_executor.shutdown(wait=False)
+            self.stores.close()
             self.destroy()
 
 
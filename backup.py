@@ -0,0 +1,156 @@
+# backup.py
+"""Online snapshots of the live database through the SQLite backup API.
+
+Copying inventory.db while the app writes can capture a half-written page, and
+stopping the app stops sales. BackupManager copies pages with Connection.backup()
+in small steps, on a connection of its own, inside one read transaction. In WAL
+mode that read snapshot never blocks the writer. And because the pages it reads
+cannot change under it, the copy never restarts however busy the tills are
+(without it, every commit from another connection restarts the backup).
+
+Each snapshot is written to .part files, checked with PRAGMA integrity_check and
+only then renamed into place. rotate() keeps the newest `keep` snapshots.
+Snapshots live in backups/ next to the database as inventory-YYYYmmdd-HHMMSS.db.
+The yearly archives are copied alongside as inventory-YYYYmmdd-HHMMSS.archive-2024.db,
+so a restored snapshot opens with its archives attached.
+"""
+import glob
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+
+BACKUP_DIR = "backups"
+BACKUP_KEEP = 7               # snapshots kept by rotate(); older ones are deleted
+BACKUP_STEP_PAGES = 1024      # pages copied per step (4 MB at the default page size)
+BACKUP_STEP_SLEEP = 0.005     # seconds between steps, leaving the disk to the tills
+BACKUP_INTERVAL_HOURS = 24    # due() once the newest snapshot is older than this
+_STAMP_FORMAT = "%Y%m%d-%H%M%S"
+
+
+class BackupCancelled(Exception):
+    """cancel() was called while a snapshot was being copied."""
+
+
+class BackupError(Exception):
+    """A copied snapshot failed PRAGMA integrity_check."""
+
+
+class BackupManager:
+    """Takes, verifies and rotates online snapshots of one DatabaseManager's database."""
+
+    def __init__(self, db, backup_dir=None, keep=BACKUP_KEEP, pages=BACKUP_STEP_PAGES, sleep=BACKUP_STEP_SLEEP):
+        if db.db_file in ("", ":memory:") or db.db_file.startswith("file:"):
+            raise ValueError("Backups need a database file, not an in-memory database.")
+        self.db = db
+        self.backup_dir = backup_dir or os.path.join(os.path.dirname(os.path.abspath(db.db_file)), BACKUP_DIR)
+        self.keep = max(1, keep)
+        self.pages = pages
+        self.sleep = sleep
+        self._stem = os.path.splitext(os.path.basename(db.db_file))[0]
+        self._snapshot_name = re.compile(re.escape(self._stem) + r"-(\d{8}-\d{6})\.db$")
+        self._cancel = threading.Event()
+
+    # -----------------------------
+    # SNAPSHOTS ON DISK
+    # -----------------------------
+    def snapshots(self):
+        """Returns (taken_at, path) for every finished snapshot, newest first."""
+        if not os.path.isdir(self.backup_dir):
+            return []
+        found = []
+        for name in os.listdir(self.backup_dir):
+            match = self._snapshot_name.match(name)
+            if match:
+                found.append((datetime.strptime(match.group(1), _STAMP_FORMAT), os.path.join(self.backup_dir, name)))
+        return sorted(found, reverse=True)
+
+    def due(self, interval_hours=BACKUP_INTERVAL_HOURS):
+        """True when there is no snapshot younger than interval_hours."""
+        snapshots = self.snapshots()
+        return not snapshots or (datetime.now() - snapshots[0][0]).total_seconds() >= interval_hours * 3600
+
+    def rotate(self):
+        """Deletes all but the newest `keep` snapshots, archive copies included. Returns the removed paths."""
+        removed = []
+        for _, path in self.snapshots()[self.keep:]:
+            for file in self._archive_copies(path) + [path]:
+                os.remove(file)
+                removed.append(file)
+        return removed
+
+    @staticmethod
+    def _archive_copies(snapshot):
+        return glob.glob(glob.escape(os.path.splitext(snapshot)[0]) + ".archive-[0-9][0-9][0-9][0-9].db")
+
+    # -----------------------------
+    # TAKING & CHECKING SNAPSHOTS
+    # -----------------------------
+    def backup(self, progress=None):
+        """Copies the live database and its archives into a new, verified snapshot. Returns its path.
+
+        progress(copied_pages, total_pages) is called after every step on the calling
+        thread, once per file. Nothing is renamed into place until every copy has
+        passed its integrity check, so a failed or cancelled run leaves no snapshot.
+        """
+        self._cancel.clear()
+        os.makedirs(self.backup_dir, exist_ok=True)
+        target = os.path.join(self.backup_dir, f"{self._stem}-{datetime.now().strftime(_STAMP_FORMAT)}.db")
+        copies = [(self.db.db_file, target)]
+        copies += [(self.db.archive_path(year), f"{target[:-3]}.archive-{year}.db") for year in self.db.archived_years]
+        try:
+            for source, dest in copies:
+                self._copy(source, dest + ".part", progress)
+                self.verify(dest + ".part")
+            # The main file goes last: snapshots() only ever lists complete sets
+            for _, dest in reversed(copies):
+                os.replace(dest + ".part", dest)
+        finally:
+            for _, dest in copies:
+                if os.path.exists(dest + ".part"):
+                    os.remove(dest + ".part")
+        return target
+
+    def _copy(self, source, dest, progress):
+        if os.path.exists(dest):
+            os.remove(dest)  # left over from a crashed run
+        src = sqlite3.connect(source)
+        dst = sqlite3.connect(dest)
+        try:
+            src.execute("PRAGMA busy_timeout = 5000")
+            # Pin one WAL snapshot for the whole copy (the WAL cannot be checkpointed past it until we finish)
+            src.execute("BEGIN")
+            src.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+
+            def step(_status, remaining, total):
+                if self._cancel.is_set():
+                    raise BackupCancelled("Backup cancelled.")
+                if progress:
+                    progress(total - remaining, total)
+
+            src.backup(dst, pages=self.pages, progress=step, sleep=self.sleep)
+            # A snapshot is one self-contained file, not a WAL database
+            dst.execute("PRAGMA journal_mode = DELETE")
+        finally:
+            src.close()
+            dst.close()
+
+    def verify(self, path):
+        """Runs PRAGMA integrity_check on a snapshot file; raises BackupError unless it reports ok."""
+        conn = sqlite3.connect(path)
+        try:
+            problems = [row[0] for row in conn.execute("PRAGMA integrity_check")]
+        finally:
+            conn.close()
+        if problems != ["ok"]:
+            raise BackupError(f"{os.path.basename(path)} failed its integrity check: {'; '.join(problems[:5])}")
+
+    def run(self, progress=None):
+        """Takes a snapshot, then rotates. Returns (snapshot path, removed paths)."""
+        path = self.backup(progress)
+        return path, self.rotate()
+
+    def cancel(self):
+        """Stops a running backup() at its next step (it raises BackupCancelled)."""
+        self._cancel.set()
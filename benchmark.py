@@ -0,0 +1,399 @@
+# benchmark.py
+"""Reproducible, headless benchmarks for DatabaseManager and the grid load path.
+
+Examples:
+    python benchmark.py --scale 1k
+    python benchmark.py --scale 1k 100k 1m --output results.json
+    python benchmark.py --scale 100k --compare baseline.json
+    python benchmark.py --scale 100k --cached    # reads also timed on a warm read cache
+
+Seeded catalogs are generated once into --data-dir and reused; every run works
+on a fresh copy, so write benchmarks never leak into the next run. The grid load
+path runs against a stubbed Treeview unless --tk is given and a display
+(or Xvfb) is available.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from database_manager import DatabaseManager, ITEMS_PAGE_SIZE, PURCHASE, QUERY_CACHE_SIZE, SALE
+import forecasting
+
+# Catalog sizes: label -> (items, transactions)
+SCALES = {
+    "1k": (1_000, 5_000),
+    "100k": (100_000, 200_000),
+    "1m": (1_000_000, 1_000_000),
+}
+DEFAULT_ITERATIONS = 200
+FULL_SCAN_RUNS = 5          # get_all_items / get_all_transactions return every row
+OPEN_RUNS = 20              # cold opens of an up-to-date database (startup cost)
+SEED_CHUNK_SIZE = 10_000
+HISTORY_DAYS = 365
+REGRESSION_THRESHOLD = 0.10  # --compare flags p50 slowdowns above 10%
+
+ADJECTIVES = ["Fresh", "Organic", "Premium", "Classic", "Spicy", "Sweet", "Salted", "Frozen", "Instant", "Family"]
+NOUNS = ["Rice", "Noodles", "Coffee", "Sardines", "Bread", "Milk", "Soap", "Vinegar", "Sugar", "Eggs",
+         "Corned Beef", "Soy Sauce", "Biscuits", "Shampoo", "Detergent", "Juice", "Candy", "Oil"]
+
+
+# -------------------------------
+# SEEDED DATA GENERATOR
+# -------------------------------
+def item_name(rng, n):
+    return f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {n}"
+
+
+def seed_database(path, items, transactions, seed=42, progress=None):
+    """Creates a catalog of `items` items and `transactions` history rows at path.
+
+    The same (items, transactions, seed) always produces the same database.
+    """
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    rng = random.Random(seed)
+    db = DatabaseManager(path, durability="off")
+    try:
+        names = []
+        for start in range(0, items, SEED_CHUNK_SIZE):
+            rows = []
+            for n in range(start, min(start + SEED_CHUNK_SIZE, items)):
+                name = item_name(rng, n)
+                names.append(name)
+                rows.append((name, rng.randint(0, 500), round(rng.uniform(5, 2500), 2),
+                             rng.randint(0, 20), rng.choice((0, 12, 24, 48))))
+            with db.pool.writer() as conn:
+                conn.executemany(
+                    "INSERT INTO InventoryItems (name, quantity, price, reorder_point, reorder_qty) "
+                    "VALUES (?, ?, ?, ?, ?)", rows)
+                conn.commit()
+            if progress:
+                progress("items", start + len(rows))
+
+        # Seeded items start after the default one created by _setup_database
+        first_id = db.read("SELECT MIN(id) FROM InventoryItems WHERE name = ?", (names[0],))[0][0] if names else 1
+        now = int(time.time())
+        oldest = now - HISTORY_DAYS * 86400
+        for start in range(0, transactions, SEED_CHUNK_SIZE):
+            rows = []
+            count = min(SEED_CHUNK_SIZE, transactions - start)
+            # Timestamps grow with the row id, like a real append-only log
+            for k in range(count):
+                ts = oldest + (start + k) * (now - oldest) // max(transactions, 1)
+                index = rng.randrange(len(names)) if names else 0
+                rows.append((names[index] if names else "Item", rng.randint(1, 24), round(rng.uniform(5, 2500), 2),
+                             SALE if rng.random() < 0.8 else PURCHASE,
+                             datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S"),
+                             first_id + index if names else None, ts))
+            with db.pool.writer() as conn:
+                conn.executemany(
+                    "INSERT INTO Transactions (item_name, quantity, price, transaction_type, date, item_id, ts) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+                conn.commit()
+            if progress:
+                progress("transactions", start + count)
+        with db.pool.writer() as conn:
+            conn.execute("ANALYZE")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        db.close()
+
+
+def seeded_copy(data_dir, scale, seed, progress=None):
+    """Returns a fresh working copy of the cached seed database for scale."""
+    items, transactions = SCALES[scale]
+    os.makedirs(data_dir, exist_ok=True)
+    source = os.path.join(data_dir, f"seed_{scale}_{seed}.db")
+    if not os.path.exists(source):
+        print(f"🌱 Generating {scale} catalog ({items:,} items, {transactions:,} transactions)…", file=sys.stderr)
+        # Built under a temporary name so an interrupted run is never reused
+        seed_database(source + ".tmp", items, transactions, seed, progress)
+        os.replace(source + ".tmp", source)
+        print(file=sys.stderr)
+    work = os.path.join(data_dir, f"run_{scale}_{seed}.db")
+    for suffix in ("-wal", "-shm"):
+        if os.path.exists(work + suffix):
+            os.remove(work + suffix)
+    shutil.copyfile(source, work)
+    return work
+
+
+# -------------------------------
+# MEASUREMENT
+# -------------------------------
+def peak_rss_kb():
+    """Peak resident set size of this process in KiB (None where unsupported)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak  # macOS reports bytes
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100
+    lower = int(k)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (k - lower)
+
+
+def summarize(latencies, wall_seconds):
+    """Latency percentiles in milliseconds plus operations per second of wall time."""
+    ordered = sorted(latencies)
+    ms = lambda seconds: round(seconds * 1000, 4)
+    return {
+        "runs": len(ordered),
+        "p50_ms": ms(percentile(ordered, 50)),
+        "p90_ms": ms(percentile(ordered, 90)),
+        "p99_ms": ms(percentile(ordered, 99)),
+        "min_ms": ms(ordered[0]) if ordered else 0.0,
+        "max_ms": ms(ordered[-1]) if ordered else 0.0,
+        "mean_ms": ms(sum(ordered) / len(ordered)) if ordered else 0.0,
+        "ops_per_sec": round(len(ordered) / wall_seconds, 2) if wall_seconds else None,
+        "peak_rss_kb": peak_rss_kb(),
+    }
+
+
+def measure(fn, runs, warmup=1, finish=None):
+    """Times `runs` calls of fn(i); finish() (e.g. a flush) is counted in the wall time only."""
+    for i in range(warmup):
+        fn(-1 - i)
+    latencies = []
+    started = time.perf_counter()
+    for i in range(runs):
+        t0 = time.perf_counter()
+        fn(i)
+        latencies.append(time.perf_counter() - t0)
+    if finish:
+        finish()
+    return summarize(latencies, time.perf_counter() - started)
+
+
+# -------------------------------
+# GRID LOAD PATH (stubbed widgets)
+# -------------------------------
+class _StubTree:
+    """The slice of ttk.Treeview that InventoryApp's grid code touches."""
+
+    def __init__(self):
+        self._rows = {}
+
+    def get_children(self):
+        return tuple(self._rows)
+
+    def delete(self, *iids):
+        for iid in iids:
+            self._rows.pop(iid, None)
+
+    def insert(self, parent, index, iid=None, values=(), tags=()):
+        self._rows[iid] = (values, tags)
+        return iid
+
+
+def _headless_grid():
+    """Binds InventoryApp's grid methods to a stub, so no Tk root is created."""
+    from app_ui import InventoryApp
+
+    class HeadlessGrid:
+        _reset_grid = InventoryApp._reset_grid
+        _insert_rows = InventoryApp._insert_rows
+        _row_display = InventoryApp._row_display
+
+        def __init__(self):
+            self.inventory_tree = _StubTree()
+
+    return HeadlessGrid()
+
+
+def _tk_load_inventory(db, runs):
+    """Drives the real InventoryApp under a display; times load_inventory() to first page."""
+    from app_ui import InventoryApp
+
+    app = InventoryApp(db, "admin")
+    app.withdraw()
+    shown = []
+    show_first_page = app._show_first_page
+
+    def recorded(*args):
+        show_first_page(*args)
+        shown.append(time.perf_counter())
+
+    app._show_first_page = recorded
+
+    def load(_):
+        before = len(shown)
+        app.load_inventory()
+        while len(shown) == before:
+            app.update()
+
+    try:
+        return measure(load, runs)
+    finally:
+        while app.executor.busy:
+            app.update()
+        app.search_executor.shutdown(wait=True)
+        app.executor.shutdown(wait=True)
+        app.destroy()
+
+
+# -------------------------------
+# SUITE
+# -------------------------------
+def _read_benchmarks(db, iterations, seed, suffix=""):
+    """Times the read paths; every name gets suffix, and the same seed repeats the same queries."""
+    rng = random.Random(seed)
+    newest_id = db.read("SELECT MAX(id) FROM InventoryItems")[0][0] or 1
+    nouns = [noun.lower() for noun in NOUNS]
+    full_runs = min(iterations, FULL_SCAN_RUNS)
+    results = {}
+
+    results["get_all_items"] = measure(lambda i: db.get_all_items(), full_runs)
+    results["get_all_items[search]"] = measure(lambda i: db.get_all_items(rng.choice(nouns)), full_runs)
+    results["get_items_page"] = measure(lambda i: db.get_items_page(), iterations)
+    results["get_items_page[deep]"] = measure(
+        lambda i: db.get_items_page(before_id=rng.randint(1, newest_id)), iterations)
+    results["search_items"] = measure(lambda i: db.search_items(rng.choice(nouns)), iterations)
+    results["count_items[search]"] = measure(lambda i: db.count_items(f"{rng.choice(nouns)} {i}"), iterations)
+    results["get_all_transactions"] = measure(lambda i: db.get_all_transactions(), full_runs)
+    results["get_all_transactions[limit]"] = measure(lambda i: db.get_all_transactions(limit=ITEMS_PAGE_SIZE),
+                                                     iterations)
+    results["get_all_transactions[item]"] = measure(
+        lambda i: db.get_all_transactions(item_id=rng.randint(1, newest_id)), iterations)
+    results["get_inventory_summary"] = measure(lambda i: db.get_inventory_summary(), iterations)
+    results["get_low_stock_items"] = measure(lambda i: db.get_low_stock_items(), iterations)
+    return {name + suffix: stats for name, stats in results.items()}
+
+
+def run_suite(db_file, iterations=DEFAULT_ITERATIONS, seed=42, use_tk=False, query_cache=False):
+    """Runs every benchmark against db_file and returns {name: stats}.
+
+    Reads are timed with the read cache off, so every call runs its query. With
+    query_cache they are timed again with the cache on, as separate "…[cached]"
+    entries: after the warm-up call most of those are cache hits.
+    """
+    rng = random.Random(seed)
+    results = {"open_database": measure(lambda i: DatabaseManager(db_file).close(), min(iterations, OPEN_RUNS))}
+    if query_cache:
+        with contextlib.closing(DatabaseManager(db_file, query_cache_size=QUERY_CACHE_SIZE)) as db:
+            cached = _read_benchmarks(db, iterations, seed, suffix="[cached]")
+    db = DatabaseManager(db_file, query_cache_size=0)
+    try:
+        results.update(_read_benchmarks(db, iterations, seed))
+        if query_cache:
+            results.update(cached)
+        full_runs = min(iterations, FULL_SCAN_RUNS)
+        if forecasting.AVAILABLE:
+            engine = forecasting.ReorderEngine(db)
+            results["reorder_suggestions"] = measure(lambda i: engine.suggest(), full_runs)
+
+        results["add_item"] = measure(
+            lambda i: db.add_item(f"Bench Item {i}", rng.randint(0, 500), round(rng.uniform(5, 2500), 2)),
+            iterations, finish=db.flush)
+        results["record_transaction"] = measure(
+            lambda i: db.record_transaction(f"Bench Item {max(i, 0)}", rng.randint(1, 24), 9.5, SALE),
+            iterations, finish=db.flush)
+
+        if use_tk:
+            results["load_inventory[tk]"] = _tk_load_inventory(db, min(iterations, 50))
+        else:
+            grid = _headless_grid()
+            results["load_inventory[stub]"] = measure(
+                lambda i: grid._reset_grid(None, db.get_items_page(format_row=grid._row_display)), iterations)
+    finally:
+        db.close()
+    return results
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+    }
+
+
+def compare(current, baseline, threshold=REGRESSION_THRESHOLD):
+    """Prints p50 changes against a previous run; returns the number of regressions."""
+    regressions = 0
+    for scale, benches in current["scales"].items():
+        old_benches = baseline.get("scales", {}).get(scale, {})
+        for name, stats in benches.items():
+            old = old_benches.get(name)
+            if not old or not old.get("p50_ms"):
+                continue
+            change = stats["p50_ms"] / old["p50_ms"] - 1
+            flag = "  ⚠️ regression" if change > threshold else ""
+            regressions += bool(flag)
+            print(f"{scale:>5} {name:<32} {old['p50_ms']:>10.3f} → {stats['p50_ms']:>10.3f} ms  {change:+.1%}{flag}")
+    return regressions
+
+
+def _progress(label, rows):
+    print(f"\r  {label}: {rows:,} rows", end="", file=sys.stderr, flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="smartstock-bench", description="SmartStock performance benchmarks")
+    parser.add_argument("--scale", nargs="+", choices=list(SCALES), default=["1k"], help="catalog sizes to run")
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS, help="timed calls per benchmark")
+    parser.add_argument("--seed", type=int, default=42, help="random seed for data and query parameters")
+    parser.add_argument("--data-dir", default="bench_data", help="where seeded databases are cached")
+    parser.add_argument("--output", help="write results as JSON to this file (default: stdout)")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON from an earlier run to compare p50 latencies with")
+    parser.add_argument("--tk", action="store_true", help="drive the real Tk window (needs a display or Xvfb)")
+    parser.add_argument("--cached", action="store_true",
+                        help="also time the reads with the read cache on (mostly warm hits), as '[cached]' entries")
+    args = parser.parse_args(argv)
+
+    if args.tk and not (os.environ.get("DISPLAY") or sys.platform in ("win32", "darwin")):
+        parser.error("--tk needs a display; run under xvfb-run or drop --tk to use the stubbed grid")
+
+    report = {"environment": environment(), "iterations": args.iterations, "seed": args.seed,
+              "query_cache": args.cached, "scales": {}}
+    # DatabaseManager prints status lines; keep stdout clean for the JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        for scale in args.scale:
+            db_file = seeded_copy(args.data_dir, scale, args.seed, _progress)
+            print(f"⏱️ Running {scale} benchmarks…")
+            report["scales"][scale] = run_suite(db_file, args.iterations, args.seed, args.tk, args.cached)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"✅ Results written to {args.output}.", file=sys.stderr)
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        return 1 if compare(report, baseline) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+# cli.py
+"""Headless SmartStock commands (no Tkinter needed).
+
+Examples:
+    python cli.py import-items supplier_prices.csv
+    python cli.py --db branch2.db export-items items.csv
+    python cli.py export-transactions transactions.csv
+    python cli.py rebuild-rollups
+    python cli.py archive --days 365
+    python cli.py backup --keep 14 --every 24
+    python cli.py reorder --limit 50
+    python cli.py store-add "Branch 2" //branch2/smartstock/inventory.db
+    python cli.py store-stock --search coffee
+    python cli.py store-sales --period month --days 365
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from datetime import date, timedelta
+
+from backup import BackupManager, BackupError, BACKUP_KEEP
+from database_manager import DatabaseManager
+from forecasting import ReorderEngine, ReorderSuggestions, SalesHistory, METHODS, LEAD_TIME_DAYS, COVER_DAYS
+from reporting import PERIODS
+from stores import StoreManager, StoreError, registry_path
+
+
+def _progress(label):
+    def report(rows):
+        print(f"\r{label}: {rows:,} rows", end="", file=sys.stderr, flush=True)
+    return report
+
+
+# -------------------------------
+# COMMANDS
+# -------------------------------
+def cmd_import_items(db, args):
+    stats = db.import_items_csv(args.csv_file, upsert=not args.no_upsert,
+                                chunk_size=args.chunk_size, progress=_progress("Importing"))
+    print(file=sys.stderr)
+    print(f"✅ Imported {args.csv_file}: {stats['inserted']:,} inserted, "
+          f"{stats['updated']:,} updated, {stats['skipped']:,} skipped.")
+
+
+def cmd_export_items(db, args):
+    count = db.export_items_csv(args.csv_file, progress=_progress("Exporting"))
+    print(file=sys.stderr)
+    print(f"✅ Exported {count:,} items to {args.csv_file}.")
+
+
+def cmd_export_transactions(db, args):
+    count = db.export_transactions_csv(args.csv_file, progress=_progress("Exporting"),
+                                       include_archived=args.include_archived)
+    print(file=sys.stderr)
+    print(f"✅ Exported {count:,} transactions to {args.csv_file}.")
+
+
+def cmd_rebuild_rollups(db, args):
+    rows = db.rebuild_daily_rollups()
+    SalesHistory(db).clear()  # cached forecast history was copied from the old rollups
+    print(f"✅ Rebuilt daily rollups: {rows:,} rows.")
+
+
+def cmd_archive(db, args):
+    moved = db.archive_transactions(args.days, batch_size=args.batch_size, progress=_progress("Archiving"))
+    print(file=sys.stderr)
+    print(f"✅ Archived {moved:,} transactions older than {args.days} days.")
+    if not args.no_vacuum:
+        cmd_vacuum(db, args)
+
+
+def cmd_vacuum(db, args):
+    reclaimed = 0
+    while True:
+        pages = db.vacuum_step()
+        if not pages:
+            break
+        reclaimed += pages
+    print(f"✅ Reclaimed {reclaimed:,} free pages.")
+
+
+def cmd_backup(db, args):
+    backups = BackupManager(db, backup_dir=args.dir, keep=args.keep)
+    report = _progress("Backing up")
+    while True:
+        if args.every is None or backups.due(args.every):
+            path, removed = backups.run(progress=lambda copied, _total: report(copied))
+            print(file=sys.stderr)
+            print(f"✅ Backup verified: {path} ({len(removed)} old file(s) rotated out).")
+        if args.every is None:
+            return
+        time.sleep(60)
+
+
+def cmd_reorder(db, args):
+    suggestions = ReorderEngine(db).suggest(args.method, lead_time_days=args.lead_time, cover_days=args.cover_days)
+    print(f"{'ID':>7}  {'Item':<32} {'SKU':<14} {'On hand':>8} {'Units/day':>10} {'Cover':>7} {'Order':>7}")
+    for item_id, name, sku, quantity, demand, cover, suggested in suggestions.rows(args.sort, limit=args.limit):
+        print(f"{item_id:>7}  {name[:32]:<32} {sku[:14]:<14} {quantity:>8,} {demand:>10} "
+              f"{'-' if cover is None else cover:>7} {suggested:>7,}")
+    print(f"✅ {suggestions.needed:,} of {len(suggestions):,} items need reordering.")
+
+
+def cmd_store_add(db, args):
+    stores = StoreManager.for_database(db)
+    try:
+        stores.add_store(args.name, os.path.abspath(args.db_file))
+        stores.database(args.name)  # read-only; raises StoreError unless it is a SmartStock database
+        stores.save(registry_path(db.db_file))
+    finally:
+        stores.close()
+    print(f"✅ Registered store {args.name} ({args.db_file}).")
+
+
+def cmd_store_stock(db, args):
+    stores = StoreManager.for_database(db)
+    try:
+        shown = args.store or stores.names
+        rows = stores.stock_totals(args.search, args.store, limit=args.limit)
+    finally:
+        stores.close()
+    print(f"{'Item':<32} {'SKU':<14} {'Total':>8}" + "".join(f" {name[:10]:>10}" for name in shown))
+    for name, sku, total, per_store in rows:
+        print(f"{name[:32]:<32} {sku[:14]:<14} {total:>8,}" + "".join(f" {per_store.get(s, 0):>10,}" for s in shown))
+    print(f"✅ {len(rows):,} item(s) across {len(shown)} store(s).")
+
+
+def cmd_store_sales(db, args):
+    start = date.today() - timedelta(days=args.days - 1) if args.days else None
+    stores = StoreManager.for_database(db)
+    try:
+        rows = stores.sales_totals(args.period, start=start, stores=args.store)
+    finally:
+        stores.close()
+    print(f"{'Period':<10} {'Type':<10} {'Qty':>10} {'Amount':>14} {'Txns':>8}")
+    for bucket, tx_type, quantity, amount, tx_count in rows:
+        print(f"{bucket:<10} {tx_type:<10} {quantity:>10,} {amount:>14,.2f} {tx_count:>8,}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="smartstock", description="SmartStock headless commands")
+    parser.add_argument("--db", default="inventory.db", help="SQLite database file (default: inventory.db)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("import-items", help="bulk import/upsert items from a CSV (name, quantity, price)")
+    p.add_argument("csv_file")
+    p.add_argument("--chunk-size", type=int, default=1000, help="rows per executemany batch")
+    p.add_argument("--no-upsert", action="store_true", help="always insert, even if the name already exists")
+    p.set_defaults(func=cmd_import_items)
+
+    p = commands.add_parser("export-items", help="stream all items to a CSV file")
+    p.add_argument("csv_file")
+    p.set_defaults(func=cmd_export_items)
+
+    p = commands.add_parser("export-transactions", help="stream all transactions to a CSV file")
+    p.add_argument("csv_file")
+    p.add_argument("--include-archived", action="store_true", help="also export the yearly archive files")
+    p.set_defaults(func=cmd_export_transactions)
+
+    p = commands.add_parser("rebuild-rollups", help="recompute the DailyRollup reporting table from Transactions")
+    p.set_defaults(func=cmd_rebuild_rollups)
+
+    p = commands.add_parser("archive", help="move old transactions into yearly archive files, then vacuum")
+    p.add_argument("--days", type=int, default=365, help="archive transactions older than this (default: 365)")
+    p.add_argument("--batch-size", type=int, default=5000, help="rows moved per write transaction")
+    p.add_argument("--no-vacuum", action="store_true", help="leave the freed pages for the app's idle vacuum")
+    p.set_defaults(func=cmd_archive)
+
+    p = commands.add_parser("vacuum", help="return free pages to the filesystem (incremental vacuum)")
+    p.set_defaults(func=cmd_vacuum)
+
+    p = commands.add_parser("backup", help="take a verified online snapshot while the app keeps running")
+    p.add_argument("--dir", help="snapshot folder (default: backups/ next to the database)")
+    p.add_argument("--keep", type=int, default=BACKUP_KEEP, help=f"snapshots kept (default: {BACKUP_KEEP})")
+    p.add_argument("--every", type=float, metavar="HOURS", help="keep running and back up whenever one is due")
+    p.set_defaults(func=cmd_backup)
+
+    p = commands.add_parser("reorder", help="forecast demand from sales history and list suggested orders (needs NumPy)")
+    p.add_argument("--method", choices=METHODS, default="ewma", help="demand forecast (default: ewma)")
+    p.add_argument("--lead-time", type=int, default=LEAD_TIME_DAYS, help=f"days until an order arrives (default: {LEAD_TIME_DAYS})")
+    p.add_argument("--cover-days", type=int, default=COVER_DAYS, help=f"days an order should last (default: {COVER_DAYS})")
+    p.add_argument("--sort", choices=ReorderSuggestions.COLUMNS, default="days_of_cover", help="sort column (default: days_of_cover)")
+    p.add_argument("--limit", type=int, help="show at most this many items")
+    p.set_defaults(func=cmd_reorder)
+
+    p = commands.add_parser("store-add", help="register another store's database for the store-* commands and the Stores tab")
+    p.add_argument("name")
+    p.add_argument("db_file")
+    p.set_defaults(func=cmd_store_add)
+
+    p = commands.add_parser("store-stock", help="total stock per item across stores, A to Z")
+    p.add_argument("--search", help="only items matching this search, as in the inventory grid")
+    p.add_argument("--store", action="append", help="only this store (repeatable; default: all stores)")
+    p.add_argument("--limit", type=int, help="show at most this many items")
+    p.set_defaults(func=cmd_store_stock)
+
+    p = commands.add_parser("store-sales", help="sales and purchase totals per period, summed across stores")
+    p.add_argument("--period", choices=list(PERIODS), default="day", help="group by (default: day)")
+    p.add_argument("--days", type=int, default=30, help="days back from today, 0 for all time (default: 30)")
+    p.add_argument("--store", action="append", help="only this store (repeatable; default: all stores)")
+    p.set_defaults(func=cmd_store_sales)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    db = DatabaseManager(args.db)
+    try:
+        args.func(db, args)
+    except (OSError, ValueError, RuntimeError, sqlite3.Error, BackupError, StoreError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,223 @@
+# connection_pool.py
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import quote
+
+# WAL lets readers keep going while the single writer commits
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "cache_size": -16000,          # negative = KiB, so ~16 MB of page cache per connection
+    "mmap_size": 128 * 1024 * 1024,
+    "busy_timeout": 5000,          # ms to wait on a lock held by another process
+    "foreign_keys": "ON",          # Transactions.item_id -> InventoryItems(id)
+}
+DEFAULT_MAX_READERS = 4
+
+
+class ConnectionPool:
+    """One dedicated writer connection plus a bounded pool of reader connections.
+
+    writer() hands out the single write connection under a re-entrant lock.
+    reader() checks out a read connection for the calling thread; nested
+    checkouts on the same thread reuse it, and once max_readers are busy new
+    callers wait. Both paths record checkout counts and wait times (see stats()).
+    set_session() gives every connection the same ATTACHed databases and TEMP
+    objects; each connection catches up the next time it is checked out.
+    read_only=True opens every connection and attachment with mode=ro and
+    leaves journal_mode as the file has it.
+    """
+
+    def __init__(self, db_file, max_readers=DEFAULT_MAX_READERS, pragmas=None, synchronous="NORMAL",
+                 read_only=False):
+        self.db_file = db_file
+        self.read_only = read_only
+        self.max_readers = max(1, max_readers)
+        self.pragmas = dict(DEFAULT_PRAGMAS, **(pragmas or {}))
+        self.pragmas["synchronous"] = synchronous
+
+        self._local = threading.local()
+        self._idle = []
+        self._all_readers = []
+        self._idle_lock = threading.Lock()
+        self._reader_slots = threading.BoundedSemaphore(self.max_readers)
+        self._writer_lock = threading.RLock()
+        self._trace_callback = None
+        self._version_conn = None
+        self._version_lock = threading.Lock()
+        self._attachments = {}         # alias -> database file
+        self._session_sql = []
+        self._session_generation = 0
+        self._synced = {}              # connection -> session generation it has applied
+
+        self._stats = {
+            "reader_checkouts": 0, "reader_waits": 0, "reader_wait_seconds": 0.0, "reader_max_wait": 0.0,
+            "writer_checkouts": 0, "writer_waits": 0, "writer_wait_seconds": 0.0, "writer_max_wait": 0.0,
+        }
+        self.writer_conn = self._open(writer=True)
+
+    # -----------------------------
+    # CONNECTIONS
+    # -----------------------------
+    def _open(self, writer=False):
+        # Connections move between threads but are only ever used by one at a time
+        conn = sqlite3.connect(self._target(self.db_file), check_same_thread=False, uri=self.read_only)
+        for name, value in self.pragmas.items():
+            if name == "journal_mode" and (self.read_only or not writer):
+                continue  # persistent, database-wide; the writer sets it once
+            conn.execute(f"PRAGMA {name} = {value}")
+        if self._trace_callback is not None:
+            conn.set_trace_callback(self._trace_callback)
+        self.sync_session(conn)
+        return conn
+
+    def _target(self, path):
+        # What sqlite3.connect / ATTACH are given for a database file
+        if not self.read_only:
+            return path
+        return f"file:{quote(os.path.abspath(path))}?mode=ro"
+
+    def set_session(self, attachments, session_sql=()):
+        """Attaches {alias: file} on every connection, then runs session_sql there (e.g. TEMP views).
+
+        Aliases no longer listed are detached. The writer is brought up to date
+        now; readers as they are checked out.
+        """
+        with self._idle_lock:
+            self._attachments = dict(attachments)
+            self._session_sql = list(session_sql)
+            self._session_generation += 1
+        with self.writer():
+            pass
+
+    def sync_session(self, conn):
+        """Applies the current set_session() state to conn unless it already has it.
+
+        ATTACH/DETACH fail inside a transaction, so a connection with one open
+        is left alone and retried on its next checkout. Returns True when conn is current.
+        """
+        with self._idle_lock:
+            generation = self._session_generation
+            if self._synced.get(conn) == generation:
+                return True
+            attachments, session_sql = dict(self._attachments), list(self._session_sql)
+        if conn.in_transaction:
+            return False
+        attached = {row[1] for row in conn.execute("PRAGMA database_list")} - {"main", "temp"}
+        for alias in attached - set(attachments):
+            conn.execute(f"DETACH DATABASE {alias}")
+        for alias, path in attachments.items():
+            if alias not in attached:
+                conn.execute(f"ATTACH DATABASE ? AS {alias}", (self._target(path),))
+        for sql in session_sql:
+            conn.execute(sql)
+        with self._idle_lock:
+            # A set_session() since the read above bumped the generation, so conn resyncs next checkout
+            if self._synced.get(conn, -1) < generation:
+                self._synced[conn] = generation
+        return True
+
+    @property
+    def lock(self):
+        return self._writer_lock
+
+    @contextmanager
+    def writer(self):
+        """Yields the write connection; callers on other threads wait their turn."""
+        if not self._writer_lock.acquire(blocking=False):
+            started = time.perf_counter()
+            self._writer_lock.acquire()
+            self._record_wait("writer", time.perf_counter() - started)
+        try:
+            self._stats["writer_checkouts"] += 1
+            self.sync_session(self.writer_conn)
+            yield self.writer_conn
+        finally:
+            self._writer_lock.release()
+
+    @contextmanager
+    def reader(self):
+        """Yields a read connection owned by the calling thread until the block exits."""
+        held = getattr(self._local, "conn", None)
+        if held is not None:
+            yield held  # nested checkout on the same thread
+            return
+
+        if not self._reader_slots.acquire(blocking=False):
+            started = time.perf_counter()
+            self._reader_slots.acquire()
+            self._record_wait("reader", time.perf_counter() - started)
+        try:
+            with self._idle_lock:
+                self._stats["reader_checkouts"] += 1
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                conn = self._open()
+                with self._idle_lock:
+                    self._all_readers.append(conn)
+            self._local.conn = conn
+            try:
+                self.sync_session(conn)
+                yield conn
+            finally:
+                self._local.conn = None
+                if conn.in_transaction:
+                    conn.rollback()
+                with self._idle_lock:
+                    self._idle.append(conn)
+        finally:
+            self._reader_slots.release()
+
+    def data_version(self):
+        """PRAGMA data_version from a connection that never writes.
+
+        The value changes whenever any connection - this pool's writer or another
+        process - commits, which makes it a cheap validity token for cached reads.
+        """
+        with self._version_lock:
+            if self._version_conn is None:
+                self._version_conn = self._open()
+            return self._version_conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def set_trace_callback(self, callback):
+        """Installs (or with None removes) an SQL trace callback on every connection, current and future."""
+        with self._idle_lock:
+            self._trace_callback = callback
+            connections = [self.writer_conn] + self._all_readers
+        if self._version_conn is not None:
+            connections.append(self._version_conn)
+        for conn in connections:
+            conn.set_trace_callback(callback)
+
+    def _record_wait(self, kind, seconds):
+        with self._idle_lock:
+            self._stats[f"{kind}_waits"] += 1
+            self._stats[f"{kind}_wait_seconds"] += seconds
+            self._stats[f"{kind}_max_wait"] = max(self._stats[f"{kind}_max_wait"], seconds)
+
+    # -----------------------------
+    # METRICS & SHUTDOWN
+    # -----------------------------
+    def stats(self):
+        """Returns checkout/wait counters plus the current reader pool occupancy."""
+        with self._idle_lock:
+            stats = dict(self._stats)
+            stats["readers_open"] = len(self._all_readers)
+            stats["readers_idle"] = len(self._idle)
+        stats["max_readers"] = self.max_readers
+        return stats
+
+    def close(self):
+        with self._idle_lock:
+            readers, self._all_readers, self._idle = self._all_readers, [], []
+            self._synced.clear()
+        for conn in readers:
+            conn.close()
+        with self._version_lock:
+            if self._version_conn is not None:
+                self._version_conn.close()
+                self._version_conn = None
+        with self._writer_lock:
+            self.writer_conn.close()
@@ -1,16 +1,273 @@
 # database_manager.py
+import atexit
+import csv
+import glob
+import os
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
 from sqlite3 import Error
-from datetime import datetime
+from datetime import date, datetime
+
+from connection_pool import ConnectionPool, DEFAULT_MAX_READERS
+from instrumentation import Instrumentation, SLOW_QUERY_MS
+from query_cache import QueryCache
+
+LOW_STOCK_THRESHOLD = 5  # default reorder point for new items
+ITEM_COLUMNS = "id, name, quantity, price, reorder_point, reorder_qty, sku"
+ITEMS_PAGE_SIZE = 100
+# Grid sorting: sort key -> ORDER BY expression. Each has an index, and id breaks ties
+# (an index on a rowid table ends in id), so keyset pages are index range scans.
+ITEM_SORTS = {"id": "id", "name": "name COLLATE NOCASE", "quantity": "quantity", "price": "price"}
+# Grid range filters: column -> its position in ITEM_COLUMNS rows
+ITEM_RANGES = {"quantity": 2, "price": 3}
+# A range on another column than the sort that matches more rows than this is not read
+# through its own index (that would sort all of them); the sort index is walked instead
+RANGE_SORT_MAX_ROWS = ITEMS_PAGE_SIZE * 20
+
+# Transaction types
+SALE = "sale"
+PURCHASE = "purchase"
+ADJUSTMENT = "adjustment"
+SEARCH_PROGRESS_STEPS = 1000  # SQLite VM steps between live-search cancellation checks
+IMPORT_CHUNK_SIZE = 1000      # CSV rows buffered per executemany batch
+# SQLite caps bound parameters per statement; keep IN (...) lookups below it
+_MAX_IN_PARAMS = 500
+
+# Group commit: writes share one commit (one fsync) until either limit is reached
+WRITE_BATCH_SIZE = 32        # pending writes that force a commit
+WRITE_BATCH_WINDOW = 0.1     # seconds a pending write may wait before it is committed
+DURABILITY_MODES = {"full": "FULL", "normal": "NORMAL", "off": "OFF"}  # -> PRAGMA synchronous
+
+# Read cache: results stay valid until anyone commits (PRAGMA data_version) or we write
+QUERY_CACHE_SIZE = 64           # cached queries; 0 disables the cache
+QUERY_CACHE_MAX_ROWS = 200_000  # rows across all cached results
+
+# Change feed: triggers log every item write so other terminals can apply just the deltas
+CHANGE_LOG_KEEP = 10_000     # newest ItemChanges rows kept; older ones are pruned by the trigger
+CHANGE_FEED_LIMIT = 500      # more changed items than this in one poll means "reload instead"
+
+# Schema migrations: PRAGMA user_version records the last step applied (see _migrate_schema)
+SCHEMA_VERSION = 3
+
+# Archival: old transactions move into one attached database file per year
+ARCHIVE_AFTER_DAYS = 365     # transactions older than this leave the hot Transactions table
+ARCHIVE_BATCH_SIZE = 5000    # rows moved per write transaction; the writer is released in between
+VACUUM_STEP_PAGES = 256      # free pages handed back to the filesystem per incremental vacuum step
+TX_COLUMNS = "id, item_name, quantity, price, transaction_type, date, item_id, ts"
+
+# The trigram tokenizer cannot match terms shorter than three characters
+FTS_MIN_TOKEN_LENGTH = 3
+
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+
+def search_tokens(search_term):
+    """Splits a search term into the words that must all appear in a match."""
+    return search_term.split() if search_term else []
+
+
+def name_matches(name, search_term):
+    """Mirrors the search filter (every word is an ASCII case-insensitive substring) for a single row."""
+    if name is None:
+        return False
+    folded = name.translate(_ASCII_LOWER)
+    return all(token.translate(_ASCII_LOWER) in folded for token in search_tokens(search_term))
+
+
+def range_matches(item, ranges):
+    """Mirrors the range filter for a single item row: every (low, high) bound holds, None is open."""
+    for column, (low, high) in (ranges or {}).items():
+        value = item[ITEM_RANGES[column]]
+        if (low is not None and value < low) or (high is not None and value > high):
+            return False
+    return True
+
+
+def item_sort_key(item, sort):
+    """Mirrors ORDER BY ITEM_SORTS[sort], id for a single item row (at least id, name, quantity, price)."""
+    if sort == "id":
+        return (item[0],)
+    if sort == "name":
+        return (item[1].translate(_ASCII_LOWER), item[0])
+    return (item[ITEM_RANGES[sort]], item[0])
+
+
+def _range_filter(ranges, clauses, params, skip_index=()):
+    # {column: (low, high)} -> inclusive bounds; each column has its own index,
+    # which a unary + hides from the planner for the columns in skip_index
+    for column, (low, high) in (ranges or {}).items():
+        if column not in ITEM_RANGES:
+            raise ValueError(f"Cannot filter items by {column!r}.")
+        operand = f"+{column}" if column in skip_index else column
+        if low is not None:
+            clauses.append(f"{operand} >= ?")
+            params.append(low)
+        if high is not None:
+            clauses.append(f"{operand} <= ?")
+            params.append(high)
+
+
+def _range_key(search_term, ranges):
+    """count_items cache key: the bare term when unfiltered, so _adjust_count_cache can patch it."""
+    key = search_term or ""
+    if not ranges:
+        return key
+    return key, tuple(sorted((column, tuple(bounds)) for column, bounds in ranges.items()))
+
+
+def _locked(method):
+    """Runs the method while holding the single writer connection (self.conn).
+
+    A write whose statement fails leaves sqlite3's implicit BEGIN open without
+    ever reaching _commit(); that transaction is ended on the way out, or it
+    would keep the WAL write lock from every other terminal.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.pool.writer():
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                self._end_orphaned_transaction()
+    return wrapper
+
+
+def to_epoch(value):
+    """Converts a datetime/date, a local "YYYY-MM-DD[ HH:MM:SS]" string or epoch number to epoch seconds."""
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if isinstance(value, date) and not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    return int(value.timestamp())
+
+
+def _read_csv_chunks(f, chunk_size):
+    """Yields lists of at most chunk_size records (dicts keyed by lower-cased header)."""
+    reader = csv.DictReader(f)
+    if reader.fieldnames is None:
+        return
+    reader.fieldnames = [field.strip().lower() for field in reader.fieldnames]
+    missing = {"name", "quantity", "price"} - set(reader.fieldnames)
+    if missing:
+        raise ValueError(f"CSV is missing required column(s): {', '.join(sorted(missing))}")
+
+    chunk = []
+    for record in reader:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _parse_item_record(record):
+    """Returns (name, quantity, price, reorder_point, reorder_qty, sku) or None when the row is not a valid item.
+
+    The reorder and sku columns are optional and come back as None when blank or absent.
+    """
+    name = (record.get("name") or "").strip()
+    try:
+        quantity = int((record.get("quantity") or "").strip())
+        price = float((record.get("price") or "").strip().replace(",", ""))
+        reorder_point = _optional_int(record.get("reorder_point"))
+        reorder_qty = _optional_int(record.get("reorder_qty"))
+    except ValueError:
+        return None
+    if not name or quantity < 0 or price < 0 or (reorder_point or 0) < 0 or (reorder_qty or 0) < 0:
+        return None
+    return name, quantity, price, reorder_point, reorder_qty, normalize_sku(record.get("sku"))
+
+
+def normalize_sku(sku):
+    """Strips scanner/keyboard whitespace; a blank SKU is stored as NULL."""
+    sku = (sku or "").strip()
+    return sku or None
+
+
+def _optional_int(value):
+    value = (value or "").strip()
+    return int(value) if value else None
+
+
+class SchemaError(sqlite3.DatabaseError):
+    """A file opened read-only is not a SmartStock database (so it cannot be migrated into one)."""
+
+
+class StockError(ValueError):
+    """A stock movement would take an item's quantity below zero (or names no item, see ItemNotFound)."""
+
+    def __init__(self, message, item_id):
+        super().__init__(message)
+        self.item_id = item_id
+
+
+class ItemNotFound(StockError):
+    """No inventory item has this id (it was deleted, or never existed)."""
+
+    def __init__(self, item_id):
+        super().__init__(f"Item ID {item_id} does not exist.", item_id)
 
-LOW_STOCK_THRESHOLD = 5
 
 class DatabaseManager:
-    def __init__(self, db_file="inventory.db"):
+    def __init__(self, db_file="inventory.db", batch_size=WRITE_BATCH_SIZE,
+                 batch_window=WRITE_BATCH_WINDOW, durability="normal",
+                 pool_size=DEFAULT_MAX_READERS, pragmas=None, instrument=False,
+                 query_cache_size=QUERY_CACHE_SIZE, read_only=False):
+        """batch_size=1 commits every write immediately; durability is "full", "normal" or "off".
+
+        pool_size caps concurrent reader connections; pragmas overrides the
+        connection_pool.DEFAULT_PRAGMAS (journal_mode, cache_size, mmap_size, busy_timeout).
+        instrument=True starts with enable_instrumentation() already on.
+        query_cache_size bounds the read cache (see cached_read()); 0 turns it off.
+        read_only=True opens the file with mode=ro and checks its schema instead of
+        migrating it, raising SchemaError for anything that is not a SmartStock
+        database (used for other stores' files, see stores.py).
+        """
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Unknown durability mode: {durability}")
         self.db_file = db_file
+        # Archives sit next to the database file: inventory.db -> inventory.archive-2023.db
+        in_memory = db_file in ("", ":memory:") or db_file.startswith("file:")
+        self._archive_base = None if in_memory else os.path.splitext(db_file)[0]
+        self._archived_years = None   # attached on first use, see archived_years
         self.conn = None
+        self.pool = None
+        self.pool_size = pool_size
+        self.pragmas = pragmas
+        self.read_only = read_only
+        self.batch_size = max(1, batch_size)
+        self.batch_window = batch_window
+        self.durability = durability
+        self._pending_writes = 0
+        self._batch_started = 0.0
+        self._batch_depth = 0
+        self._flush_timer = None
+        self._count_cache = {}
+        self.fts_enabled = False
+        self.write_count = 0
+        self._search_conn = None
+        self._search_lock = threading.Lock()
+        self._search_conn_lock = threading.Lock()
+        self.instrumentation = None
+        self._query_cache = QueryCache(query_cache_size, QUERY_CACHE_MAX_ROWS)
+        started = time.perf_counter()
         self._connect()
-        self._setup_database()
+        try:
+            self._setup_database()
+        except BaseException:
+            self.pool.close()  # e.g. SchemaError: nothing else will close it
+            raise
+        self.open_seconds = time.perf_counter() - started  # connect + schema check, for startup tracking
+        if instrument:
+            self.enable_instrumentation()
+        # Grouped writes still waiting for their timer must not be lost at exit (close() unregisters)
+        atexit.register(self._flush_at_exit)
         
     # -----------------------------
     # CONNECTION & SETUP
@@ -18,14 +275,67 @@ class DatabaseManager:
     def _connect(self):
         """Creates a database connection to the SQLite database specified by db_file"""
         try:
-            self.conn = sqlite3.connect(self.db_file, check_same_thread=False)
+            # WAL pool: many reader connections alongside the one writer (self.conn),
+            # which is only used while holding self.pool.writer().
+            self.pool = ConnectionPool(self.db_file, max_readers=self.pool_size, pragmas=self.pragmas,
+                                       synchronous=DURABILITY_MODES[self.durability], read_only=self.read_only)
+            self.conn = self.pool.writer_conn
             print("✅ Database connection established.")
         except Error as e:
             raise Exception(f"Failed to connect to SQLite database: {e}")
 
     def _setup_database(self):
-        """Creates necessary tables and default users/items."""
+        """Brings the schema up to SCHEMA_VERSION.
+
+        An up-to-date file costs one statement here: user_version, read through the
+        pragma's table-valued form together with whether the FTS5 index exists. The
+        yearly archives are attached on first use (see archived_years), not here.
+        """
+        version, has_fts = self.conn.execute(
+            "SELECT user_version, EXISTS (SELECT 1 FROM sqlite_master WHERE name = 'ItemsFTS') FROM pragma_user_version"
+        ).fetchone()
+        self.fts_enabled = bool(has_fts)
+        if self.read_only:
+            self._check_schema(version)
+        if version < SCHEMA_VERSION and not self.read_only:
+            # Before migrating: rebuilding the rollups reads the AllTransactions view
+            self._attach_archives()
+            self._migrate_schema(version)
+
+    def _check_schema(self, version):
+        """Read-only files are never migrated, so they must already be SmartStock databases."""
+        if version < 1:
+            raise SchemaError(f"{self.db_file} is not a SmartStock database "
+                              "(or predates schema versions: open it in SmartStock once to upgrade it).")
+        tables = {row[0] for row in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        missing = {"InventoryItems", "Transactions", "DailyRollup"} - tables
+        if missing:
+            raise SchemaError(f"{self.db_file} is not a SmartStock database (no {', '.join(sorted(missing))}).")
+
+    def _migrate_schema(self, version):
+        """Runs each migration step above `version`, recording it in PRAGMA user_version.
+
+        A step is recorded only after it has finished, so an interrupted step
+        runs again on the next start; steps must therefore be safe to repeat.
+        Add a step by appending it here and bumping SCHEMA_VERSION.
+        """
+        steps = [self._baseline_schema, self._sort_indexes, self._autoincrement_item_ids]
         cursor = self.conn.cursor()
+        for number, step in enumerate(steps[version:SCHEMA_VERSION], start=version + 1):
+            step(cursor)
+            cursor.execute(f"PRAGMA user_version = {number}")
+            self.conn.commit()
+        print(f"🛠️ Database schema migrated from version {version} to {SCHEMA_VERSION}.")
+
+    def _baseline_schema(self, cursor):
+        """Version 1: every table, index and trigger up to the introduction of user_version.
+
+        Files from before then report user_version 0 and may be at any earlier
+        layout, so each part checks what already exists and only adds what is missing.
+        A new file gets InventoryItems in its version 3 form (AUTOINCREMENT ids) right
+        away, so _autoincrement_item_ids has nothing to rebuild.
+        """
+        self._setup_auto_vacuum()
         
         # 1️⃣ Users Table
         cursor.execute("""
@@ -38,16 +348,16 @@ class DatabaseManager:
         """)
 
         # 2️⃣ Inventory Table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS InventoryItems (
-                id INTEGER PRIMARY KEY,
-                name TEXT NOT NULL,
-                quantity INTEGER NOT NULL,
-                price REAL NOT NULL
-            );
-        """)
+        self._create_items_table(cursor, "InventoryItems")
+        items_migrated = self._migrate_items(cursor)
+        # Upserts during bulk import look items up by name
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_items_name ON InventoryItems(name);")
+        # Partial index: holds only the rows at or below their reorder point
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_items_low_stock ON InventoryItems(id) WHERE quantity <= reorder_point;")
+        # Barcode lookups: one exact b-tree probe; items without a SKU stay out of the index
+        cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_items_sku ON InventoryItems(sku) WHERE sku IS NOT NULL;")
 
-        # 3️⃣ Transactions Table
+        # 3️⃣ Transactions Table (ts = unix epoch seconds; date kept for display)
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS Transactions (
                 id INTEGER PRIMARY KEY,
@@ -55,108 +365,1382 @@ class DatabaseManager:
                 quantity INTEGER NOT NULL,
                 price REAL NOT NULL,
                 transaction_type TEXT NOT NULL,
-                date TEXT NOT NULL
+                date TEXT NOT NULL,
+                item_id INTEGER REFERENCES InventoryItems(id) ON DELETE SET NULL,
+                ts INTEGER
             );
         """)
+        self._migrate_transactions(cursor)
 
-        # Default Users
-        cursor.execute("SELECT COUNT(*) FROM Users")
-        if cursor.fetchone()[0] == 0:
+        # Default Users (EXISTS stops at the first row; COUNT(*) would scan the table)
+        cursor.execute("SELECT EXISTS (SELECT 1 FROM Users)")
+        if not cursor.fetchone()[0]:
             cursor.execute("INSERT INTO Users (username, password, role) VALUES (?, ?, ?)", ('admin', 'admin', 'admin'))
             cursor.execute("INSERT INTO Users (username, password, role) VALUES (?, ?, ?)", ('staff', 'staff', 'staff'))
             print("👤 Default 'admin' and 'staff' users created.")
 
         # Default Inventory
-        cursor.execute("SELECT COUNT(*) FROM InventoryItems")
-        if cursor.fetchone()[0] == 0:
+        cursor.execute("SELECT EXISTS (SELECT 1 FROM InventoryItems)")
+        if not cursor.fetchone()[0]:
             cursor.execute("INSERT INTO InventoryItems (name, quantity, price) VALUES (?, ?, ?)", ('Laptop', 10, 999.99))
             print("💻 Default inventory item created.")
-        
+
+        self._setup_search_index(cursor)
+        self._setup_summary(cursor, rebuild=items_migrated)
+        self._setup_rollups(cursor)
+        self._setup_change_log(cursor)
+
+    def _sort_indexes(self, cursor):
+        """Version 2: one index per sortable/filterable grid column (see ITEM_SORTS)."""
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_items_quantity ON InventoryItems(quantity);")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_items_price ON InventoryItems(price);")
+        # NOCASE to match the grid's order; idx_items_name stays for exact-name upsert lookups
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_items_name_nocase ON InventoryItems(name COLLATE NOCASE);")
+        # No ANALYZE: statistics taken on a new, empty table would mislead the planner
+        # later; _wide_ranges makes the one plan choice that matters for the grid
+
+    @staticmethod
+    def _create_items_table(cursor, table):
+        # AUTOINCREMENT: a deleted item's id is never handed out again (see _autoincrement_item_ids)
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                quantity INTEGER NOT NULL,
+                price REAL NOT NULL,
+                reorder_point INTEGER NOT NULL DEFAULT {LOW_STOCK_THRESHOLD},
+                reorder_qty INTEGER NOT NULL DEFAULT 0,
+                sku TEXT
+            );
+        """)
+
+    def _autoincrement_item_ids(self, cursor):
+        """Version 3: item ids are AUTOINCREMENT, so a deleted item's id is never handed out again.
+
+        A reused id would inherit the old item's DailyRollup rows, change log and
+        forecast history. SQLite cannot add AUTOINCREMENT to a table in place, so
+        InventoryItems is rebuilt under its own name (ids unchanged) and its indexes
+        and triggers are recreated from their stored SQL.
+        """
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'InventoryItems'")
+        if "AUTOINCREMENT" in cursor.fetchone()[0].upper():
+            return
+        cursor.execute("SELECT sql FROM sqlite_master WHERE tbl_name = 'InventoryItems' "
+                       "AND type IN ('index', 'trigger') AND sql IS NOT NULL")
+        dependents = [row[0] for row in cursor.fetchall()]
+        # Dropping the old table must not null out Transactions.item_id (ON DELETE SET NULL),
+        # and foreign_keys can only be switched off outside a transaction
         self.conn.commit()
+        foreign_keys = cursor.execute("PRAGMA foreign_keys").fetchone()[0]
+        cursor.execute("PRAGMA foreign_keys = OFF")
+        try:
+            cursor.execute("BEGIN")
+            self._create_items_table(cursor, "InventoryItems_new")
+            cursor.execute("""
+                INSERT INTO InventoryItems_new (id, name, quantity, price, reorder_point, reorder_qty, sku)
+                SELECT id, name, quantity, price, reorder_point, reorder_qty, sku FROM InventoryItems
+            """)
+            cursor.execute("DROP TABLE InventoryItems")
+            cursor.execute("ALTER TABLE InventoryItems_new RENAME TO InventoryItems")
+            for sql in dependents:
+                cursor.execute(sql)
+            # Ids already freed by deletes before this version still name history; skip past them too
+            cursor.execute("DELETE FROM sqlite_sequence WHERE name = 'InventoryItems'")
+            cursor.execute("""
+                INSERT INTO sqlite_sequence (name, seq)
+                SELECT 'InventoryItems', MAX((SELECT COALESCE(MAX(id), 0) FROM InventoryItems),
+                                             (SELECT COALESCE(MAX(item_id), 0) FROM DailyRollup),
+                                             (SELECT COALESCE(MAX(item_id), 0) FROM ItemChanges))
+            """)
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
+        finally:
+            cursor.execute(f"PRAGMA foreign_keys = {foreign_keys}")
+        print("🆔 Item ids switched to AUTOINCREMENT.")
+
+    def _setup_rollups(self, cursor):
+        """Creates DailyRollup (one row per day, item and transaction type) and its insert trigger."""
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='DailyRollup'")
+        exists = cursor.fetchone() is not None
+        # item_id 0 collects transactions that are not linked to an inventory item
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS DailyRollup (
+                item_id INTEGER NOT NULL,
+                item_name TEXT NOT NULL,
+                transaction_type TEXT NOT NULL,
+                day TEXT NOT NULL,
+                quantity INTEGER NOT NULL,
+                amount REAL NOT NULL,
+                tx_count INTEGER NOT NULL,
+                PRIMARY KEY (item_id, item_name, transaction_type, day)
+            ) WITHOUT ROWID;
+        """)
+        # Covering index for period totals across all items
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_rollup_day
+            ON DailyRollup(day, transaction_type, quantity, amount, tx_count);
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS DailyRollup_ai AFTER INSERT ON Transactions BEGIN
+                INSERT INTO DailyRollup (item_id, item_name, transaction_type, day, quantity, amount, tx_count)
+                VALUES (COALESCE(new.item_id, 0), new.item_name, new.transaction_type,
+                        date(COALESCE(new.ts, strftime('%s', 'now')), 'unixepoch', 'localtime'),
+                        new.quantity, new.quantity * new.price, 1)
+                ON CONFLICT (item_id, item_name, transaction_type, day) DO UPDATE SET
+                    quantity = quantity + excluded.quantity,
+                    amount = amount + excluded.amount,
+                    tx_count = tx_count + 1;
+            END;
+        """)
+        if not exists:
+            self._rebuild_rollups(cursor)
+            print("📈 Daily sales rollups built.")
+
+    def _rebuild_rollups(self, cursor):
+        cursor.execute("DELETE FROM DailyRollup")
+        cursor.execute("""
+            INSERT INTO DailyRollup (item_id, item_name, transaction_type, day, quantity, amount, tx_count)
+            SELECT COALESCE(item_id, 0), item_name, transaction_type,
+                   date(COALESCE(ts, strftime('%s', date, 'utc')), 'unixepoch', 'localtime'),
+                   SUM(quantity), SUM(quantity * price), COUNT(*)
+            FROM AllTransactions
+            GROUP BY 1, 2, 3, 4
+        """)
+
+    def _migrate_items(self, cursor):
+        """Adds per-item reorder columns to pre-existing InventoryItems tables."""
+        cursor.execute("PRAGMA table_info(InventoryItems)")
+        columns = {row[1] for row in cursor.fetchall()}
+        migrated = False
+        if "reorder_point" not in columns:
+            cursor.execute(f"ALTER TABLE InventoryItems ADD COLUMN reorder_point INTEGER NOT NULL DEFAULT {LOW_STOCK_THRESHOLD}")
+            migrated = True
+        if "reorder_qty" not in columns:
+            cursor.execute("ALTER TABLE InventoryItems ADD COLUMN reorder_qty INTEGER NOT NULL DEFAULT 0")
+            migrated = True
+        if migrated:
+            print("📦 Inventory items migrated to per-item reorder points.")
+        # Not reported as `migrated`: the summary does not depend on it
+        if "sku" not in columns:
+            cursor.execute("ALTER TABLE InventoryItems ADD COLUMN sku TEXT")
+            print("🏷️ Inventory items migrated to SKU codes.")
+        return migrated
+
+    def _setup_summary(self, cursor, rebuild=False):
+        """Creates the one-row InventorySummary table that triggers keep current."""
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='InventorySummary'")
+        exists = cursor.fetchone() is not None
+        if rebuild:
+            # Triggers from before per-item reorder points compared against a constant
+            for trigger in ("InventorySummary_ai", "InventorySummary_ad", "InventorySummary_au"):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS InventorySummary (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                total_skus INTEGER NOT NULL,
+                total_units INTEGER NOT NULL,
+                total_value REAL NOT NULL,
+                low_stock_count INTEGER NOT NULL
+            );
+        """)
+        # Each trigger applies only the delta of the row it fires for
+        cursor.executescript("""
+            CREATE TRIGGER IF NOT EXISTS InventorySummary_ai AFTER INSERT ON InventoryItems BEGIN
+                UPDATE InventorySummary SET
+                    total_skus = total_skus + 1,
+                    total_units = total_units + new.quantity,
+                    total_value = total_value + new.quantity * new.price,
+                    low_stock_count = low_stock_count + (new.quantity <= new.reorder_point)
+                WHERE id = 1;
+            END;
+            CREATE TRIGGER IF NOT EXISTS InventorySummary_ad AFTER DELETE ON InventoryItems BEGIN
+                UPDATE InventorySummary SET
+                    total_skus = total_skus - 1,
+                    total_units = total_units - old.quantity,
+                    total_value = total_value - old.quantity * old.price,
+                    low_stock_count = low_stock_count - (old.quantity <= old.reorder_point)
+                WHERE id = 1;
+            END;
+            CREATE TRIGGER IF NOT EXISTS InventorySummary_au AFTER UPDATE OF quantity, price, reorder_point ON InventoryItems BEGIN
+                UPDATE InventorySummary SET
+                    total_units = total_units - old.quantity + new.quantity,
+                    total_value = total_value - old.quantity * old.price + new.quantity * new.price,
+                    low_stock_count = low_stock_count - (old.quantity <= old.reorder_point)
+                                                      + (new.quantity <= new.reorder_point)
+                WHERE id = 1;
+            END;
+        """)
+        if rebuild or not exists:
+            self._rebuild_summary(cursor)
+            print("📊 Inventory summary built.")
+
+    def _rebuild_summary(self, cursor):
+        cursor.execute("DELETE FROM InventorySummary")
+        cursor.execute("""
+            INSERT INTO InventorySummary (id, total_skus, total_units, total_value, low_stock_count)
+            SELECT 1, COUNT(*), COALESCE(SUM(quantity), 0), COALESCE(SUM(quantity * price), 0),
+                   COALESCE(SUM(quantity <= reorder_point), 0)
+            FROM InventoryItems
+        """)
+
+    def _setup_change_log(self, cursor):
+        """Creates ItemChanges, an append-only log of item writes with a monotonic sequence number."""
+        # AUTOINCREMENT: seq is never reused, even after the newest rows are pruned
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS ItemChanges (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                item_id INTEGER NOT NULL,
+                ts INTEGER NOT NULL
+            );
+        """)
+        # One row per write; the feed re-reads the item itself, so no payload is logged
+        log = (f"INSERT INTO ItemChanges (item_id, ts) VALUES ({{row}}.id, strftime('%s', 'now')); "
+               f"DELETE FROM ItemChanges WHERE seq <= (SELECT MAX(seq) FROM ItemChanges) - {CHANGE_LOG_KEEP};")
+        cursor.executescript(f"""
+            CREATE TRIGGER IF NOT EXISTS ItemChanges_ai AFTER INSERT ON InventoryItems BEGIN
+                {log.format(row="new")}
+            END;
+            CREATE TRIGGER IF NOT EXISTS ItemChanges_au AFTER UPDATE ON InventoryItems BEGIN
+                {log.format(row="new")}
+            END;
+            CREATE TRIGGER IF NOT EXISTS ItemChanges_ad AFTER DELETE ON InventoryItems BEGIN
+                {log.format(row="old")}
+            END;
+        """)
+
+    def _migrate_transactions(self, cursor):
+        """Adds item_id/ts to pre-existing Transactions tables, backfills them and indexes history."""
+        cursor.execute("PRAGMA table_info(Transactions)")
+        columns = {row[1] for row in cursor.fetchall()}
+        migrated = False
+        if "item_id" not in columns:
+            cursor.execute("ALTER TABLE Transactions ADD COLUMN item_id INTEGER REFERENCES InventoryItems(id) ON DELETE SET NULL")
+            migrated = True
+        if "ts" not in columns:
+            cursor.execute("ALTER TABLE Transactions ADD COLUMN ts INTEGER")
+            migrated = True
+
+        if migrated:
+            # date was written in local time; 'utc' converts it to a true epoch
+            cursor.execute("UPDATE Transactions SET ts = CAST(strftime('%s', date, 'utc') AS INTEGER) WHERE ts IS NULL")
+            cursor.execute("""
+                UPDATE Transactions
+                SET item_id = (SELECT MIN(i.id) FROM InventoryItems i WHERE i.name = Transactions.item_name)
+                WHERE item_id IS NULL
+            """)
+            print("🧾 Transactions migrated to item_id/ts.")
+
+        # Per-item history and date ranges are served straight from these indexes
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_tx_item_ts ON Transactions(item_id, ts);")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_tx_ts ON Transactions(ts);")
+
+    def _setup_search_index(self, cursor):
+        """Creates the FTS5 trigram indexes and their sync triggers, if SQLite supports them."""
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name IN ('ItemsFTS', 'TransactionsFTS')")
+        existing = {row[0] for row in cursor.fetchall()}
+        try:
+            cursor.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS ItemsFTS USING fts5(
+                    name, content='InventoryItems', content_rowid='id', tokenize='trigram'
+                );
+            """)
+            cursor.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS TransactionsFTS USING fts5(
+                    item_name, content='Transactions', content_rowid='id', tokenize='trigram'
+                );
+            """)
+        except sqlite3.OperationalError as e:
+            # No FTS5 or no trigram tokenizer in this SQLite build: searches use LIKE.
+            print(f"ℹ️ Full-text search unavailable, falling back to LIKE: {e}")
+            self.fts_enabled = False
+            return
+
+        # External-content tables are kept in sync by triggers
+        cursor.executescript("""
+            CREATE TRIGGER IF NOT EXISTS ItemsFTS_ai AFTER INSERT ON InventoryItems BEGIN
+                INSERT INTO ItemsFTS(rowid, name) VALUES (new.id, new.name);
+            END;
+            CREATE TRIGGER IF NOT EXISTS ItemsFTS_ad AFTER DELETE ON InventoryItems BEGIN
+                INSERT INTO ItemsFTS(ItemsFTS, rowid, name) VALUES ('delete', old.id, old.name);
+            END;
+            CREATE TRIGGER IF NOT EXISTS ItemsFTS_au AFTER UPDATE OF name ON InventoryItems BEGIN
+                INSERT INTO ItemsFTS(ItemsFTS, rowid, name) VALUES ('delete', old.id, old.name);
+                INSERT INTO ItemsFTS(rowid, name) VALUES (new.id, new.name);
+            END;
+            CREATE TRIGGER IF NOT EXISTS TransactionsFTS_ai AFTER INSERT ON Transactions BEGIN
+                INSERT INTO TransactionsFTS(rowid, item_name) VALUES (new.id, new.item_name);
+            END;
+            CREATE TRIGGER IF NOT EXISTS TransactionsFTS_ad AFTER DELETE ON Transactions BEGIN
+                INSERT INTO TransactionsFTS(TransactionsFTS, rowid, item_name) VALUES ('delete', old.id, old.item_name);
+            END;
+            CREATE TRIGGER IF NOT EXISTS TransactionsFTS_au AFTER UPDATE OF item_name ON Transactions BEGIN
+                INSERT INTO TransactionsFTS(TransactionsFTS, rowid, item_name) VALUES ('delete', old.id, old.item_name);
+                INSERT INTO TransactionsFTS(rowid, item_name) VALUES (new.id, new.item_name);
+            END;
+        """)
+
+        # One-time migration: index the rows of databases created before FTS existed
+        if "ItemsFTS" not in existing:
+            cursor.execute("INSERT INTO ItemsFTS(ItemsFTS) VALUES ('rebuild')")
+        if "TransactionsFTS" not in existing:
+            cursor.execute("INSERT INTO TransactionsFTS(TransactionsFTS) VALUES ('rebuild')")
+        if len(existing) < 2:
+            print("🔎 Full-text search index built.")
+        self.fts_enabled = True
+
+    def _search_filter(self, search_term, column, fts_table, id_column="id"):
+        """Builds the WHERE clauses for a multi-word search.
+
+        Words long enough for the trigram index go through a single FTS5 MATCH;
+        shorter words (or every word, without FTS5 or with fts_table=None) fall back to LIKE. Returns
+        (clauses, params, match_expression) - the expression is None when the
+        full-text index is not used, which also means there is no rank to sort by.
+        """
+        clauses, params, fts_tokens = [], [], []
+        for token in search_tokens(search_term):
+            if self.fts_enabled and fts_table and len(token) >= FTS_MIN_TOKEN_LENGTH:
+                fts_tokens.append('"' + token.replace('"', '""') + '"')
+            else:
+                clauses.append(f"{column} LIKE ?")
+                params.append(f"%{token}%")
+
+        match = " AND ".join(fts_tokens) or None
+        if match:
+            clauses.insert(0, f"{id_column} IN (SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH ?)")
+            params.insert(0, match)
+        return clauses, params, match
             
+    # -----------------------------
+    # CONNECTION POOL
+    # -----------------------------
+    def read(self, sql, params=()):
+        """Runs a read-only query on a pooled reader connection and returns all rows."""
+        with self.pool.reader() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def iter_read(self, sql, params=(), chunk_size=IMPORT_CHUNK_SIZE):
+        """Yields the rows of a read-only query in lists of up to chunk_size, so memory stays flat."""
+        with self.pool.reader() as conn:
+            cursor = conn.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    return
+                yield rows
+
+    def cached_read(self, sql, params=(), format_row=None, reverse=False):
+        """Like read(), but repeat queries are answered from the LRU read cache.
+
+        Entries are keyed by the SQL, its parameters and the optional post-processing
+        (reverse, then format_row applied to every row, e.g. a UI display formatter).
+        They are only served while both write_count and PRAGMA data_version are
+        unchanged. So a write here, or a commit by another process, is seen on the next call.
+        """
+        if self._query_cache.max_entries <= 0:
+            rows = self.read(sql, params)
+            if reverse:
+                rows.reverse()
+            return [format_row(row) for row in rows] if format_row else rows
+
+        # Read the version before the query: a commit racing with it then only causes a miss
+        version = (self.write_count, self.pool.data_version())
+        key = (sql, tuple(params), reverse, format_row)
+        cached = self._query_cache.get(key, version)
+        if cached is not None:
+            return list(cached)
+        rows = self.read(sql, params)
+        if reverse:
+            rows.reverse()
+        if format_row:
+            rows = [format_row(row) for row in rows]
+        self._query_cache.put(key, version, tuple(rows))
+        return rows
+
+    def cache_stats(self):
+        """Hit/miss/invalidation counters and current size of the read cache."""
+        return self._query_cache.stats()
+
+    def pool_stats(self):
+        """Reader/writer checkout counts and wait times, for monitoring lock contention."""
+        return self.pool.stats()
+
+    # -----------------------------
+    # INSTRUMENTATION (off unless enabled)
+    # -----------------------------
+    def enable_instrumentation(self, slow_ms=SLOW_QUERY_MS, slow_log=None):
+        """Starts timing public methods and logging statements slower than slow_ms.
+
+        slow_log optionally names a file that slow statements are appended to as JSON lines.
+        Returns the Instrumentation, whose snapshot()/export() expose the metrics.
+        """
+        if self.instrumentation is None:
+            self.instrumentation = Instrumentation(self, slow_ms, slow_log)
+            self.instrumentation.install()
+        else:
+            self.instrumentation.slow_ms = slow_ms
+            self.instrumentation.slow_log = slow_log
+        return self.instrumentation
+
+    def disable_instrumentation(self):
+        """Removes the timing wrappers and trace callback; collected metrics are discarded."""
+        if self.instrumentation is not None:
+            self.instrumentation.uninstall()
+            self.instrumentation = None
+
     # -----------------------------
     # LOGIN
     # -----------------------------
     def check_user_login(self, username, password):
         """Checks login credentials against the Users table."""
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT role FROM Users WHERE username = ? AND password = ?", (username, password))
-        return cursor.fetchone()
+        rows = self.read("SELECT role FROM Users WHERE username = ? AND password = ?", (username, password))
+        return rows[0] if rows else None
 
     # -----------------------------
     # INVENTORY OPERATIONS
     # -----------------------------
-    def get_all_items(self, search_term=None):
-        """Retrieves all inventory items, optionally filtered by name."""
+    def get_all_items(self, search_term=None, sort=None, descending=True, ranges=None):
+        """Retrieves all inventory items, optionally filtered by name and ranked by relevance.
+
+        sort (a key of ITEM_SORTS) orders by that column instead of relevance / newest first;
+        ranges is {"quantity" or "price": (low, high)}, inclusive, None for an open end.
+        """
         try:
-            cursor = self.conn.cursor()
-            sql = "SELECT id, name, quantity, price FROM InventoryItems"
-            params = []
+            clauses, params, match = self._search_filter(search_term, "i.name", "ItemsFTS", "i.id")
+            sql = "SELECT i.id, i.name, i.quantity, i.price, i.reorder_point, i.reorder_qty, i.sku FROM InventoryItems i"
 
-            if search_term:
-                sql += " WHERE name LIKE ?"
-                params.append(f"%{search_term}%")
+            if match:
+                sql += " JOIN ItemsFTS ON ItemsFTS.rowid = i.id"
+                clauses[0] = "ItemsFTS MATCH ?"
+            _range_filter(ranges, clauses, params)
+            if clauses:
+                sql += " WHERE " + " AND ".join(clauses)
 
-            sql += " ORDER BY id DESC"
-            cursor.execute(sql, params)
-            return cursor.fetchall()
+            if sort is not None:
+                direction = "DESC" if descending else "ASC"
+                sql += f" ORDER BY i.{self._sort_expression(sort)} {direction}, i.id {direction}"
+            else:
+                sql += " ORDER BY ItemsFTS.rank, i.id DESC" if match else " ORDER BY i.id DESC"
+            return self.cached_read(sql, params)
         except sqlite3.Error as e:
             print(f"Database error in get_all_items: {e}")
             return []
 
-    def add_item(self, name, quantity, price):
-        """Adds a new item to inventory."""
+    @staticmethod
+    def _sort_expression(sort):
+        if sort not in ITEM_SORTS:
+            raise ValueError(f"Cannot sort items by {sort!r}.")
+        return ITEM_SORTS[sort]
+
+    def _wide_ranges(self, sort, ranges, read):
+        """Range columns, other than the sort column, that match more than RANGE_SORT_MAX_ROWS rows.
+
+        For a LIMITed page the planner otherwise prefers the range's own index and
+        sorts every row in the range, even when nearly the whole table matches. One
+        COUNT, stopped at the threshold, tells a wide range from a narrow one; read
+        is (sql, params) -> rows, on whatever connection the caller is using.
+        """
+        wide = set()
+        for column, bounds in (ranges or {}).items():
+            clauses, params = [], []
+            _range_filter({column: bounds}, clauses, params)
+            if column == sort or not clauses:
+                continue
+            sql = (f"SELECT COUNT(*) FROM (SELECT 1 FROM InventoryItems WHERE {' AND '.join(clauses)} "
+                   f"LIMIT {RANGE_SORT_MAX_ROWS + 1})")
+            if read(sql, params)[0][0] > RANGE_SORT_MAX_ROWS:
+                wide.add(column)
+        return wide
+
+    def _items_page_query(self, search_term, before_id, after_id, limit, sort="id", descending=True, ranges=None,
+                          wide=()):
+        """Keyset page on (sort column, id): before_id continues down the grid, after_id back up it.
+
+        The boundary row's sort value is looked up by id inside the query, so
+        callers only track ids. Ranges listed in wide (see _wide_ranges) are checked
+        row by row while the sort index is walked, instead of being read through their own index.
+        """
+        order = self._sort_expression(sort)
+        sql = f"SELECT {ITEM_COLUMNS} FROM InventoryItems"
+        clauses, params, _ = self._search_filter(search_term, "name", "ItemsFTS")
+        _range_filter(ranges, clauses, params, skip_index=wide)
+
+        # "Down" the grid is decreasing keys for a descending sort, increasing for an ascending one
+        down, up = ("<", ">") if descending else (">", "<")
+        for boundary_id, op in ((before_id, down), (after_id, up)):
+            if boundary_id is None:
+                continue
+            if sort == "id":
+                clauses.append(f"id {op} ?")
+                params.append(boundary_id)
+            else:
+                # (value, id) past the boundary row, spelled out so it is a range on the sort index
+                value = f"(SELECT {sort} FROM InventoryItems WHERE id = ?)"
+                clauses.append(f"{order} {op}= {value} AND ({order} {op} {value} OR id {op} ?)")
+                params.extend([boundary_id] * 3)
+
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        # Paging backwards walks the index the other way; the caller flips the page afterwards.
+        backwards = after_id is not None and before_id is None
+        direction = "DESC" if descending != backwards else "ASC"
+        sql += f" ORDER BY id {direction}" if sort == "id" else f" ORDER BY {order} {direction}, id {direction}"
+        sql += " LIMIT ?"
+        params.append(limit)
+        return sql, params, backwards
+
+    def _count_query(self, search_term, ranges=None):
+        clauses, params, _ = self._search_filter(search_term, "name", "ItemsFTS")
+        _range_filter(ranges, clauses, params)
+        sql = "SELECT COUNT(*) FROM InventoryItems"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        return sql, params
+
+    def iter_items(self, search_term=None, chunk_size=IMPORT_CHUNK_SIZE):
+        """Yields every matching item (id order) in lists of up to chunk_size, from one reader snapshot."""
+        clauses, params, _ = self._search_filter(search_term, "name", "ItemsFTS")
+        sql = f"SELECT {ITEM_COLUMNS} FROM InventoryItems"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        return self.iter_read(sql + " ORDER BY id", params, chunk_size)
+
+    def get_items_page(self, search_term=None, before_id=None, after_id=None, limit=ITEMS_PAGE_SIZE,
+                       format_row=None, sort="id", descending=True, ranges=None):
+        """Retrieves one page of items (newest first by default) using keyset pagination.
+
+        Pass before_id to page further down the grid and after_id to page back up
+        it; the rows are always returned in display order. sort/descending pick
+        another order from ITEM_SORTS (ties broken by id in the same direction) and
+        ranges filters as in get_all_items; the database does all sorting, so a deep
+        page costs the same as the first one.
+        format_row, if given, is applied to each row and its output cached with the page.
+        """
+        try:
+            wide = self._wide_ranges(sort, ranges, self.cached_read)
+            sql, params, backwards = self._items_page_query(search_term, before_id, after_id, limit,
+                                                            sort, descending, ranges, wide)
+            return self.cached_read(sql, params, format_row=format_row, reverse=backwards)
+        except sqlite3.Error as e:
+            print(f"Database error in get_items_page: {e}")
+            return []
+
+    @_locked
+    def count_items(self, search_term=None, ranges=None):
+        """Returns the number of items matching the search term, cached until the next write.
+
+        Counted on the writer connection so grouped writes that are not committed
+        yet are included; the cache is then patched per write by _adjust_count_cache.
+        Counts with ranges are dropped on every write instead (a sale can move a row out of one).
+        """
+        key = _range_key(search_term, ranges)
+        if key in self._count_cache:
+            return self._count_cache[key]
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute(*self._count_query(search_term, ranges))
+            count = cursor.fetchone()[0]
+        except sqlite3.Error as e:
+            print(f"Database error in count_items: {e}")
+            return 0
+        self._count_cache[key] = count
+        return count
+
+    @_locked
+    def prime_count_cache(self, search_term, count, write_count, ranges=None):
+        """Stores a count computed elsewhere, unless a write happened since it was taken.
+
+        write_count None (see search_items) or grouped writes still waiting to be
+        committed mean the count came from a reader that cannot see them.
+        """
+        if write_count is not None and write_count == self.write_count and not self._pending_writes:
+            self._count_cache[_range_key(search_term, ranges)] = count
+
+    # -----------------------------
+    # LIVE SEARCH (background thread)
+    # -----------------------------
+    def search_items(self, search_term=None, limit=ITEMS_PAGE_SIZE, cancelled=None, sort="id", descending=True,
+                     ranges=None):
+        """Runs the first grid page and its count on a pooled reader connection.
+
+        Meant to be called off the UI thread. `cancelled` is polled while SQLite
+        works; once it returns True the query is aborted and sqlite3.OperationalError
+        ("interrupted") is raised. Returns (rows, total, write_count), where
+        write_count lets the caller tell whether the total is still current. It is
+        None while grouped writes are uncommitted, since this reader does not see them.
+        """
+        with self._search_lock, self.pool.reader() as conn:
+            with self._search_conn_lock:
+                self._search_conn = conn
+            if cancelled is not None:
+                conn.set_progress_handler(lambda: 1 if cancelled() else 0, SEARCH_PROGRESS_STEPS)
+            try:
+                # write_count first: a write landing between the two reads then shows up in either
+                write_count = self.write_count
+                if self._pending_writes:
+                    write_count = None
+                cursor = conn.cursor()
+                wide = self._wide_ranges(sort, ranges, lambda sql, params: cursor.execute(sql, params).fetchall())
+                sql, params, _ = self._items_page_query(search_term, None, None, limit, sort, descending, ranges,
+                                                        wide)
+                cursor.execute(sql, params)
+                rows = cursor.fetchall()
+                cursor.execute(*self._count_query(search_term, ranges))
+                total = cursor.fetchone()[0]
+                return rows, total, write_count
+            finally:
+                conn.set_progress_handler(None, 0)
+                with self._search_conn_lock:
+                    self._search_conn = None
+
+    def cancel_search(self):
+        """Interrupts whatever query is running on the search connection."""
+        # Under the lock so the connection cannot go back to the pool mid-interrupt
+        with self._search_conn_lock:
+            if self._search_conn is not None:
+                self._search_conn.interrupt()
+
+    def get_item(self, item_id):
+        """Retrieves a single inventory item by ID; raises ItemNotFound if there is none.
+
+        Read on a pooled reader like get_item_by_sku, so lookups run alongside
+        writes; while a group commit is pending the writer answers instead.
+        """
+        if self._pending_writes:
+            with self.pool.writer():
+                row = self._find_item(item_id)
+        else:
+            rows = self.read(f"SELECT {ITEM_COLUMNS} FROM InventoryItems WHERE id = ?", (item_id,))
+            row = rows[0] if rows else None
+        if row is None:
+            raise ItemNotFound(item_id)
+        return row
+
+    def _find_item(self, item_id):
         cursor = self.conn.cursor()
-        cursor.execute("INSERT INTO InventoryItems (name, quantity, price) VALUES (?, ?, ?)", (name, quantity, price))
-        self.conn.commit()
+        cursor.execute(f"SELECT {ITEM_COLUMNS} FROM InventoryItems WHERE id=?", (item_id,))
+        return cursor.fetchone()
 
-    def update_item(self, item_id, name, quantity, price):
-        """Updates an existing item by ID."""
+    def get_item_by_sku(self, sku):
+        """Scanner fast path: the item with this exact SKU/barcode, or None.
+
+        One probe of the unique idx_items_sku index on a reader connection, so a
+        scan never waits behind the writer (or a running import). While a group
+        commit is still pending the writer answers instead, so an item added a
+        moment ago can be scanned straight away.
+        """
+        sku = normalize_sku(sku)
+        if sku is None:
+            return None
+        sql = f"SELECT {ITEM_COLUMNS} FROM InventoryItems WHERE sku = ?"
+        if self._pending_writes:
+            with self.pool.writer():
+                return self.conn.execute(sql, (sku,)).fetchone()
+        rows = self.read(sql, (sku,))
+        return rows[0] if rows else None
+
+    @_locked
+    def add_item(self, name, quantity, price, reorder_point=LOW_STOCK_THRESHOLD, reorder_qty=0, sku=None):
+        """Adds a new item to inventory and returns the inserted row.
+
+        Raises sqlite3.IntegrityError if sku is already used by another item.
+        """
+        sku = normalize_sku(sku)
         cursor = self.conn.cursor()
-        cursor.execute("UPDATE InventoryItems SET name=?, quantity=?, price=? WHERE id=?", (name, quantity, price, item_id))
-        self.conn.commit()
+        cursor.execute(
+            "INSERT INTO InventoryItems (name, quantity, price, reorder_point, reorder_qty, sku) VALUES (?, ?, ?, ?, ?, ?)",
+            (name, quantity, price, reorder_point, reorder_qty, sku)
+        )
+        self._commit()
+        row = (cursor.lastrowid, name, quantity, price, reorder_point, reorder_qty, sku)
+        self.write_count += 1
+        self._adjust_count_cache(None, name)
+        return row
+
+    @_locked
+    def update_item(self, item_id, name, quantity, price, reorder_point=None, reorder_qty=None, sku=None):
+        """Updates an existing item by ID and returns the updated row (None if missing).
+
+        reorder_point / reorder_qty / sku left as None keep their current values;
+        sku="" removes the item's SKU.
+        """
+        old_row = self._find_item(item_id)
+        if old_row is None:
+            return None
+        reorder_point = old_row[4] if reorder_point is None else reorder_point
+        reorder_qty = old_row[5] if reorder_qty is None else reorder_qty
+        sku = old_row[6] if sku is None else normalize_sku(sku)
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "UPDATE InventoryItems SET name=?, quantity=?, price=?, reorder_point=?, reorder_qty=?, sku=? WHERE id=?",
+            (name, quantity, price, reorder_point, reorder_qty, sku, item_id)
+        )
+        self._commit()
+        self.write_count += 1
+        self._adjust_count_cache(old_row[1], name)
+        return (old_row[0], name, quantity, price, reorder_point, reorder_qty, sku)
 
+    @_locked
     def delete_item(self, item_id):
-        """Deletes an inventory item by ID."""
+        """Deletes an inventory item by ID and returns the deleted row (None if missing)."""
+        old_row = self._find_item(item_id)
+        if old_row is None:
+            return None
         cursor = self.conn.cursor()
         cursor.execute("DELETE FROM InventoryItems WHERE id=?", (item_id,))
-        self.conn.commit()
+        self._commit()
+        self.write_count += 1
+        self._adjust_count_cache(old_row[1], None)
+        return old_row
+
+    def _adjust_count_cache(self, old_name, new_name):
+        """Patches cached counts for one changed row instead of recounting the table."""
+        for key in list(self._count_cache):
+            if not isinstance(key, str) or "%" in key or "_" in key:
+                # A range filter (quantity/price may have changed) or LIKE wildcards in the term;
+                # let the next count_items recount.
+                del self._count_cache[key]
+                continue
+            delta = name_matches(new_name, key) - name_matches(old_name, key)
+            self._count_cache[key] += delta
+
+    # -----------------------------
+    # LOW STOCK / REORDER POINTS
+    # -----------------------------
+    def get_low_stock_items(self, limit=None):
+        """Returns (id, name, quantity, reorder_point, reorder_qty) for items at or below their reorder point.
+
+        The WHERE clause matches the partial index idx_items_low_stock exactly, so
+        only the low-stock rows are visited no matter how large the catalog is.
+        """
+        sql = ("SELECT id, name, quantity, reorder_point, reorder_qty FROM InventoryItems "
+               "INDEXED BY idx_items_low_stock WHERE quantity <= reorder_point ORDER BY id")
+        params = []
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        try:
+            return self.cached_read(sql, params)
+        except sqlite3.Error as e:
+            print(f"Database error in get_low_stock_items: {e}")
+            return []
+
+    # -----------------------------
+    # CHANGE FEED (other terminals' writes)
+    # -----------------------------
+    def get_item_changes(self, since_seq=None, limit=CHANGE_FEED_LIMIT):
+        """Returns (last_seq, changes) for items written after since_seq, by anyone.
+
+        changes is a list of (item_id, row) in commit order, one per item, where row
+        is the item's current ITEM_COLUMNS tuple or None if it was deleted. changes
+        is None when the caller must reload instead: since_seq predates the pruned
+        log, or more than limit items changed. since_seq=None just returns the
+        current position. Idle polls are answered by the read cache.
+        """
+        try:
+            oldest, newest = self.cached_read(
+                "SELECT (SELECT MIN(seq) FROM ItemChanges), (SELECT MAX(seq) FROM ItemChanges)")[0]
+            last_seq = newest or 0
+            if since_seq is None or last_seq <= since_seq:
+                return last_seq, []
+            if oldest > since_seq + 1:
+                return last_seq, None  # the changes right after since_seq were pruned
+
+            rows = self.cached_read(f"""
+                SELECT c.seq, c.item_id, {", ".join("i." + c for c in ITEM_COLUMNS.split(", "))}
+                FROM (SELECT item_id, MAX(seq) AS seq FROM ItemChanges WHERE seq > ? GROUP BY item_id) c
+                LEFT JOIN InventoryItems i ON i.id = c.item_id
+                ORDER BY c.seq LIMIT ?
+            """, (since_seq, limit + 1))
+            if len(rows) > limit:
+                return max(last_seq, rows[-1][0]), None
+            changes = [(row[1], row[2:] if row[2] is not None else None) for row in rows]
+            return max([last_seq] + [row[0] for row in rows]), changes
+        except sqlite3.Error as e:
+            print(f"Database error in get_item_changes: {e}")
+            return since_seq, []
+
+    # -----------------------------
+    # DAILY ROLLUPS
+    # -----------------------------
+    @_locked
+    def rebuild_daily_rollups(self):
+        """Recomputes DailyRollup from all transactions, archived ones included. Returns the number of rollup rows."""
+        self.flush()
+        self._ensure_archives()  # outside a transaction, or the writer cannot ATTACH
+        cursor = self.conn.cursor()
+        self._rebuild_rollups(cursor)
+        self._commit()
+        self.flush()
+        cursor.execute("SELECT COUNT(*) FROM DailyRollup")
+        return cursor.fetchone()[0]
+
+    # -----------------------------
+    # DASHBOARD SUMMARY
+    # -----------------------------
+    @_locked
+    def get_inventory_summary(self):
+        """Returns total SKUs, units, value and low-stock count from the trigger-kept summary row."""
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT total_skus, total_units, total_value, low_stock_count FROM InventorySummary WHERE id = 1")
+        row = cursor.fetchone() or (0, 0, 0.0, 0)
+        return {"total_skus": row[0], "total_units": row[1], "total_value": row[2], "low_stock_count": row[3]}
+
+    @_locked
+    def rebuild_inventory_summary(self):
+        """Recomputes the summary row with one catalog scan (repairs float drift in total_value)."""
+        self._rebuild_summary(self.conn.cursor())
+        self._commit()
+        return self.get_inventory_summary()
+
+    # -----------------------------
+    # STOCK MOVEMENTS (relative, atomic)
+    # -----------------------------
+    @contextmanager
+    def _atomic(self):
+        """Makes the enclosed writes all-or-nothing without committing them.
+
+        A savepoint inside the open (group-commit) transaction: on error only the
+        block is rolled back, and on success it still shares the next group commit.
+        A transaction this block had to open itself is ended on error, unless other
+        writes are waiting in it; an open transaction keeps the WAL write lock.
+        """
+        started = not self.conn.in_transaction
+        if started:
+            self.conn.execute("BEGIN")
+        self.conn.execute("SAVEPOINT stock_movement")
+        try:
+            yield self.conn.cursor()
+        except BaseException:
+            self.conn.execute("ROLLBACK TO stock_movement")
+            self.conn.execute("RELEASE stock_movement")
+            if started:
+                if self._pending_writes or self._batch_depth:
+                    self._commit()  # nothing of ours is left in it; the group commit or batch ends it
+                else:
+                    self.conn.rollback()
+            raise
+        self.conn.execute("RELEASE stock_movement")
+
+    def _move_stock(self, movements, transaction_type):
+        """Applies (item_id, delta, price) movements plus their Transactions rows as one unit.
+
+        Each UPDATE is relative and refuses to go below zero, so concurrent terminals
+        never overwrite each other's counts. Returns the updated item rows in order.
+        """
+        now = datetime.now()
+        stamp, ts = now.strftime("%Y-%m-%d %H:%M:%S"), int(now.timestamp())
+        rows, history = [], []
+        with self._atomic() as cursor:
+            for item_id, delta, price in movements:
+                cursor.execute("UPDATE InventoryItems SET quantity = quantity + ? WHERE id = ? AND quantity + ? >= 0",
+                               (delta, item_id, delta))
+                if cursor.rowcount == 0:
+                    cursor.execute("SELECT name, quantity FROM InventoryItems WHERE id = ?", (item_id,))
+                    found = cursor.fetchone()
+                    if found is None:
+                        raise ItemNotFound(item_id)
+                    raise StockError(f"Not enough stock for '{found[0]}': {found[1]} left, "
+                                     f"{-delta} requested.", item_id)
+                cursor.execute(f"SELECT {ITEM_COLUMNS} FROM InventoryItems WHERE id = ?", (item_id,))
+                row = cursor.fetchone()
+                rows.append(row)
+                # Sales and purchases log positive quantities; adjustments keep their sign
+                quantity = delta if transaction_type == ADJUSTMENT else abs(delta)
+                history.append((row[1], quantity, row[3] if price is None else price,
+                                transaction_type, stamp, item_id, ts))
+            cursor.executemany(
+                "INSERT INTO Transactions (item_name, quantity, price, transaction_type, date, item_id, ts) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", history)
+        # Names are unchanged: this only drops the range-filtered counts
+        self._adjust_count_cache(None, None)
+        self.write_count += 1
+        self._commit()
+        return rows
+
+    @staticmethod
+    def _positive_quantity(quantity):
+        if not isinstance(quantity, int) or quantity <= 0:
+            raise ValueError(f"Quantity must be a positive whole number, not {quantity!r}.")
+        return quantity
+
+    @_locked
+    def sell(self, item_id, quantity, price=None):
+        """Takes quantity off the shelf and records the sale. Returns the updated row.
+
+        price is the unit selling price (default: the item's current price).
+        Raises StockError if the item is missing or has fewer than quantity left.
+        """
+        return self._move_stock([(item_id, -self._positive_quantity(quantity), price)], SALE)[0]
+
+    @_locked
+    def receive(self, item_id, quantity, price=None):
+        """Adds a delivery to stock and records the purchase. Returns the updated row."""
+        return self._move_stock([(item_id, self._positive_quantity(quantity), price)], PURCHASE)[0]
+
+    @_locked
+    def adjust(self, item_id, delta):
+        """Corrects stock by a signed delta (shrinkage, recount) and records an adjustment."""
+        if not isinstance(delta, int) or delta == 0:
+            raise ValueError(f"Adjustment must be a non-zero whole number, not {delta!r}.")
+        return self._move_stock([(item_id, delta, None)], ADJUSTMENT)[0]
+
+    @_locked
+    def checkout(self, lines):
+        """Sells a whole basket atomically and returns the updated rows, one per line.
+
+        lines are (item_id, quantity) or (item_id, quantity, unit_price) tuples. If
+        any line is short of stock, nothing is sold and StockError names the item.
+        The basket counts as one write for group commit, however many lines it has.
+        """
+        movements = []
+        for line in lines:
+            item_id, quantity, *price = line
+            movements.append((item_id, -self._positive_quantity(quantity), price[0] if price else None))
+        if not movements:
+            return []
+        return self._move_stock(movements, SALE)
 
     # -----------------------------
     # TRANSACTIONS
     # -----------------------------
-    def record_transaction(self, item_name, quantity, price, transaction_type):
-        """Records a sale or purchase transaction."""
+    @_locked
+    def record_transaction(self, item_name, quantity, price, transaction_type, item_id=None):
+        """Records a sale or purchase transaction.
+
+        item_id links the row to InventoryItems; when omitted it is looked up by name.
+        """
         cursor = self.conn.cursor()
-        date_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        if item_id is None:
+            cursor.execute("SELECT MIN(id) FROM InventoryItems WHERE name = ?", (item_name,))
+            item_id = cursor.fetchone()[0]
+        now = datetime.now()
         cursor.execute(
-            "INSERT INTO Transactions (item_name, quantity, price, transaction_type, date) VALUES (?, ?, ?, ?, ?)",
-            (item_name, quantity, price, transaction_type, date_str)
+            "INSERT INTO Transactions (item_name, quantity, price, transaction_type, date, item_id, ts) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (item_name, quantity, price, transaction_type, now.strftime("%Y-%m-%d %H:%M:%S"), item_id, int(now.timestamp()))
         )
-        self.conn.commit()
-
-    def get_all_transactions(self, search_term=None):
-        """Retrieves all transactions, optionally filtered by item name."""
-        try:
-            cursor = self.conn.cursor()
-            sql = "SELECT id, item_name, quantity, price, transaction_type, date FROM Transactions"
-            params = []
+        self._commit()
+        return cursor.lastrowid
 
-            if search_term:
-                sql += " WHERE item_name LIKE ?"
-                params.append(f"%{search_term}%")
+    def get_all_transactions(self, search_term=None, item_id=None, start=None, end=None, limit=None,
+                             include_archived=False):
+        """Retrieves transactions, newest first, optionally filtered and ranked by relevance.
 
-            sql += " ORDER BY date DESC"
-            cursor.execute(sql, params)
-            return cursor.fetchall()
+        item_id restricts to one item's history; start/end (datetime, date,
+        "YYYY-MM-DD[ HH:MM:SS]" or epoch seconds) bound the time range, end
+        exclusive. Both are answered from the (item_id, ts) and (ts) indexes.
+        include_archived reads through the AllTransactions view; archives have
+        no full-text index, so search words are matched with LIKE there.
+        """
+        try:
+            return self.cached_read(*self._transactions_query(search_term, item_id, start, end, limit,
+                                                               include_archived))
         except sqlite3.Error as e:
             print(f"Database error in get_all_transactions: {e}")
             return []
 
+    def iter_transactions(self, search_term=None, item_id=None, start=None, end=None, include_archived=False,
+                          chunk_size=IMPORT_CHUNK_SIZE):
+        """Like get_all_transactions without a limit, but yields lists of rows as they are read.
+
+        The whole listing comes from one reader snapshot and is never held in
+        memory; close the generator if you stop early so the connection is returned.
+        Bad filters raise here, before the first row is read.
+        """
+        return self.iter_read(*self._transactions_query(search_term, item_id, start, end, None,
+                                                             include_archived), chunk_size)
+
+    def _transactions_query(self, search_term, item_id, start, end, limit, include_archived):
+        if include_archived:
+            self._ensure_archives()  # before a reader is checked out, so it gets them attached
+        fts_table = None if include_archived else "TransactionsFTS"
+        clauses, params, match = self._search_filter(search_term, "t.item_name", fts_table, "t.id")
+        source = "AllTransactions" if include_archived else "Transactions"
+        sql = f"SELECT t.id, t.item_name, t.quantity, t.price, t.transaction_type, t.date FROM {source} t"
+
+        if match:
+            sql += " JOIN TransactionsFTS ON TransactionsFTS.rowid = t.id"
+            clauses[0] = "TransactionsFTS MATCH ?"
+        if item_id is not None:
+            clauses.append("t.item_id = ?")
+            params.append(item_id)
+        if start is not None:
+            clauses.append("t.ts >= ?")
+            params.append(to_epoch(start))
+        if end is not None:
+            clauses.append("t.ts < ?")
+            params.append(to_epoch(end))
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+
+        sql += " ORDER BY TransactionsFTS.rank, t.ts DESC" if match else " ORDER BY t.ts DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return sql, params
+
+    # -----------------------------
+    # ARCHIVAL & INCREMENTAL VACUUM
+    # -----------------------------
+    def _setup_auto_vacuum(self):
+        """Puts the file in auto_vacuum=INCREMENTAL so freed pages can be given back in small steps."""
+        if self.conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            return
+        self.conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        # Once the file has a header (WAL mode writes one) the mode only changes through a VACUUM
+        if self.conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            self.conn.execute("VACUUM")
+            if self.conn.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchone():
+                print("🧹 Database switched to incremental auto-vacuum.")
+
+    def sidecar_path(self, suffix):
+        """A path for files kept next to the database (inventory.db -> inventory<suffix>); None in memory."""
+        return None if self._archive_base is None else self._archive_base + suffix
+
+    def archive_path(self, year):
+        """The archive file for year's transactions (see archived_years), next to the database."""
+        return f"{self._archive_base}.archive-{year}.db"
+
+    def _archive_years(self):
+        """Years that have an archive file next to the database, oldest first."""
+        if self._archive_base is None:
+            return []
+        pattern = glob.escape(self._archive_base) + ".archive-[0-9][0-9][0-9][0-9].db"
+        return sorted(path[-7:-3] for path in glob.glob(pattern))
+
+    def _create_archive(self, year):
+        # Same columns as Transactions but no foreign key: archived rows outlive deleted items
+        conn = sqlite3.connect(self.archive_path(year))
+        try:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS Transactions (
+                    id INTEGER PRIMARY KEY,
+                    item_name TEXT NOT NULL,
+                    quantity INTEGER NOT NULL,
+                    price REAL NOT NULL,
+                    transaction_type TEXT NOT NULL,
+                    date TEXT NOT NULL,
+                    item_id INTEGER,
+                    ts INTEGER
+                );
+                CREATE INDEX IF NOT EXISTS idx_tx_item_ts ON Transactions(item_id, ts);
+                CREATE INDEX IF NOT EXISTS idx_tx_ts ON Transactions(ts);
+            """)
+        finally:
+            conn.close()
+
+    @property
+    def archived_years(self):
+        """Years whose archive file is attached, oldest first; the first call attaches them."""
+        return self._ensure_archives()
+
+    def _ensure_archives(self):
+        if self._archived_years is None:
+            with self.pool.writer():
+                if self._archived_years is None:
+                    self._attach_archives()
+        return self._archived_years
+
+    def _attach_archives(self, required=()):
+        """Attaches the yearly archives on every pooled connection and defines the AllTransactions view.
+
+        AllTransactions is a TEMP view (only TEMP views may span attached files):
+        the hot table UNION ALL each archive. Ids are never reused, so no row is
+        in two places and plain UNION's de-duplicating sort is not needed.
+        """
+        years = sorted(set(self._archive_years()) | set(required))
+        # SQLite caps attached databases per connection (10 by default); keep the newest
+        slots = self.conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+        keep = [year for year in years if year in required]
+        keep += [year for year in reversed(years) if year not in required][:max(0, slots - len(keep))]
+        if len(keep) < len(years):
+            print(f"⚠️ {len(years) - len(keep)} older archive file(s) not attached (SQLite allows {slots}).")
+        attachments = {f"archive_{year}": self.archive_path(year) for year in sorted(keep)}
+        selects = [f"SELECT {TX_COLUMNS} FROM main.Transactions"]
+        selects += [f"SELECT {TX_COLUMNS} FROM {alias}.Transactions" for alias in attachments]
+        self.pool.set_session(attachments, [
+            "DROP VIEW IF EXISTS temp.AllTransactions",
+            "CREATE TEMP VIEW AllTransactions AS " + " UNION ALL ".join(selects),
+        ])
+        self._archived_years = sorted(keep)
+
+    def archive_transactions(self, older_than_days=ARCHIVE_AFTER_DAYS, batch_size=ARCHIVE_BATCH_SIZE, progress=None):
+        """Moves transactions older than older_than_days into per-year archive files. Returns the rows moved.
+
+        Each batch of batch_size rows is one write transaction and the writer is
+        released between batches, so sales keep going during a long run.
+        DailyRollup is not touched, so reports still cover archived days.
+        The pages freed in the main file are reclaimed later by vacuum_step().
+        """
+        if self._archive_base is None:
+            raise ValueError("Archiving needs a database file, not an in-memory database.")
+        cutoff = int(time.time()) - older_than_days * 86400
+        moved = 0
+        while True:
+            with self.pool.writer() as conn:
+                self._flush_pending()
+                rows = conn.execute(
+                    "SELECT id, strftime('%Y', ts, 'unixepoch', 'localtime') FROM Transactions "
+                    "WHERE ts < ? ORDER BY ts LIMIT ?", (cutoff, batch_size)
+                ).fetchall()
+                if not rows:
+                    break
+                by_year = {}
+                for tx_id, year in rows:
+                    by_year.setdefault(year, []).append(tx_id)
+                missing = [year for year in by_year if year not in self.archived_years]
+                if missing:
+                    for year in missing:
+                        self._create_archive(year)
+                    self._attach_archives(required=by_year)
+
+                # WAL commits are atomic per file only. OR IGNORE makes a batch copied
+                # just before a crash harmless: the rerun skips the copy and deletes it here.
+                try:
+                    for year, ids in by_year.items():
+                        for i in range(0, len(ids), _MAX_IN_PARAMS):
+                            chunk = ids[i:i + _MAX_IN_PARAMS]
+                            marks = ",".join("?" * len(chunk))
+                            conn.execute(f"INSERT OR IGNORE INTO archive_{year}.Transactions ({TX_COLUMNS}) "
+                                         f"SELECT {TX_COLUMNS} FROM main.Transactions WHERE id IN ({marks})", chunk)
+                            conn.execute(f"DELETE FROM main.Transactions WHERE id IN ({marks})", chunk)
+                    conn.commit()
+                except sqlite3.Error:
+                    conn.rollback()
+                    raise
+                self.write_count += 1
+            moved += len(rows)
+            if progress:
+                progress(moved)
+        if moved:
+            print(f"🗄️ Archived {moved:,} transactions older than {older_than_days} days.")
+        return moved
+
+    @_locked
+    def vacuum_step(self, pages=VACUUM_STEP_PAGES):
+        """Hands up to `pages` free pages back to the filesystem. Returns how many were reclaimed.
+
+        One PRAGMA read when there is nothing to reclaim, so it suits an idle timer;
+        call it until it returns 0 to shrink the file completely.
+        """
+        free = self.conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if not free:
+            return 0
+        self._flush_pending()
+        # execute() would step the pragma once (one page); executescript runs it to the end
+        self.conn.executescript(f"PRAGMA incremental_vacuum({int(pages)})")
+        return free - self.conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+    def archive_stats(self):
+        """Rows in the hot table and in each attached archive, plus free pages awaiting vacuum."""
+        years = self._ensure_archives()  # before the checkout, so the reader gets them attached
+        with self.pool.reader() as conn:
+            return {
+                "hot_rows": conn.execute("SELECT COUNT(*) FROM main.Transactions").fetchone()[0],
+                "archives": {year: conn.execute(f"SELECT COUNT(*) FROM archive_{year}.Transactions").fetchone()[0]
+                             for year in years},
+                "free_pages": conn.execute("PRAGMA freelist_count").fetchone()[0],
+            }
+
+    # -----------------------------
+    # WRITE BATCHING (group commit)
+    # -----------------------------
+    def _commit(self):
+        """Commits a write now or folds it into the current group commit."""
+        if self._pending_writes == 0:
+            self._batch_started = time.monotonic()
+        self._pending_writes += 1
+        if self._batch_depth:
+            return  # `with db.batch()` commits on exit
+        if (self._pending_writes >= self.batch_size
+                or time.monotonic() - self._batch_started >= self.batch_window):
+            self._flush_pending()
+        elif self._flush_timer is None:
+            self._flush_timer = threading.Timer(self.batch_window, self._flush_on_timer)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def _end_orphaned_transaction(self):
+        # Open, yet no grouped write is waiting in it and no batch will commit it
+        if (self.conn is not None and self.conn.in_transaction
+                and not self._pending_writes and not self._batch_depth):
+            self.conn.rollback()
+
+    def _flush_pending(self):
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        if self._pending_writes:
+            self.conn.commit()
+            self._pending_writes = 0
+
+    def _flush_on_timer(self):
+        with self.pool.writer():
+            self._flush_timer = None
+            if self._batch_depth:
+                return  # the open batch will commit
+            try:
+                self._flush_pending()
+            except sqlite3.Error as e:
+                print(f"Database error while flushing writes: {e}")
+
+    def _flush_at_exit(self):
+        if self.conn:
+            self.flush()
+
+    @_locked
+    def flush(self):
+        """Commits every pending grouped write right away."""
+        if not self._batch_depth:
+            self._flush_pending()
+
+    @contextmanager
+    def batch(self):
+        """Groups several writes into one atomic transaction.
+
+            with db.batch():
+                db.update_item(...)
+                db.record_transaction(...)
+
+        The batch commits once on exit and rolls back entirely if the block
+        raises. Other writers wait until the batch is finished.
+        """
+        with self.pool.writer():
+            outermost = self._batch_depth == 0
+            if outermost:
+                self._flush_pending()
+            self._batch_depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._batch_depth -= 1
+                if outermost:
+                    self.conn.rollback()
+                    self._pending_writes = 0
+                    self._count_cache.clear()
+                raise
+            self._batch_depth -= 1
+            if outermost:
+                self._flush_pending()
+
+    # -----------------------------
+    # BULK IMPORT / EXPORT (streaming CSV)
+    # -----------------------------
+    @_locked
+    def import_items_csv(self, csv_path, upsert=True, chunk_size=IMPORT_CHUNK_SIZE, progress=None):
+        """Streams an items CSV (name, quantity, price; optional reorder_point, reorder_qty, sku) into InventoryItems.
+
+        The file is read chunk by chunk and each chunk is written with executemany,
+        all inside a single transaction that is rolled back if anything fails. With
+        upsert, rows whose name already exists update that item instead of adding a
+        duplicate. progress(rows_read) is called after every chunk. Returns a dict
+        with inserted/updated/skipped counts.
+        """
+        stats = {"inserted": 0, "updated": 0, "skipped": 0}
+        # Earlier grouped writes must not be lost if this import rolls back
+        self.flush()
+        cursor = self.conn.cursor()
+        rows_read = 0
+        try:
+            with open(csv_path, newline="", encoding="utf-8-sig") as f:
+                for chunk in _read_csv_chunks(f, chunk_size):
+                    rows_read += len(chunk)
+                    self._import_chunk(cursor, chunk, upsert, stats)
+                    if progress:
+                        progress(rows_read)
+            self._pending_writes += 1
+            self._flush_pending()
+        except Exception:
+            self.conn.rollback()
+            self._pending_writes = 0
+            raise
+        finally:
+            self._count_cache.clear()
+            self.write_count += 1
+        return stats
+
+    def _import_chunk(self, cursor, chunk, upsert, stats):
+        # Last row wins when the same name appears twice in a chunk
+        parsed = {}
+        for record in chunk:
+            item = _parse_item_record(record)
+            if item is None:
+                stats["skipped"] += 1
+            else:
+                parsed[item[0]] = item
+
+        existing = set()
+        if upsert and parsed:
+            names = list(parsed)
+            for i in range(0, len(names), _MAX_IN_PARAMS):
+                batch = names[i:i + _MAX_IN_PARAMS]
+                placeholders = ",".join("?" * len(batch))
+                cursor.execute(f"SELECT DISTINCT name FROM InventoryItems WHERE name IN ({placeholders})", batch)
+                existing.update(row[0] for row in cursor)
+
+        updates = [(qty, price, point, reorder, sku, name)
+                   for name, qty, price, point, reorder, sku in parsed.values() if name in existing]
+        inserts = [item for name, item in parsed.items() if name not in existing]
+        if updates:
+            cursor.executemany(
+                "UPDATE InventoryItems SET quantity=?, price=?, reorder_point=COALESCE(?, reorder_point), "
+                "reorder_qty=COALESCE(?, reorder_qty), sku=COALESCE(?, sku) WHERE name=?",
+                updates
+            )
+        if inserts:
+            cursor.executemany(
+                "INSERT INTO InventoryItems (name, quantity, price, reorder_point, reorder_qty, sku) "
+                f"VALUES (?, ?, ?, COALESCE(?, {LOW_STOCK_THRESHOLD}), COALESCE(?, 0), ?)",
+                inserts
+            )
+        stats["updated"] += len(updates)
+        stats["inserted"] += len(inserts)
+
+    def export_items_csv(self, csv_path, progress=None):
+        """Streams InventoryItems to a CSV file row by row. Returns the number of rows written."""
+        return self._export_csv(
+            csv_path,
+            f"SELECT {ITEM_COLUMNS} FROM InventoryItems ORDER BY id",
+            ("id", "name", "quantity", "price", "reorder_point", "reorder_qty", "sku"),
+            progress,
+        )
+
+    def export_transactions_csv(self, csv_path, progress=None, include_archived=False):
+        """Streams Transactions (optionally with the archives) to a CSV file. Returns the number of rows written."""
+        if include_archived:
+            self._ensure_archives()
+        return self._export_csv(
+            csv_path,
+            f"SELECT {TX_COLUMNS} FROM {'AllTransactions' if include_archived else 'Transactions'} ORDER BY id",
+            tuple(TX_COLUMNS.split(", ")),
+            progress,
+        )
+
+    def _export_csv(self, csv_path, sql, header, progress):
+        # A reader connection exports one consistent snapshot while sales keep writing
+        written = 0
+        with open(csv_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            for rows in self.iter_read(sql):
+                writer.writerows(rows)
+                written += len(rows)
+                if progress:
+                    progress(written)
+        return written
+
     # -----------------------------
     # CLOSE CONNECTION
     # -----------------------------
+    @_locked
     def close(self):
+        # Otherwise atexit would keep every closed manager (and its caches) alive until exit
+        atexit.unregister(self._flush_at_exit)
         if self.conn:
-            self.conn.close()
+            self._flush_pending()
+            self.pool.close()
+            self.conn = None
             print("🔒 Database connection closed.")
@@ -0,0 +1,108 @@
+# db_executor.py
+import queue
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+
+POLL_MS = 25  # how often Tk collects finished database jobs
+
+
+class DatabaseExecutor:
+    """Runs DatabaseManager calls on worker threads so the Tk mainloop never blocks.
+
+    submit() returns a plain concurrent.futures.Future for headless callers.
+    run() additionally delivers the result (or the exception) to callbacks on the
+    Tk thread: finished jobs are queued by the workers and drained with after().
+    """
+
+    def __init__(self, max_workers=1, name="smartstock-db"):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._done = queue.Queue()
+        self._pending = 0
+        self._background = 0
+        self._pumping = False
+        self._busy_listeners = []
+
+    # -----------------------------
+    # SUBMITTING WORK
+    # -----------------------------
+    def submit(self, fn, *args, **kwargs):
+        """Schedules fn(*args, **kwargs) on a worker thread and returns its Future."""
+        return self._pool.submit(fn, *args, **kwargs)
+
+    def run(self, widget, fn, *args, on_success=None, on_error=None, background=False, **kwargs):
+        """Schedules fn on a worker; on_success(result) / on_error(exc) run on widget's Tk thread.
+
+        background=True marks routine polling that should not show up as busy.
+        """
+        future = self._pool.submit(fn, *args, **kwargs)
+        self._pending += 1
+        if background:
+            self._background += 1
+        else:
+            self._notify_busy()
+        future.add_done_callback(lambda f: self._done.put((f, on_success, on_error, background)))
+        self._schedule_pump(widget)
+        return future
+
+    @property
+    def busy(self):
+        return self._pending - self._background > 0
+
+    def add_busy_listener(self, callback):
+        """callback(pending_jobs) is called on the Tk thread whenever the foreground queue length changes."""
+        self._busy_listeners.append(callback)
+
+    def remove_busy_listener(self, callback):
+        if callback in self._busy_listeners:
+            self._busy_listeners.remove(callback)
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+    # -----------------------------
+    # TK MARSHALLING
+    # -----------------------------
+    def _schedule_pump(self, widget):
+        if self._pumping:
+            return
+        try:
+            widget.after(POLL_MS, self._pump, widget)
+            self._pumping = True
+        except tk.TclError:
+            pass  # widget already destroyed; the next run() on a live widget resumes pumping
+
+    def _pump(self, widget):
+        # Cleared first: a callback may open a new window and run() against it.
+        self._pumping = False
+        while True:
+            try:
+                future, on_success, on_error, background = self._done.get_nowait()
+            except queue.Empty:
+                break
+            self._pending -= 1
+            self._background -= background
+            if future.cancelled():
+                continue
+            error = future.exception()
+            try:
+                if error is None:
+                    if on_success is not None:
+                        on_success(future.result())
+                elif on_error is not None:
+                    on_error(error)
+                else:
+                    print(f"Unhandled database error: {error}")
+            except Exception as e:
+                # Keep draining; one broken callback must not strand the others.
+                print(f"Error in database callback: {e}")
+
+        self._notify_busy()
+        if self._pending:
+            self._schedule_pump(widget)
+
+    def _notify_busy(self):
+        for callback in list(self._busy_listeners):
+            try:
+                callback(self._pending - self._background)
+            except tk.TclError:
+                self._busy_listeners.remove(callback)
@@ -0,0 +1,308 @@
+# forecasting.py
+"""Demand forecasts and reorder suggestions, computed with NumPy over DailyRollup.
+
+SalesReports answers "what sold"; ReorderEngine answers "what should be ordered".
+It folds the daily sales of the last `history_days` into per-item sums with
+np.bincount, chunk by chunk. Every item is forecast in the same array operations;
+there is no Python loop per item. Demand is an exponentially smoothed average of
+daily sales ("ewma") or a plain moving average. Days of cover, a safety stock from
+recent day-to-day variation and a suggested order quantity follow from it.
+
+Turning millions of DailyRollup rows into Python tuples costs far more than the
+arithmetic. So SalesHistory keeps finished days as columnar .npy files next to the
+database (inventory.forecast/) and memory-maps them, reading only newer days from
+SQLite. With 100k items and two years of history (11M rollup rows), the first run
+builds the cache in about half a minute; later runs take a second or two.
+
+NumPy is optional. Without it AVAILABLE is False and ReorderEngine raises
+RuntimeError; the rest of SmartStock does not need it.
+"""
+import json
+import math
+import os
+import shutil
+from datetime import date, timedelta
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency, see AVAILABLE
+    np = None
+
+from database_manager import SALE
+
+AVAILABLE = np is not None
+
+FORECAST_HISTORY_DAYS = 730   # days of DailyRollup read per run
+SMOOTHING_ALPHA = 0.1         # weight of the newest day in "ewma" (older days fade by 10% per day)
+MOVING_AVERAGE_DAYS = 28      # window of "moving_average", and of the day-to-day variation
+LEAD_TIME_DAYS = 7            # days between placing an order and having it on the shelf
+COVER_DAYS = 14               # days a delivery should last on top of the lead time
+SERVICE_Z = 1.65              # safety stock in standard deviations (~95% of lead times without a stock-out)
+LOAD_CHUNK_ROWS = 100_000     # DailyRollup rows converted to arrays at a time
+CACHE_CHUNK_ROWS = 1_000_000  # cached rows folded into the sums at a time
+CACHE_SUFFIX = ".forecast"    # inventory.db -> inventory.forecast/ (safe to delete; rebuilt on demand)
+_CACHE_COLUMNS = ("item", "day", "units")
+METHODS = ("ewma", "moving_average")
+
+
+class SalesHistory:
+    """Daily sales per item as columnar arrays (item id, date ordinal, units).
+
+    The rollup trigger only ever adds to today's row, so every finished day is
+    final. Those days are saved as .npy files in the cache directory and
+    memory-mapped on the next run, which then only reads the days since from
+    DailyRollup. Today is always read live. The cache is rebuilt from scratch when a
+    longer history is asked for, or when the totals of its first or last day no
+    longer match DailyRollup (e.g. a restored backup). Call clear() after
+    rebuild_daily_rollups(). An in-memory database reads everything live.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.cache_dir = db.sidecar_path(CACHE_SUFFIX)
+
+    def clear(self):
+        """Deletes the cache; the next forecast rebuilds it from DailyRollup."""
+        if self.cache_dir and os.path.isdir(self.cache_dir):
+            shutil.rmtree(self.cache_dir)
+
+    def chunks(self, start, end):
+        """Yields (item_ids, day_ordinals, units) int64 arrays covering the sales days in [start, end)."""
+        first, last = start.toordinal(), end.toordinal()
+        today = date.today().toordinal()
+        columns = self._cached(first, today) if self.cache_dir and first < min(last, today) else None
+        live_from = first
+        if columns is not None:
+            live_from = max(first, today)
+            for lo in range(0, len(columns["day"]), CACHE_CHUNK_ROWS):
+                item, day, units = (columns[name][lo:lo + CACHE_CHUNK_ROWS] for name in _CACHE_COLUMNS)
+                keep = (day >= first) & (day < last)
+                yield item[keep].astype(np.int64), day[keep].astype(np.int64), units[keep].astype(np.int64)
+            del columns  # releases the memory maps, so the next run may replace the files (Windows)
+        if live_from < last:
+            yield from self._read(live_from, last)
+
+    def _read(self, first, last):
+        sql = ("SELECT item_id, CAST(julianday(day) - 1721424.5 AS INTEGER), quantity FROM DailyRollup "
+               "WHERE day >= ? AND day < ? AND transaction_type = ? AND quantity > 0")
+        params = (date.fromordinal(first).isoformat(), date.fromordinal(last).isoformat(), SALE)
+        for chunk in self.db.iter_read(sql, params, chunk_size=LOAD_CHUNK_ROWS):
+            data = np.array(chunk, dtype=np.int64)
+            yield data[:, 0], data[:, 1], data[:, 2]
+
+    def _day_totals(self, day):
+        return list(self.db.read("SELECT COUNT(*), COALESCE(SUM(quantity), 0) FROM DailyRollup "
+                                  "WHERE day = ? AND transaction_type = ? AND quantity > 0",
+                                  (date.fromordinal(day).isoformat(), SALE))[0])
+
+    def _cached(self, first, today):
+        """Returns the cached columns covering [first or earlier, today), reading only what is missing."""
+        columns, meta = self._load()
+        if columns is not None and (meta["since"] > first or meta["through"] > today or any(
+                self._day_totals(day) != totals for day, totals in meta["check"])):
+            columns = None
+        if columns is None:
+            parts = [tuple(column.astype(np.int32) for column in part) for part in self._read(first, today)]
+        elif meta["through"] == today:
+            return columns
+        else:
+            # Drop days older than this history, then append the days finished since the last run
+            keep = columns["day"] >= first
+            parts = [tuple(np.asarray(columns[name][keep]) for name in _CACHE_COLUMNS)]
+            parts += [tuple(column.astype(np.int32) for column in part) for part in self._read(meta["through"], today)]
+            del columns, keep
+        merged = {name: np.concatenate([part[i] for part in parts]) if parts else np.zeros(0, np.int32)
+                  for i, name in enumerate(_CACHE_COLUMNS)}
+        self._save(merged, first, today)
+        return merged
+
+    def _load(self):
+        try:
+            with open(os.path.join(self.cache_dir, "meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+            columns = {name: np.load(os.path.join(self.cache_dir, f"{name}.npy"), mmap_mode="r")
+                       for name in _CACHE_COLUMNS}
+        except (OSError, ValueError, KeyError):
+            return None, None
+        # Files replaced by another process half-way through our read do not line up
+        if any(len(columns[name]) != meta.get("rows") for name in _CACHE_COLUMNS):
+            return None, None
+        return columns, meta
+
+    def _save(self, columns, since, through):
+        days = columns["day"]
+        check = []
+        for day in sorted({int(days.min()), int(days.max())} if len(days) else ()):
+            on_day = days == day
+            check.append([day, [int(on_day.sum()), int(columns["units"][on_day].sum())]])
+        meta = {"since": since, "through": through, "rows": len(days), "check": check}
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            suffix = f".{os.getpid()}.tmp"
+            for name in _CACHE_COLUMNS:
+                with open(os.path.join(self.cache_dir, name + suffix), "wb") as f:
+                    np.save(f, columns[name])
+            with open(os.path.join(self.cache_dir, "meta" + suffix), "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            # meta.json goes last: until it is replaced, rows no longer match and readers rebuild
+            for name in _CACHE_COLUMNS + ("meta",):
+                ext = ".json" if name == "meta" else ".npy"
+                os.replace(os.path.join(self.cache_dir, name + suffix), os.path.join(self.cache_dir, name + ext))
+        except OSError as e:
+            # A read-only folder or a file still mapped by another process: forecast without caching
+            print(f"⚠️ Forecast cache not saved: {e}")
+
+
+class ReorderSuggestions:
+    """One forecast run: a NumPy column per field, one position per inventory item.
+
+    rows() sorts and slices the columns without recomputing, so re-sorting
+    100k items for the UI is instant.
+    """
+
+    COLUMNS = ("id", "name", "sku", "quantity", "demand", "days_of_cover", "suggested")
+
+    def __init__(self, columns, as_of, method):
+        self.columns = columns
+        self.as_of = as_of
+        self.method = method
+
+    def __len__(self):
+        return len(self.columns["id"])
+
+    @property
+    def needed(self):
+        """Number of items with a suggested order."""
+        return int(np.count_nonzero(self.columns["suggested"]))
+
+    def rows(self, sort_by="days_of_cover", descending=False, limit=None, needed_only=True):
+        """Returns (id, name, sku, quantity, demand, days_of_cover, suggested) tuples.
+
+        demand is units per day. days_of_cover is None for items with no demand, and
+        those sort after every finite value. needed_only leaves out items that need no order.
+        """
+        if sort_by not in self.COLUMNS:
+            raise ValueError(f"Unknown sort column: {sort_by}")
+        selected = (np.flatnonzero(self.columns["suggested"]) if needed_only
+                    else np.arange(len(self)))
+        order = np.argsort(self.columns[sort_by][selected], kind="stable")
+        if descending:
+            order = order[::-1]
+        picked = selected[order[:limit]]
+        cover = [None if math.isinf(days) else round(days, 1)
+                 for days in self.columns["days_of_cover"][picked].tolist()]
+        return list(zip(self.columns["id"][picked].tolist(),
+                        self.columns["name"][picked].tolist(),
+                        self.columns["sku"][picked].tolist(),
+                        self.columns["quantity"][picked].tolist(),
+                        np.round(self.columns["demand"][picked], 2).tolist(),
+                        cover,
+                        self.columns["suggested"][picked].tolist()))
+
+
+class ReorderEngine:
+    """Forecasts daily demand for every item from DailyRollup and turns it into order quantities."""
+
+    def __init__(self, db):
+        if not AVAILABLE:
+            raise RuntimeError("Reorder suggestions need NumPy (pip install numpy).")
+        self.db = db
+        self.history = SalesHistory(db)
+
+    def suggest(self, method="ewma", history_days=FORECAST_HISTORY_DAYS, lead_time_days=LEAD_TIME_DAYS,
+                cover_days=COVER_DAYS, alpha=SMOOTHING_ALPHA, window=MOVING_AVERAGE_DAYS, as_of=None):
+        """Returns ReorderSuggestions for every inventory item.
+
+        History covers the history_days days before as_of (exclusive; defaults to
+        today). Today is left out: it is only partly over, and counting its sales so
+        far as a whole day would pull every forecast down until closing time. An item's averages only count the days since
+        its first sale in that history, so a new item is not diluted by days it was not stocked.
+        The suggestion orders up to demand * (lead_time_days + cover_days) + safety stock.
+        It is at least the item's reorder_qty, and an item at its reorder point always
+        gets one.
+        """
+        if method not in METHODS:
+            raise ValueError(f"Unknown forecast method: {method}")
+        if history_days < 1 or window < 1 or not 0 < alpha <= 1:
+            raise ValueError("history_days and window must be positive and alpha in (0, 1].")
+        window = min(window, history_days)
+        end = as_of or date.today()
+        start = end - timedelta(days=history_days)
+
+        ids, names, skus, quantity, reorder_point, reorder_qty = self._load_items()
+        n = len(ids)
+        smoothed = np.zeros(n)
+        first_day = np.full(n, history_days)
+        # Day d of the history weighs alpha * (1 - alpha)^(days after d); the newest day is the last one
+        decay = alpha * (1 - alpha) ** np.arange(history_days - 1, -1, -1, dtype=np.float64)
+        recent = []
+
+        for position, day, units in self._iter_sales(ids, start, end):
+            smoothed += np.bincount(position, units * decay[day], n)
+            np.minimum.at(first_day, position, day)
+            in_window = day >= history_days - window
+            recent.append((position[in_window], day[in_window] - (history_days - window), units[in_window]))
+
+        active_days = history_days - first_day          # 0 for items that never sold
+        observed = np.maximum(np.minimum(active_days, window), 1)
+        window_units, window_squares = self._window_sums(recent, n, window)
+        mean = window_units / observed
+        sigma = np.sqrt(np.maximum(window_squares / observed - mean ** 2, 0))
+
+        if method == "ewma":
+            # Divide by the weight the item's active days carry, so a short history is not pulled toward 0
+            weight = 1 - (1 - alpha) ** active_days
+            demand = np.divide(smoothed, weight, out=np.zeros(n), where=active_days > 0)
+        else:
+            demand = mean
+
+        days_of_cover = np.divide(quantity, demand, out=np.full(n, np.inf), where=demand > 0)
+        target = demand * (lead_time_days + cover_days) + SERVICE_Z * sigma * math.sqrt(lead_time_days)
+        # Rounded first so float noise (e.g. 190.0000001) does not add a unit
+        suggested = np.ceil(np.round(np.maximum(target - quantity, 0), 6)).astype(np.int64)
+        short = (suggested > 0) | (quantity <= reorder_point)
+        suggested = np.where(short, np.maximum(suggested, np.maximum(reorder_qty, reorder_point + 1 - quantity)), 0)
+
+        columns = {"id": ids, "name": names, "sku": skus, "quantity": quantity, "demand": demand,
+                   "days_of_cover": days_of_cover, "suggested": suggested}
+        return ReorderSuggestions(columns, end - timedelta(days=1), method)
+
+    # -----------------------------
+    # LOADING
+    # -----------------------------
+    def _load_items(self):
+        rows = self.db.read("SELECT id, name, COALESCE(sku, ''), quantity, reorder_point, reorder_qty "
+                             "FROM InventoryItems ORDER BY id")
+        if not rows:
+            return (np.zeros(0, np.int64), np.zeros(0, object), np.zeros(0, object),
+                    np.zeros(0, np.int64), np.zeros(0, np.int64), np.zeros(0, np.int64))
+        ids, names, skus, quantity, reorder_point, reorder_qty = zip(*rows)
+        return (np.array(ids, np.int64), np.array(names, object), np.array(skus, object),
+                np.array(quantity, np.int64), np.array(reorder_point, np.int64), np.array(reorder_qty, np.int64))
+
+    def _iter_sales(self, ids, start, end):
+        """Yields (item position, day index, units) arrays for daily sales in [start, end).
+
+        Rows of deleted items (and item_id 0, unlinked sales) are dropped.
+        """
+        if not len(ids):
+            return
+        first = start.toordinal()
+        # ids come sorted (ORDER BY id) and may be sparse, so binary-search them instead of indexing by id
+        last = len(ids) - 1
+        for item, day, units in self.history.chunks(start, end):
+            position = np.minimum(np.searchsorted(ids, item), last)
+            known = ids[position] == item
+            yield position[known], day[known] - first, units[known].astype(np.float64)
+
+    @staticmethod
+    def _window_sums(recent, n, window):
+        """Per-item sum and sum of squares of daily units over the window."""
+        if not recent:
+            return np.zeros(n), np.zeros(n)
+        position, day, units = (np.concatenate(parts) for parts in zip(*recent))
+        # A renamed item has one rollup row per name and day; add those up before squaring
+        keys, inverse = np.unique(position * window + day, return_inverse=True)
+        daily = np.bincount(inverse, units)
+        item = keys // window
+        return np.bincount(item, daily, n), np.bincount(item, daily ** 2, n)
@@ -0,0 +1,295 @@
+# instrumentation.py
+"""Opt-in timing for DatabaseManager: per-method latency histograms and a slow-query log.
+
+Nothing here runs until DatabaseManager.enable_instrumentation() is called. Enabling
+shadows each public method with a timed wrapper on that one instance and installs
+an SQL trace callback on the pooled connections. Disabling removes both again, so
+an uninstrumented manager pays nothing.
+
+sqlite3 has no per-statement timing hook. Each traced statement is charged the time
+until the next statement starts (or the call returns). Statements over the threshold
+are logged with their EXPLAIN QUERY PLAN. A method that returns a generator (the
+iter_* streams) is timed until the generator is exhausted or closed, counting only
+the time spent inside it, not the time the caller holds it between chunks.
+"""
+import inspect
+import json
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from functools import wraps
+
+SLOW_QUERY_MS = 50.0
+SLOW_LOG_SIZE = 200          # entries kept in memory for the stats window
+# Histogram upper bounds in seconds (Prometheus style, +Inf is implicit)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+# Not worth timing: trivial, re-entrant or lifecycle methods
+UNTIMED_METHODS = {"batch", "close", "flush", "cancel_search", "pool_stats",
+                   "enable_instrumentation", "disable_instrumentation"}
+_PLANNED_PREFIXES = ("SELECT", "WITH", "UPDATE", "DELETE")
+
+
+class _Histogram:
+    __slots__ = ("calls", "errors", "total", "max", "buckets", "statements")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.statements = 0
+
+    def add(self, seconds, failed, statements):
+        self.calls += 1
+        self.errors += failed
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.statements += statements
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def quantile(self, q):
+        """Upper bucket bound holding the q-th call; an estimate, as in Prometheus."""
+        if not self.calls:
+            return 0.0
+        rank, seen = q * self.calls, 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank:
+                return LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) else self.max
+        return self.max
+
+
+class Instrumentation:
+    """Collects call metrics and slow statements for one DatabaseManager."""
+
+    def __init__(self, db, slow_ms=SLOW_QUERY_MS, slow_log=None):
+        self.db = db
+        self.slow_ms = slow_ms
+        self.slow_log = slow_log          # optional path; entries are appended as JSON lines
+        self.slow_queries = deque(maxlen=SLOW_LOG_SIZE)
+        self.started = time.time()
+        self.untraced_statements = 0
+        self._methods = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    # -----------------------------
+    # INSTALL / REMOVE
+    # -----------------------------
+    def install(self):
+        for name in dir(type(self.db)):
+            if name.startswith("_") or name in UNTIMED_METHODS:
+                continue
+            if callable(getattr(type(self.db), name)):
+                setattr(self.db, name, self._timed(name, getattr(self.db, name)))
+        self.db.pool.set_trace_callback(self._trace)
+
+    def uninstall(self):
+        self.db.pool.set_trace_callback(None)
+        for name in list(vars(self.db)):
+            if getattr(vars(self.db)[name], "__instrumented__", False):
+                delattr(self.db, name)
+
+    def _timed(self, name, method):
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            outer = getattr(self._local, "statements", None)
+            statements = self._local.statements = []
+            started = time.perf_counter()
+            failed = streamed = False
+            try:
+                result = method(*args, **kwargs)
+                if inspect.isgenerator(result):
+                    # No query has run yet; the call is recorded once the iteration ends
+                    streamed = True
+                    return self._timed_iteration(name, result, statements, outer is not None)
+                return result
+            except BaseException:
+                failed = True
+                raise
+            finally:
+                ended = time.perf_counter()
+                self._local.statements = outer
+                if outer is not None:
+                    outer.extend(statements)  # nested call: the caller logs them once
+                if not streamed:
+                    self._record(name, ended - started, failed, statements, ended, log_slow=outer is None)
+        wrapper.__instrumented__ = True
+        return wrapper
+
+    def _timed_iteration(self, name, iterator, statements, nested):
+        """Times a returned generator step by step, leaving out the gaps between steps.
+
+        Statement times are shifted by those gaps too, so the slow log charges a
+        streamed SELECT for reading rows, not for the caller writing them out.
+        """
+        busy, idle, failed = 0.0, 0.0, False
+        resumed = time.perf_counter()
+        try:
+            while True:
+                outer = getattr(self._local, "statements", None)
+                nested = nested or outer is not None
+                step = self._local.statements = []
+                started = time.perf_counter()
+                idle += started - resumed
+                try:
+                    chunk = next(iterator)
+                except StopIteration:
+                    return
+                except BaseException:
+                    failed = True
+                    raise
+                finally:
+                    resumed = time.perf_counter()
+                    busy += resumed - started
+                    self._local.statements = outer
+                    if outer is not None:
+                        outer.extend(step)
+                    statements.extend((at - idle, sql) for at, sql in step)
+                yield chunk
+        finally:
+            iterator.close()
+            self._record(name, busy, failed, statements, resumed - idle, log_slow=not nested)
+
+    # -----------------------------
+    # RECORDING
+    # -----------------------------
+    def _trace(self, statement):
+        if getattr(self._local, "explaining", False) or statement.startswith("--"):
+            return  # our own EXPLAIN, or a trigger body running inside its statement
+        statements = getattr(self._local, "statements", None)
+        if statements is None:
+            with self._lock:
+                self.untraced_statements += 1  # e.g. a group commit fired by the timer thread
+        elif not statements or statements[-1][1] != statement:
+            statements.append((time.perf_counter(), statement))  # FTS triggers re-report the outer statement
+
+    def _record(self, name, seconds, failed, statements, ended, log_slow=True):
+        with self._lock:
+            histogram = self._methods.get(name)
+            if histogram is None:
+                histogram = self._methods[name] = _Histogram()
+            histogram.add(seconds, failed, len(statements))
+
+        threshold = self.slow_ms / 1000
+        if not log_slow or seconds < threshold:
+            return
+        # Charge each statement the time until the next one began
+        for i, (at, sql) in enumerate(statements):
+            until = statements[i + 1][0] if i + 1 < len(statements) else ended
+            if until - at >= threshold:
+                self._log_slow(name, sql, until - at)
+
+    def _log_slow(self, method, sql, seconds):
+        entry = {
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "method": method,
+            "ms": round(seconds * 1000, 2),
+            "sql": sql,
+            "plan": self._explain(sql),
+        }
+        with self._lock:
+            self.slow_queries.append(entry)
+        if self.slow_log:
+            try:
+                with open(self.slow_log, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry) + "\n")
+            except OSError as e:
+                print(f"⚠️ Could not write slow-query log: {e}")
+
+    def _explain(self, sql):
+        if not sql.lstrip().upper().startswith(_PLANNED_PREFIXES):
+            return []
+        self._local.explaining = True
+        try:
+            with self.db.pool.reader() as conn:
+                return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql)]
+        except sqlite3.Error as e:
+            return [f"(plan unavailable: {e})"]
+        finally:
+            self._local.explaining = False
+
+    def reset(self):
+        with self._lock:
+            self._methods.clear()
+            self.slow_queries.clear()
+            self.untraced_statements = 0
+            self.started = time.time()
+
+    # -----------------------------
+    # SNAPSHOTS & EXPORT
+    # -----------------------------
+    def snapshot(self):
+        """Returns a JSON-serialisable view of every metric collected so far."""
+        with self._lock:
+            methods = {
+                name: {
+                    "calls": h.calls,
+                    "errors": h.errors,
+                    "statements": h.statements,
+                    "total_ms": round(h.total * 1000, 3),
+                    "mean_ms": round(h.total / h.calls * 1000, 3) if h.calls else 0.0,
+                    "p50_ms": round(h.quantile(0.5) * 1000, 3),
+                    "p95_ms": round(h.quantile(0.95) * 1000, 3),
+                    "max_ms": round(h.max * 1000, 3),
+                    "buckets": list(h.buckets),
+                }
+                for name, h in sorted(self._methods.items())
+            }
+            slow = list(self.slow_queries)
+            untraced = self.untraced_statements
+        return {
+            "since": datetime.fromtimestamp(self.started).isoformat(timespec="seconds"),
+            "slow_query_ms": self.slow_ms,
+            "bucket_bounds_s": list(LATENCY_BUCKETS),
+            "methods": methods,
+            "untraced_statements": untraced,
+            "slow_queries": slow,
+            "pool": self.db.pool_stats(),
+            "query_cache": self.db.cache_stats(),
+        }
+
+    def to_prometheus(self):
+        """Renders the metrics in the Prometheus text exposition format."""
+        snap = self.snapshot()
+        lines = [
+            "# HELP smartstock_db_call_seconds DatabaseManager method latency.",
+            "# TYPE smartstock_db_call_seconds histogram",
+        ]
+        for name, m in snap["methods"].items():
+            cumulative = 0
+            for bound, count in zip(list(LATENCY_BUCKETS) + ["+Inf"], m["buckets"]):
+                cumulative += count
+                lines.append(f'smartstock_db_call_seconds_bucket{{method="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'smartstock_db_call_seconds_sum{{method="{name}"}} {m["total_ms"] / 1000}')
+            lines.append(f'smartstock_db_call_seconds_count{{method="{name}"}} {m["calls"]}')
+        lines += ["# HELP smartstock_db_call_errors_total DatabaseManager calls that raised.",
+                  "# TYPE smartstock_db_call_errors_total counter"]
+        lines += [f'smartstock_db_call_errors_total{{method="{name}"}} {m["errors"]}'
+                  for name, m in snap["methods"].items()]
+        lines += ["# HELP smartstock_db_statements_total SQL statements executed.",
+                  "# TYPE smartstock_db_statements_total counter"]
+        lines += [f'smartstock_db_statements_total{{method="{name}"}} {m["statements"]}'
+                  for name, m in snap["methods"].items()]
+        lines.append(f'smartstock_db_statements_total{{method=""}} {snap["untraced_statements"]}')
+        lines += ["# HELP smartstock_db_slow_queries Slow statements currently in the in-memory log.",
+                  "# TYPE smartstock_db_slow_queries gauge",
+                  f"smartstock_db_slow_queries {len(snap['slow_queries'])}"]
+        for key, value in snap["pool"].items():
+            lines += [f"# TYPE smartstock_db_pool_{key} gauge", f"smartstock_db_pool_{key} {value}"]
+        for key, value in snap["query_cache"].items():
+            lines += [f"# TYPE smartstock_db_query_cache_{key} gauge", f"smartstock_db_query_cache_{key} {value}"]
+        return "\n".join(lines) + "\n"
+
+    def export(self, path, fmt="json"):
+        """Writes the metrics to path as "json" or "prometheus" text."""
+        text = self.to_prometheus() if fmt == "prometheus" else json.dumps(self.snapshot(), indent=2) + "\n"
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
@@ -1,9 +1,17 @@
 # main.py
+import time
+STARTED = time.perf_counter()  # origin of the startup timeline below
+
 import tkinter as tk
 from tkinter import ttk, messagebox
 import atexit
+import json
+import os
+from datetime import datetime
 from database_manager import DatabaseManager
-from app_ui import InventoryApp, center_window
+from db_executor import DatabaseExecutor
+from ui_helpers import center_window
+# app_ui (the main window, its styles, reports and backups) is imported only after login
 
 # --- Global Font & Colors ---
 FONT_MAIN = ("Segoe UI", 10)
@@ -11,21 +19,51 @@ COLOR_APP_BG = "#f4f6f8"
 COLOR_CARD_BG = "#ffffff"
 COLOR_HEADER = "#0078D7"
 
+# -------------------------------
+# Startup Timing
+# -------------------------------
+# Printed on every launch; SMARTSTOCK_STARTUP_LOG=path also appends one JSON line per launch
+startup_marks = {}
+
+
+def mark_startup(label):
+    startup_marks[label] = round((time.perf_counter() - STARTED) * 1000, 1)
+    print(f"⏱️ {label}: {startup_marks[label]} ms")
+
+
+def save_startup_log():
+    path = os.environ.get("SMARTSTOCK_STARTUP_LOG")
+    if not path:
+        return
+    entry = {"time": datetime.now().isoformat(timespec="seconds"), **startup_marks}
+    try:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+    except OSError as e:
+        print(f"⚠️ Could not write startup log: {e}")
+
+
+mark_startup("imports")
+
 # -------------------------------
 # Initialize Database
 # -------------------------------
 db_manager = None
-try:
-    db_manager = DatabaseManager()
-except Exception as e:
-    root = tk.Tk()
-    root.withdraw()
-    messagebox.showerror("Initialization Error", f"Could not connect to database: {e}")
-    root.destroy()
-    exit()
-
-# Ensure DB closes when program exits
+
+# All database work from the GUI runs on this executor, never on the Tk thread
+db_executor = DatabaseExecutor()
+
+# Ensure DB closes when program exits (after the worker has drained)
 atexit.register(lambda: db_manager.close() if db_manager else None)
+atexit.register(db_executor.shutdown)
+
+
+def open_database():
+    """Runs on the executor while the login window is already on screen."""
+    global db_manager
+    # SMARTSTOCK_INSTRUMENT=1 records per-method timings from startup (see Tools > Database Stats)
+    db_manager = DatabaseManager(instrument=os.environ.get("SMARTSTOCK_INSTRUMENT") == "1")
+    return db_manager
 
 
 # -------------------------------
@@ -38,6 +76,20 @@ def login_window():
     login.configure(bg=COLOR_APP_BG)
     login.resizable(False, False)
 
+    # Open the database behind the login window. Background: the login button stays
+    # usable and a login check simply queues after the open on the same worker.
+    def database_ready(db):
+        startup_marks["database_open"] = round(db.open_seconds * 1000, 1)
+        mark_startup("database ready")
+
+    def database_failed(error):
+        messagebox.showerror("Initialization Error", f"Could not connect to database: {error}")
+        login.destroy()
+
+    database = db_executor.run(login, open_database, on_success=database_ready, on_error=database_failed,
+                               background=True)
+    login.after_idle(lambda: mark_startup("login window"))
+
     # Modern theme
     style = ttk.Style()
     style.theme_use("clam")
@@ -79,23 +131,35 @@ def login_window():
     entry_pass.pack(pady=(0, 15), padx=10)
 
     # --- Button & Event ---
+    session = {}
+
     def check_login():
+        if db_executor.busy:
+            return
         username = entry_user.get().strip()
         password = entry_pass.get().strip()
 
-        # Validate credentials
-        user = db_manager.check_user_login(username, password)
+        # Validate credentials off the Tk thread
+        login_button.config(state=tk.DISABLED, text="Signing in…")
+        db_executor.run(login, lambda: database.result().check_user_login(username, password),
+                        on_success=login_checked, on_error=login_error)
+
+    def login_checked(user):
         if user:
-            role = user[0]
+            session["role"] = user[0]
             login.destroy()
-            app = InventoryApp(db_manager, role)
-            app.mainloop()
         else:
+            login_button.config(state=tk.NORMAL, text="Login")
             messagebox.showerror("Login Failed", "Invalid username or password. Please try again.")
 
+    def login_error(error):
+        login_button.config(state=tk.NORMAL, text="Login")
+        messagebox.showerror("Login Failed", f"Could not check credentials: {error}")
+
     login.bind("<Return>", lambda e: check_login())
 
-    ttk.Button(frame_login, text="Login", command=check_login, style="TButton").pack(pady=10)
+    login_button = ttk.Button(frame_login, text="Login", command=check_login, style="TButton")
+    login_button.pack(pady=10)
 
     # Footer
     tk.Label(
@@ -108,6 +172,18 @@ def login_window():
 
     login.mainloop()
 
+    # The main window opens only once the login window's loop has ended
+    if "role" in session:
+        from app_ui import InventoryApp
+        app = InventoryApp(database.result(), session["role"], db_executor)
+
+        def main_window_shown():
+            mark_startup("main window")
+            save_startup_log()
+
+        app.after_idle(main_window_shown)
+        app.mainloop()
+
 
 # -------------------------------
 # Run Program
@@ -0,0 +1,75 @@
+# query_cache.py
+import threading
+from collections import OrderedDict
+
+
+class QueryCache:
+    """Bounded LRU of query results that are valid for a single database version.
+
+    Callers read the current version before running a query. get() misses and
+    put() is ignored whenever the version differs from the one the cached entries
+    were stored under, so a commit from this or any other process empties the
+    cache on the next lookup. Both an entry count and a total row count bound the
+    cache; a single result larger than max_rows is never stored.
+    """
+
+    def __init__(self, max_entries=64, max_rows=200_000):
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self._entries = OrderedDict()   # key -> (rows, row_count)
+        self._rows = 0
+        self._version = None
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0, "evictions": 0}
+
+    def _check_version(self, version):
+        # Caller holds self._lock
+        if version != self._version:
+            if self._entries:
+                self._stats["invalidations"] += 1
+            self._entries.clear()
+            self._rows = 0
+            self._version = version
+
+    def get(self, key, version):
+        """Returns the cached rows for key at this version, or None."""
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[0]
+
+    def put(self, key, version, rows):
+        count = len(rows)
+        if self.max_entries <= 0 or count > self.max_rows:
+            return
+        with self._lock:
+            if version != self._version:
+                return  # the database moved on while the query ran
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._rows -= old[1]
+            self._entries[key] = (rows, count)
+            self._rows += count
+            while len(self._entries) > self.max_entries or self._rows > self.max_rows:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._rows -= evicted
+                self._stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._rows = 0
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["rows"] = self._rows
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        return stats
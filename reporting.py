@@ -0,0 +1,95 @@
+# reporting.py
+"""Sales and purchase reports read from the DailyRollup table.
+
+DailyRollup holds one row per (item, transaction type, day) and is kept current
+by a trigger on Transactions, so a one-year report touches at most 365 rows per
+item however many raw transactions were recorded. Rebuild it with
+DatabaseManager.rebuild_daily_rollups() or `python cli.py rebuild-rollups`.
+"""
+from datetime import date, datetime, timedelta
+
+from database_manager import SALE
+
+PERIODS = {
+    "day": "day",
+    "week": "date(day, 'weekday 0', '-6 days')",   # the week's Monday; %W would split a week at New Year
+    "month": "substr(day, 1, 7)",
+}
+RANK_BY = {"amount": "SUM(amount)", "quantity": "SUM(quantity)"}
+
+
+def _day(value):
+    """Normalizes a date, datetime or 'YYYY-MM-DD...' string to the rollup day format."""
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)[:10]
+
+
+def _range_clauses(start, end, clauses, params):
+    # start inclusive, end exclusive, both on the day column
+    if start is not None:
+        clauses.append("day >= ?")
+        params.append(_day(start))
+    if end is not None:
+        clauses.append("day < ?")
+        params.append(_day(end))
+
+
+class SalesReports:
+    """Time-bucketed totals, top-N items and per-item velocity over DailyRollup."""
+
+    def __init__(self, db):
+        self.db = db
+
+    def totals(self, period="day", start=None, end=None, transaction_type=None):
+        """Returns (period, transaction_type, quantity, amount, tx_count) rows, newest period first.
+
+        period is "day", "week" (labelled by its Monday, YYYY-MM-DD) or "month";
+        start/end bound the days (end exclusive).
+        """
+        if period not in PERIODS:
+            raise ValueError(f"Unknown report period: {period}")
+        clauses, params = [], []
+        _range_clauses(start, end, clauses, params)
+        if transaction_type is not None:
+            clauses.append("transaction_type = ?")
+            params.append(transaction_type)
+
+        sql = (f"SELECT {PERIODS[period]} AS bucket, transaction_type, SUM(quantity), SUM(amount), SUM(tx_count) "
+               "FROM DailyRollup")
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " GROUP BY bucket, transaction_type ORDER BY bucket DESC, transaction_type"
+        return self.db.cached_read(sql, params)
+
+    def top_items(self, n=10, start=None, end=None, transaction_type=SALE, by="amount"):
+        """Returns the n best items as (item_id, item_name, quantity, amount, tx_count)."""
+        if by not in RANK_BY:
+            raise ValueError(f"Unknown ranking: {by}")
+        clauses, params = ["transaction_type = ?"], [transaction_type]
+        _range_clauses(start, end, clauses, params)
+        sql = ("SELECT item_id, item_name, SUM(quantity), SUM(amount), SUM(tx_count) FROM DailyRollup "
+               f"WHERE {' AND '.join(clauses)} "
+               f"GROUP BY item_id, item_name ORDER BY {RANK_BY[by]} DESC LIMIT ?")
+        params.append(n)
+        return self.db.cached_read(sql, params)
+
+    def item_velocity(self, days=30, end=None, item_id=None, transaction_type=SALE):
+        """Returns (item_id, item_name, units, units_per_day) over the `days` days before end.
+
+        end defaults to tomorrow so today's sales are included. Pass item_id to get a
+        single item's velocity; the primary key makes that an index range scan.
+        """
+        end_day = (end and datetime.strptime(_day(end), "%Y-%m-%d").date()) or date.today() + timedelta(days=1)
+        start_day = end_day - timedelta(days=days)
+        clauses, params = ["transaction_type = ?"], [transaction_type]
+        _range_clauses(start_day, end_day, clauses, params)
+        if item_id is not None:
+            clauses.insert(0, "item_id = ?")
+            params.insert(0, item_id)
+        sql = ("SELECT item_id, item_name, SUM(quantity), ROUND(SUM(quantity) * 1.0 / ?, 3) FROM DailyRollup "
+               f"WHERE {' AND '.join(clauses)} "
+               "GROUP BY item_id, item_name ORDER BY SUM(quantity) DESC")
+        return self.db.cached_read(sql, [days] + params)
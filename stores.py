@@ -0,0 +1,247 @@
+# stores.py
+"""Several stores' databases (one inventory.db per branch) read as one chain.
+
+StoreManager keeps one read-only DatabaseManager per store (other stores'
+files are never written or migrated) and runs the same read against
+each of them on a thread pool. SQLite releases the GIL while a query runs and
+every store has its own reader pool, so the stores really are read at the same
+time; each() yields results as the stores answer and the chain-wide views below
+fold them in that order instead of waiting for the slowest store first.
+
+Item ids are local to each file, so items are matched across stores by name,
+case-insensitively, the same way imports match them within one store. Every
+store returns its rows already in that order (idx_items_name_nocase), so a
+k-way merge is all the grouping costs. The list of store files is kept in
+stores.json next to the home database (see load() and save()).
+"""
+import heapq
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from database_manager import DatabaseManager, item_sort_key
+from reporting import SalesReports
+
+STORES_FILE = "stores.json"   # registry, kept next to the home database
+HOME_STORE = "This store"     # the database the app or CLI was opened on
+ALL_STORES = "All stores"     # selector value meaning every registered store
+STORE_WORKERS = 8             # stores read at the same time
+
+
+class StoreError(Exception):
+    """A store's database could not be opened or read; .store names the store."""
+
+    def __init__(self, store, error):
+        super().__init__(f"{store}: {error}")
+        self.store = store
+
+
+def registry_path(db_file):
+    """Where the store registry for a home database lives."""
+    return os.path.join(os.path.dirname(os.path.abspath(db_file)), STORES_FILE)
+
+
+def _name_key(item):
+    # The cross-store identity, folded like ORDER BY name COLLATE NOCASE
+    return item_sort_key(item, "name")[0]
+
+
+class StoreManager:
+    """Registry of store databases plus cross-store stock and sales views."""
+
+    def __init__(self, max_workers=STORE_WORKERS):
+        self._paths = {}         # store name -> database file, in registration order
+        self._dbs = {}           # store name -> DatabaseManager, opened on first use
+        self._owned = set()      # stores whose DatabaseManager this manager opened (and closes)
+        self._open_locks = {}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="smartstock-store")
+
+    @classmethod
+    def for_database(cls, db, **kwargs):
+        """A manager holding db as HOME_STORE plus every store in its registry (see registry_path)."""
+        manager = cls(**kwargs)
+        manager.add_store(HOME_STORE, db)
+        manager.load(registry_path(db.db_file))
+        return manager
+
+    # -----------------------------
+    # REGISTRY
+    # -----------------------------
+    @property
+    def names(self):
+        return list(self._paths)
+
+    def add_store(self, name, db):
+        """Registers a store by database file, or by an open DatabaseManager (which close() leaves open)."""
+        name = name.strip()
+        if not name or name == ALL_STORES:
+            raise ValueError(f"Invalid store name: {name!r}")
+        if name in self._paths:
+            raise ValueError(f"Store already registered: {name}")
+        if isinstance(db, DatabaseManager):
+            self._dbs[name] = db
+            self._paths[name] = db.db_file
+        else:
+            self._paths[name] = db
+            self._owned.add(name)
+        self._open_locks[name] = threading.Lock()
+
+    def remove_store(self, name):
+        """Unregisters a store, closing its database if this manager opened it."""
+        self._paths.pop(name)
+        self._open_locks.pop(name, None)
+        db = self._dbs.pop(name, None)
+        if name in self._owned:
+            self._owned.discard(name)
+            if db is not None:
+                db.close()
+
+    def database(self, name):
+        """The store's DatabaseManager, opened read-only on first use.
+
+        Raises StoreError if the file is missing (say, a branch share that is
+        offline) or is not a SmartStock database.
+        """
+        with self._open_locks[name]:
+            db = self._dbs.get(name)
+            if db is None:
+                path = self._paths[name]
+                if not os.path.isfile(path):
+                    raise StoreError(name, f"database not found: {path}")
+                try:
+                    db = DatabaseManager(path, read_only=True)
+                except Exception as e:  # SchemaError, or not an SQLite file at all
+                    raise StoreError(name, e) from e
+                self._dbs[name] = db
+            return db
+
+    def load(self, path=STORES_FILE):
+        """Registers the stores listed in path ({"store name": "database file"}); a missing file lists none.
+
+        Relative database files are taken relative to the registry. Files are only opened when first queried, so a store that is offline
+        stays registered and fails with StoreError until it is back.
+        """
+        try:
+            with open(path, encoding="utf-8") as f:
+                listed = json.load(f)
+        except FileNotFoundError:
+            return []
+        added = []
+        for name, db_file in listed.items():
+            try:
+                self.add_store(name, os.path.join(os.path.dirname(os.path.abspath(path)), db_file))
+                added.append(name)
+            except ValueError as e:
+                print(f"⚠️ Skipping store {name}: {e}")
+        return added
+
+    def save(self, path=STORES_FILE):
+        """Writes the stores registered by file (not the ones passed in open) to path."""
+        listed = {name: db_file for name, db_file in self._paths.items() if name in self._owned}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(listed, f, indent=2)
+
+    # -----------------------------
+    # FAN-OUT
+    # -----------------------------
+    def _call(self, name, fn):
+        try:
+            return fn(self.database(name))
+        except StoreError:
+            raise
+        except Exception as e:
+            raise StoreError(name, e) from e
+
+    def each(self, fn, stores=None):
+        """Runs fn(db) for every store (or the named ones) in parallel; yields (store, result) as each finishes.
+
+        A failing store raises StoreError. Stores not started yet are cancelled
+        when the caller stops iterating early.
+        """
+        names = self.names if stores is None else list(stores)
+        unknown = [name for name in names if name not in self._paths]
+        if unknown:
+            raise ValueError(f"Unknown store: {', '.join(unknown)}")
+        futures = {self._pool.submit(self._call, name, fn): name for name in names}
+        try:
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+    # -----------------------------
+    # CHAIN-WIDE VIEWS
+    # -----------------------------
+    def stock_totals(self, search_term=None, stores=None, limit=None):
+        """Returns (name, sku, total quantity, {store: quantity}) per item name, A to Z.
+
+        search_term filters each store as in the inventory grid. With limit, each
+        store is read one keyset page (about `limit` rows) at a time, and only the stores
+        holding back the merge are asked for another page, so the first names of a
+        large chain cost a few small indexed reads per store.
+        """
+        def read(db):
+            if limit is None:
+                return db.get_all_items(search_term, sort="name", descending=False)
+            # One row past `limit`, so when every store has the same items one round is enough
+            return db.get_items_page(search_term, before_id=last_ids.get(db), limit=limit + 1,
+                                     sort="name", descending=False)
+
+        streams, cut, last_ids, totals = [], {}, {}, []   # cut: last name read from stores that may have more
+        pending = self.names if stores is None else list(stores)
+        while pending:
+            for store, items in self.each(read, pending):
+                streams.append([(_name_key(item), store, item) for item in items])
+                if limit is not None and len(items) == limit + 1:
+                    cut[store] = streams[-1][-1][0]
+                    last_ids[self.database(store)] = items[-1][0]
+                else:
+                    cut.pop(store, None)
+            # Names before the smallest cut are complete in every store
+            horizon = min(cut.values(), default=None)
+            totals = self._group(streams, horizon)
+            if horizon is None or len(totals) >= limit:
+                break
+            pending = [store for store, last in cut.items() if last == horizon]
+        return totals[:limit]
+
+    @staticmethod
+    def _group(streams, horizon):
+        # k-way merge of the per-store name-ordered rows, one total per name before horizon
+        totals = []
+        for key, store, (_item_id, name, quantity, _price, _reorder_point, _reorder_qty, sku) in heapq.merge(*streams):
+            if horizon is not None and key >= horizon:
+                break
+            if totals and totals[-1][0] == key:
+                row = totals[-1]
+            else:
+                row = [key, name, sku or "", 0, {}]
+                totals.append(row)
+            row[2] = row[2] or sku or ""
+            row[3] += quantity
+            row[4][store] = row[4].get(store, 0) + quantity
+        return [tuple(row[1:]) for row in totals]
+
+    def sales_totals(self, period="day", start=None, end=None, transaction_type=None, stores=None):
+        """SalesReports.totals summed over the stores: (period, type, quantity, amount, tx_count), newest first."""
+        merged = {}
+        for _store, rows in self.each(lambda db: SalesReports(db).totals(period, start, end, transaction_type),
+                                      stores):
+            for bucket, tx_type, quantity, amount, tx_count in rows:
+                row = merged.setdefault((bucket, tx_type), [0, 0, 0])
+                row[0] += quantity
+                row[1] += amount
+                row[2] += tx_count
+        keys = sorted(merged, key=lambda key: key[1])
+        keys.sort(key=lambda key: key[0], reverse=True)
+        return [(bucket, tx_type, *merged[bucket, tx_type]) for bucket, tx_type in keys]
+
+    def close(self):
+        """Waits for running reads, then closes the databases this manager opened."""
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        for name in list(self._owned):
+            db = self._dbs.pop(name, None)
+            if db is not None:
+                db.close()
@@ -0,0 +1,104 @@
+# test_api_server.py
+"""Tests for the HTTP/JSON API's routes and status codes (run with: python -m pytest -q, or python -m unittest)."""
+import http.client
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+from api_server import ApiServer
+from database_manager import DatabaseManager
+
+
+class ApiTest(unittest.TestCase):
+    """A server on a free localhost port over a fresh database (default item 'Laptop', id 1, qty 10)."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.db = DatabaseManager(os.path.join(self.tmp.name, "inventory.db"))
+        self.addCleanup(self.db.close)
+        self.server = ApiServer(self.db, ("127.0.0.1", 0))
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.client = http.client.HTTPConnection("127.0.0.1", self.server.server_port, timeout=5)
+        self.addCleanup(self.client.close)
+
+    def call(self, method, path, body=None, raw=None):
+        """Returns (status, decoded JSON) over the one keep-alive connection."""
+        data = raw if raw is not None else (json.dumps(body).encode() if body is not None else None)
+        self.client.request(method, path, body=data, headers={"Content-Type": "application/json"})
+        response = self.client.getresponse()
+        return response.status, json.loads(response.read() or b"null")
+
+    def test_item_lifecycle(self):
+        status, item = self.call("POST", "/items", {"name": "Mouse", "quantity": 5, "price": 19.99, "sku": "M-1"})
+        self.assertEqual(status, 201)
+        self.assertEqual(self.call("GET", f"/items/{item['id']}"), (200, item))
+        self.assertEqual(self.call("GET", "/items/sku/M-1"), (200, item))
+        status, updated = self.call("PUT", f"/items/{item['id']}", {"price": 17.5})
+        self.assertEqual((status, updated["price"], updated["quantity"]), (200, 17.5, 5))
+        self.assertEqual(self.call("DELETE", f"/items/{item['id']}"), (200, {"deleted": updated}))
+        self.assertEqual(self.call("GET", f"/items/{item['id']}")[0], 404)
+        self.assertEqual(self.call("DELETE", f"/items/{item['id']}")[0], 404)
+
+    def test_listing_pages(self):
+        status, page = self.call("GET", "/items?limit=1&count=1")
+        self.assertEqual(status, 200)
+        self.assertEqual(([item["name"] for item in page["items"]], page["next_before_id"], page["total"]),
+                         (["Laptop"], 1, 1))
+        status, rows = self.call("GET", "/items/stream")
+        self.assertEqual((status, [item["id"] for item in rows]), (200, [1]))
+
+    def test_stock_movements(self):
+        status, item = self.call("POST", "/items/1/sell", {"quantity": 3})
+        self.assertEqual((status, item["quantity"]), (200, 7))
+        self.assertEqual(self.call("POST", "/items/1/receive", {"quantity": 2, "price": 800})[1]["quantity"], 9)
+        self.assertEqual(self.call("POST", "/items/1/adjust", {"delta": -1})[1]["quantity"], 8)
+        self.assertEqual(self.call("POST", "/items/1/sell", {"quantity": 9})[0], 409)
+        self.assertEqual(self.call("POST", "/items/999/sell", {"quantity": 1})[0], 404)
+        status, sold = self.call("POST", "/checkout", {"lines": [{"item_id": 1, "quantity": 8}]})
+        self.assertEqual((status, sold["items"][0]["quantity"]), (200, 0))
+        status, history = self.call("GET", "/transactions?limit=10")
+        self.assertEqual((status, len(history["transactions"])), (200, 4))
+
+    def test_changes_feed(self):
+        status, start = self.call("GET", "/changes")
+        self.assertEqual((status, start["changes"]), (200, []))
+        self.call("POST", "/items/1/sell", {"quantity": 1})
+        status, feed = self.call("GET", f"/changes?since={start['seq']}")
+        self.assertEqual((status, feed["reload"]), (200, False))
+        self.assertEqual([(change["id"], change["item"]["quantity"]) for change in feed["changes"]], [(1, 9)])
+
+    def test_client_errors(self):
+        self.assertEqual(self.call("POST", "/items", {"name": "Mouse"})[0], 400)                  # missing field
+        self.assertEqual(self.call("POST", "/items", {"name": "Mouse", "quantity": "5", "price": 1})[0], 400)
+        self.assertEqual(self.call("POST", "/items/1/sell", {"quantity": 0})[0], 400)
+        self.assertEqual(self.call("POST", "/items", raw=b"{not json")[0], 400)
+        self.assertEqual(self.call("GET", "/items?limit=abc")[0], 400)
+        self.assertEqual(self.call("POST", "/checkout", {"lines": "1x laptop"})[0], 400)
+        self.assertEqual(self.call("GET", "/nowhere")[0], 404)
+        self.assertEqual(self.call("DELETE", "/items")[0], 405)
+        self.assertEqual(self.call("GET", "/items/sku/unknown")[0], 404)
+
+    def test_sku_conflict(self):
+        self.call("POST", "/items", {"name": "Mouse", "quantity": 5, "price": 19.99, "sku": "M-1"})
+        status, error = self.call("POST", "/items", {"name": "Mouse 2", "quantity": 1, "price": 9.0, "sku": "M-1"})
+        self.assertEqual(status, 409)
+        self.assertIn("error", error)
+        self.assertEqual(self.call("PUT", "/items/1", {"sku": "M-1"})[0], 409)
+
+    def test_checkout_is_all_or_nothing(self):
+        _, mouse = self.call("POST", "/items", {"name": "Mouse", "quantity": 1, "price": 19.99})
+        status, _ = self.call("POST", "/checkout", {"lines": [{"item_id": 1, "quantity": 1},
+                                                              {"item_id": mouse["id"], "quantity": 2}]})
+        self.assertEqual(status, 409)
+        self.assertEqual(self.call("GET", "/items/1")[1]["quantity"], 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+# test_backup.py
+"""Tests for BackupManager snapshots (run with: python -m pytest -q, or python -m unittest)."""
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+
+from backup import BackupCancelled, BackupError, BackupManager
+from database_manager import DatabaseManager
+
+
+class BackupTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.db = DatabaseManager(os.path.join(self.tmp.name, "inventory.db"))
+        self.addCleanup(self.db.close)
+        self.backups = BackupManager(self.db, keep=2, pages=1, sleep=0)
+        self.backup_dir = os.path.join(self.tmp.name, "backups")
+
+    def files(self):
+        return sorted(os.listdir(self.backup_dir)) if os.path.isdir(self.backup_dir) else []
+
+    def test_snapshot_is_verified_copy(self):
+        self.db.add_item("Coffee", 3, 10.0)
+        self.db.flush()
+        self.assertTrue(self.backups.due())
+        steps = []
+        path = self.backups.backup(progress=lambda copied, total: steps.append((copied, total)))
+
+        self.assertEqual(self.files(), [os.path.basename(path)])
+        self.assertGreater(len(steps), 1)
+        self.assertEqual(steps[-1][0], steps[-1][1])
+        self.assertFalse(self.backups.due())
+        self.assertEqual(self.backups.snapshots()[0][1], path)
+        conn = sqlite3.connect(path)
+        try:
+            self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "delete")
+            names = [row[0] for row in conn.execute("SELECT name FROM InventoryItems ORDER BY id")]
+        finally:
+            conn.close()
+        self.assertEqual(names, ["Laptop", "Coffee"])
+
+    def test_archives_copied_alongside(self):
+        old = int(time.time()) - 400 * 86400
+        with self.db.batch():
+            self.db.conn.execute(
+                "INSERT INTO Transactions (item_name, quantity, price, transaction_type, date, ts) "
+                "VALUES ('Coffee', 1, 10.0, 'sale', datetime(?, 'unixepoch', 'localtime'), ?)", (old, old))
+            self.db._commit()
+        self.db.archive_transactions(older_than_days=365)
+        year = self.db.archived_years[0]
+        path = self.backups.backup()
+
+        name = os.path.basename(path)
+        self.assertEqual(self.files(), sorted([name, f"{name[:-3]}.archive-{year}.db"]))
+        restored = DatabaseManager(path)
+        try:
+            self.assertEqual(len(restored.get_all_transactions(include_archived=True)), 1)
+        finally:
+            restored.close()
+
+    def test_rotate_keeps_newest(self):
+        os.makedirs(self.backup_dir)
+        names = ["inventory-20250101-000000.db", "inventory-20250101-000000.archive-2023.db",
+                 "inventory-20250102-000000.db", "inventory-20250103-000000.db", "notes.txt"]
+        for name in names:
+            open(os.path.join(self.backup_dir, name), "w").close()
+        removed = self.backups.rotate()
+        # Archive copies go before their snapshot, so a half-rotated set is never listed
+        self.assertEqual([os.path.basename(path) for path in removed], [names[1], names[0]])
+        self.assertEqual(self.files(), names[2:])
+
+    def test_cancel_leaves_nothing(self):
+        with self.assertRaises(BackupCancelled):
+            self.backups.backup(progress=lambda copied, total: self.backups.cancel())
+        self.assertEqual(self.files(), [])
+        self.assertTrue(self.backups.due())
+
+    def test_verify_rejects_corrupt_file(self):
+        path = os.path.join(self.tmp.name, "broken.db")
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE t (x TEXT)")
+        conn.execute("CREATE INDEX t_x ON t(x)")
+        conn.executemany("INSERT INTO t VALUES (?)", [(str(n),) for n in range(10)])
+        # Declare the index in the opposite order, so its entries no longer match the table
+        conn.execute("PRAGMA writable_schema = ON")
+        conn.execute("UPDATE sqlite_master SET sql = 'CREATE INDEX t_x ON t(x DESC)' WHERE name = 't_x'")
+        conn.commit()
+        conn.close()
+        with self.assertRaises(BackupError):
+            self.backups.verify(path)
+        self.backups.verify(self.db.db_file)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,800 @@
+# test_database_manager.py
+"""Regression tests for DatabaseManager (run with: python -m pytest -q, or python -m unittest)."""
+import contextlib
+import gc
+import io
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+import weakref
+from unittest import mock
+
+from database_manager import (DatabaseManager, ItemNotFound, SchemaError, StockError, ITEM_SORTS, item_sort_key,
+                              range_matches)
+
+
+class DatabaseTestCase(unittest.TestCase):
+    """A fresh database file per test; it starts with the default 'Laptop' item (id 1)."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "inventory.db")
+        self.db = DatabaseManager(self.path)
+        self.addCleanup(self.db.close)
+
+    def add_items(self, rows):
+        """Adds (name, quantity, price) rows in one batch and returns their ids."""
+        with self.db.batch():
+            return [self.db.add_item(name, quantity, price)[0] for name, quantity, price in rows]
+
+
+class KeysetPagingTest(DatabaseTestCase):
+    """The grid reads one keyset page at a time, newest first, in both directions."""
+
+    def setUp(self):
+        super().setUp()
+        self.ids = [1] + self.add_items([(f"Item {n}", n, 1.0) for n in range(24)])
+
+    def test_pages_down_and_back_up(self):
+        first = self.db.get_items_page(limit=10)
+        self.assertEqual([row[0] for row in first], sorted(self.ids, reverse=True)[:10])
+        second = self.db.get_items_page(before_id=first[-1][0], limit=10)
+        self.assertEqual([row[0] for row in second], sorted(self.ids, reverse=True)[10:20])
+        last = self.db.get_items_page(before_id=second[-1][0], limit=10)
+        self.assertEqual(len(last), 5)
+        # Back up from the second page: the first page again, still in display order
+        self.assertEqual(self.db.get_items_page(after_id=second[0][0], limit=10), first)
+
+    def test_search_pages_and_count(self):
+        rows = self.db.get_items_page("item 1", limit=100)
+        expected = [n for n in range(24) if "1" in str(n)]
+        self.assertEqual(len(rows), len(expected))
+        self.assertEqual(self.db.count_items("item 1"), len(expected))
+        self.assertEqual(self.db.count_items(), 25)
+
+    def test_format_row(self):
+        rows = self.db.get_items_page(limit=3, format_row=lambda row: row[1].upper())
+        self.assertEqual(rows, ["ITEM 23", "ITEM 22", "ITEM 21"])
+
+
+class ItemWriteResultTest(DatabaseTestCase):
+    """Writes return the rows the grid patches in place, and cached counts follow them."""
+
+    def test_add_update_delete_rows(self):
+        item = self.db.add_item("Coffee", 5, 10.0, reorder_point=2, reorder_qty=12, sku="480")
+        self.assertEqual(item[1:], ("Coffee", 5, 10.0, 2, 12, "480"))
+        updated = self.db.update_item(item[0], "Coffee 1kg", 7, 11.0)
+        self.assertEqual(updated, (item[0], "Coffee 1kg", 7, 11.0, 2, 12, "480"))
+        self.assertEqual(self.db.delete_item(item[0]), updated)
+        self.assertIsNone(self.db.update_item(item[0], "Gone", 1, 1.0))
+        self.assertIsNone(self.db.delete_item(item[0]))
+
+    def test_count_cache_follows_writes(self):
+        self.assertEqual(self.db.count_items("coffee"), 0)
+        item = self.db.add_item("Coffee", 5, 10.0)
+        self.db.add_item("Tea", 5, 10.0)
+        self.assertEqual(self.db.count_items("coffee"), 1)
+        self.db.update_item(item[0], "Decaf", 5, 10.0)
+        self.assertEqual(self.db.count_items("coffee"), 0)
+        self.assertEqual(self.db.count_items("decaf"), 1)
+        self.db.delete_item(item[0])
+        self.assertEqual(self.db.count_items("decaf"), 0)
+        self.assertEqual(self.db.count_items(), 2)
+
+
+class SearchTest(DatabaseTestCase):
+    """Every word must appear anywhere in the name, case-insensitively, with or without FTS5."""
+
+    def setUp(self):
+        super().setUp()
+        self.add_items([("Arabica Coffee Beans", 1, 1.0), ("Coffee Filters", 1, 1.0),
+                        ("Green Tea", 1, 1.0), ("Iced coffee CAN", 1, 1.0)])
+        self.db.record_transaction("Green Tea", 2, 3.0, "sale")
+        self.db.record_transaction("Coffee Filters", 1, 2.0, "sale")
+        self.db.flush()
+
+    def names(self, term):
+        return sorted(row[1] for row in self.db.get_all_items(term))
+
+    def check_searches(self):
+        self.assertEqual(self.names("coffee"), ["Arabica Coffee Beans", "Coffee Filters", "Iced coffee CAN"])
+        self.assertEqual(self.names("OFFE bean"), ["Arabica Coffee Beans"])   # inside words, any case
+        self.assertEqual(self.names("an"), ["Arabica Coffee Beans", "Iced coffee CAN"])   # shorter than a trigram
+        self.assertEqual(self.names("coffee tea"), [])
+        self.assertEqual(self.db.count_items("coffee"), 3)
+        self.assertEqual([row[1] for row in self.db.get_all_transactions("tea")], ["Green Tea"])
+
+    def test_fts(self):
+        self.assertTrue(self.db.fts_enabled)
+        self.check_searches()
+
+    def test_like_fallback(self):
+        self.db.fts_enabled = False   # as on an SQLite build without FTS5 or the trigram tokenizer
+        self.check_searches()
+
+    def test_renamed_item_reindexed(self):
+        item = self.db.get_all_items("tea")[0]
+        self.db.update_item(item[0], "Jasmine Blend", 1, 1.0)
+        self.db.flush()
+        self.assertEqual(self.names("tea"), [])
+        self.assertEqual(self.names("jasmine"), ["Jasmine Blend"])
+
+
+class FailedWriteReleasesLockTest(unittest.TestCase):
+    """A write that fails must not keep the WAL write lock from other connections."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "inventory.db")
+        self.db = DatabaseManager(self.path)
+        self.item = self.db.add_item("Coffee", 1, 10.0, sku="4800016")
+        self.db.flush()
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+
+    def assert_other_connection_can_write(self):
+        self.assertFalse(self.db.conn.in_transaction)
+        other = sqlite3.connect(self.path, timeout=0.2)
+        try:
+            other.execute("UPDATE InventoryItems SET price = 11 WHERE id = ?", (self.item[0],))
+            other.commit()
+        finally:
+            other.close()
+
+    def test_duplicate_sku(self):
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.db.add_item("Coffee refill", 1, 9.0, sku="4800016")
+        self.assert_other_connection_can_write()
+
+    def test_rejected_sale(self):
+        with self.assertRaises(StockError):
+            self.db.sell(self.item[0], 5)
+        self.assert_other_connection_can_write()
+
+    def test_unknown_item(self):
+        self.db.delete_item(self.item[0])
+        self.db.flush()
+        with self.assertRaises(ItemNotFound):
+            self.db.sell(self.item[0], 1)
+        with self.assertRaises(ItemNotFound):
+            self.db.get_item(self.item[0])
+        self.assertIsNone(self.db.delete_item(self.item[0]))
+        self.assert_other_connection_can_write()
+
+    def test_failed_write_keeps_pending_writes(self):
+        self.db.record_transaction("Coffee", 1, 10.0, "sale", item_id=self.item[0])
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.db.add_item("Coffee refill", 1, 9.0, sku="4800016")
+        self.db.flush()
+        count = self.db.conn.execute("SELECT COUNT(*) FROM Transactions").fetchone()[0]
+        self.assertEqual(count, 1)
+        self.assert_other_connection_can_write()
+
+
+class CountCacheTest(unittest.TestCase):
+    """Counts taken on a reader are only cached when no uncommitted grouped write is hidden from it."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = DatabaseManager(os.path.join(self.tmp.name, "inventory.db"))
+        self.db.add_item("Coffee beans", 5, 10.0)
+        self.db.flush()
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+
+    def test_search_inside_batch(self):
+        with self.db.batch():
+            self.db.add_item("Coffee filters", 5, 2.0)
+            _rows, total, write_count = self.db.search_items("coffee")
+            self.db.prime_count_cache("coffee", total, write_count)
+            self.assertEqual(self.db.count_items("coffee"), 2)
+        self.assertEqual(self.db.count_items("coffee"), 2)
+
+    def test_search_before_flush(self):
+        self.db.add_item("Coffee filters", 5, 2.0)   # grouped, not committed yet
+        _rows, total, write_count = self.db.search_items("coffee")
+        self.db.flush()
+        self.db.prime_count_cache("coffee", total, write_count)
+        self.assertEqual(self.db.count_items("coffee"), 2)
+
+    def test_search_primes_when_committed(self):
+        _rows, total, write_count = self.db.search_items("coffee")
+        self.db.prime_count_cache("coffee", total, write_count)
+        self.db.add_item("Coffee filters", 5, 2.0)
+        self.assertEqual(self.db.count_items("coffee"), 2)
+
+
+class GetItemTest(unittest.TestCase):
+    """get_item reads on a pooled reader, so it does not queue behind the writer."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = DatabaseManager(os.path.join(self.tmp.name, "inventory.db"))
+        self.item = self.db.add_item("Coffee", 5, 10.0)
+        self.db.flush()
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+
+    def test_read_while_writer_busy(self):
+        entered, release = threading.Event(), threading.Event()
+
+        def hold_writer():
+            with self.db.batch():
+                entered.set()
+                release.wait(5)
+
+        holder = threading.Thread(target=hold_writer)
+        holder.start()
+        try:
+            entered.wait(5)
+            started = time.monotonic()
+            self.assertEqual(self.db.get_item(self.item[0]), self.item)
+            self.assertLess(time.monotonic() - started, 1)
+        finally:
+            release.set()
+            holder.join()
+
+    def test_sees_pending_write(self):
+        added = self.db.add_item("Tea", 3, 5.0)   # grouped, not committed yet
+        self.assertEqual(self.db.get_item(added[0]), added)
+
+    def test_missing(self):
+        with self.assertRaises(ItemNotFound):
+            self.db.get_item(self.item[0] + 1000)
+
+
+class CloseTest(unittest.TestCase):
+    """close() lets go of the manager; nothing keeps it alive until interpreter exit."""
+
+    def test_closed_manager_is_collected(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            db = DatabaseManager(os.path.join(tmp, "inventory.db"))
+            db.close()
+            ref = weakref.ref(db)
+            del db
+            gc.collect()
+            self.assertIsNone(ref())
+
+
+class ArchiveTest(unittest.TestCase):
+    """Old transactions move to per-year archive files, which are attached when first needed."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "inventory.db")
+        self.db = DatabaseManager(self.path)
+        old = int(time.time()) - 400 * 86400
+        with self.db.batch():
+            for n in range(5):
+                self.db.conn.execute(
+                    "INSERT INTO Transactions (item_name, quantity, price, transaction_type, date, ts) "
+                    "VALUES ('Coffee', 1, 10.0, 'sale', datetime(?, 'unixepoch', 'localtime'), ?)", (old + n, old + n))
+                self.db._commit()
+            self.db.record_transaction("Coffee", 2, 10.0, "sale")
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+
+    def attached(self, db):
+        return {row[1] for row in db.conn.execute("PRAGMA database_list")} - {"main", "temp"}
+
+    def test_archive_moves_rows(self):
+        self.assertEqual(self.db.archive_transactions(older_than_days=365), 5)
+        stats = self.db.archive_stats()
+        self.assertEqual(stats["hot_rows"], 1)
+        self.assertEqual(sum(stats["archives"].values()), 5)
+        self.assertEqual(len(self.db.get_all_transactions()), 1)
+        self.assertEqual(len(self.db.get_all_transactions(include_archived=True)), 6)
+
+    def test_archives_attached_on_first_use(self):
+        self.db.archive_transactions(older_than_days=365)
+        self.db.close()
+        self.db = DatabaseManager(self.path)
+        self.assertEqual(self.attached(self.db), set())
+        rows = sum(len(chunk) for chunk in self.db.iter_transactions(include_archived=True))
+        self.assertEqual(rows, 6)
+        self.assertEqual(len(self.db.archived_years), 1)
+
+    def test_batches_keep_rollups(self):
+        rollup = "SELECT day, SUM(quantity), SUM(tx_count) FROM DailyRollup GROUP BY day ORDER BY day"
+        before = self.db.conn.execute(rollup).fetchall()
+        seen = []
+        self.assertEqual(self.db.archive_transactions(older_than_days=365, batch_size=2, progress=seen.append), 5)
+        self.assertEqual(seen, [2, 4, 5])
+        self.assertEqual(self.db.archive_transactions(older_than_days=365), 0)
+        self.assertEqual(self.db.conn.execute(rollup).fetchall(), before)
+
+    def test_vacuum_step_reclaims_pages(self):
+        with self.db.batch():
+            self.db.conn.executemany(
+                "INSERT INTO Transactions (item_name, quantity, price, transaction_type, date, ts) "
+                "VALUES (?, 1, 1.0, 'sale', datetime('now'), strftime('%s', 'now'))",
+                [("x" * 500,) for _ in range(500)])
+            self.db._commit()
+        self.db.conn.execute("DELETE FROM Transactions WHERE length(item_name) = 500")
+        self.db.conn.commit()
+        free = self.db.archive_stats()["free_pages"]
+        self.assertGreater(free, 20)
+        size = self.db.conn.execute("PRAGMA page_count").fetchone()[0]
+
+        self.assertEqual(self.db.vacuum_step(pages=10), 10)
+        reclaimed = 10
+        while True:
+            step = self.db.vacuum_step(pages=10)
+            if not step:
+                break
+            reclaimed += step
+        self.assertEqual(reclaimed, free)
+        self.assertEqual(self.db.archive_stats()["free_pages"], 0)
+        self.assertEqual(self.db.conn.execute("PRAGMA page_count").fetchone()[0], size - free)
+
+
+class ItemIdTest(unittest.TestCase):
+    """A deleted item's id is never given to a new item, which would inherit its sales history."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)   # after the databases opened below are closed
+        self.path = os.path.join(self.tmp.name, "inventory.db")
+
+    def open(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            db = DatabaseManager(self.path)
+        return db, output.getvalue()
+
+    def test_newest_item_deleted(self):
+        db, _ = self.open()
+        self.addCleanup(db.close)
+        item = db.add_item("Coffee", 5, 10.0)
+        db.sell(item[0], 1)
+        db.delete_item(item[0])
+        self.assertGreater(db.add_item("Tea", 5, 8.0)[0], item[0])
+
+    def test_new_file_not_rebuilt(self):
+        db, output = self.open()
+        db.close()
+        self.assertNotIn("AUTOINCREMENT", output)
+
+    def test_version_2_file_upgraded(self):
+        db, _ = self.open()
+        item = db.add_item("Coffee", 5, 10.0)
+        db.sell(item[0], 1)
+        db.delete_item(item[0])
+        db.close()
+        self.downgrade_items_table()
+
+        db, output = self.open()
+        self.addCleanup(db.close)
+        self.assertIn("AUTOINCREMENT", output)
+        self.assertGreater(db.add_item("Tea", 5, 8.0)[0], item[0])
+        self.assertEqual(db.get_inventory_summary()["total_skus"], 2)   # Laptop and Tea, kept by the recreated triggers
+
+    def downgrade_items_table(self):
+        # The version 2 layout: a plain INTEGER PRIMARY KEY, which reuses the newest deleted id
+        conn = sqlite3.connect(self.path, isolation_level=None)
+        try:
+            dependents = [row[0] for row in conn.execute(
+                "SELECT sql FROM sqlite_master WHERE tbl_name = 'InventoryItems' AND type IN ('index', 'trigger')")]
+            conn.execute("BEGIN")
+            conn.execute("CREATE TABLE Items2 (id INTEGER PRIMARY KEY, name TEXT NOT NULL, quantity INTEGER NOT NULL, "
+                         "price REAL NOT NULL, reorder_point INTEGER NOT NULL DEFAULT 5, "
+                         "reorder_qty INTEGER NOT NULL DEFAULT 0, sku TEXT)")
+            conn.execute("INSERT INTO Items2 SELECT * FROM InventoryItems")
+            conn.execute("DROP TABLE InventoryItems")
+            conn.execute("ALTER TABLE Items2 RENAME TO InventoryItems")
+            for sql in dependents:
+                conn.execute(sql)
+            conn.execute("DELETE FROM sqlite_sequence WHERE name = 'InventoryItems'")
+            conn.execute("PRAGMA user_version = 2")
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+
+class ReadOnlyOpenTest(unittest.TestCase):
+    """Other stores' files are opened read-only: checked, never migrated or written."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "other.db")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_foreign_database_rejected_untouched(self):
+        other = sqlite3.connect(self.path)
+        other.execute("CREATE TABLE notes (x)")
+        other.commit()
+        other.close()
+        with open(self.path, "rb") as f:
+            before = f.read()
+        with self.assertRaises(SchemaError):
+            DatabaseManager(self.path, read_only=True)
+        with open(self.path, "rb") as f:
+            self.assertEqual(f.read(), before)
+
+    def test_store_database_opens(self):
+        db = DatabaseManager(self.path)
+        db.add_item("Coffee", 3, 10.0)
+        db.close()
+        store = DatabaseManager(self.path, read_only=True)
+        try:
+            self.assertIn("Coffee", [item[1] for item in store.get_all_items()])
+            with self.assertRaises(sqlite3.OperationalError):
+                store.add_item("Tea", 1, 5.0)
+        finally:
+            store.close()
+
+
+class CsvImportExportTest(DatabaseTestCase):
+    """CSV import upserts by name and skips bad rows; export writes the whole catalog."""
+
+    def write_csv(self, text):
+        path = os.path.join(self.tmp.name, "items.csv")
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    def test_upsert_counts(self):
+        path = self.write_csv(
+            "Name,Quantity,Price,SKU\n"
+            "Laptop,7,899.00,\n"           # existing name -> updated
+            "Mouse,20,19.99,M-1\n"
+            "Cable,abc,2.00,\n"            # not a number -> skipped
+            ",3,1.00,\n"                   # no name -> skipped
+            "Mouse,25,17.50,M-1\n"         # last duplicate wins
+        )
+        stats = self.db.import_items_csv(path)
+        self.assertEqual(stats, {"inserted": 1, "updated": 1, "skipped": 2})
+        items = {row[1]: row for row in self.db.get_all_items()}
+        self.assertEqual(sorted(items), ["Laptop", "Mouse"])
+        self.assertEqual(items["Laptop"][2:4], (7, 899.0))
+        self.assertEqual(items["Mouse"][2:4], (25, 17.5))
+        self.assertEqual(self.db.get_item_by_sku("M-1")[1], "Mouse")
+
+    def test_without_upsert_inserts(self):
+        path = self.write_csv("name,quantity,price\nLaptop,1,500\n")
+        self.assertEqual(self.db.import_items_csv(path, upsert=False), {"inserted": 1, "updated": 0, "skipped": 0})
+        self.assertEqual([row[1] for row in self.db.get_all_items()], ["Laptop", "Laptop"])
+
+    def test_chunks_report_progress(self):
+        path = self.write_csv("name,quantity,price\n" + "".join(f"Item {n},{n},1.5\n" for n in range(25)))
+        seen = []
+        stats = self.db.import_items_csv(path, chunk_size=10, progress=seen.append)
+        self.assertEqual(stats["inserted"], 25)
+        self.assertEqual(seen, [10, 20, 25])
+        self.assertEqual(self.db.count_items(), 26)
+
+    def test_missing_column_rolls_back(self):
+        path = self.write_csv("name,quantity\nMouse,3\n")
+        with self.assertRaises(ValueError):
+            self.db.import_items_csv(path)
+        self.assertEqual(self.db.count_items(), 1)
+
+    def test_export_round_trip(self):
+        self.add_items([("Mouse", 20, 19.99), ("Cable", 0, 2.5)])
+        path = os.path.join(self.tmp.name, "export.csv")
+        self.assertEqual(self.db.export_items_csv(path), 3)
+        expected = self.db.get_all_items()
+
+        other = DatabaseManager(os.path.join(self.tmp.name, "other.db"))
+        self.addCleanup(other.close)
+        self.assertEqual(other.import_items_csv(path), {"inserted": 2, "updated": 1, "skipped": 0})
+        self.assertEqual([row[1:] for row in other.get_all_items()], [row[1:] for row in expected])
+
+
+class InventorySummaryTest(DatabaseTestCase):
+    """Triggers keep the one-row summary equal to a full recount after every kind of write."""
+
+    def assertSummaryCurrent(self):
+        kept = self.db.get_inventory_summary()
+        recounted = self.db.rebuild_inventory_summary()
+        self.assertEqual({k: v for k, v in kept.items() if k != "total_value"},
+                         {k: v for k, v in recounted.items() if k != "total_value"})
+        self.assertAlmostEqual(kept["total_value"], recounted["total_value"], places=6)
+        return kept
+
+    def test_fresh_database(self):
+        self.assertEqual(self.assertSummaryCurrent(),
+                         {"total_skus": 1, "total_units": 10, "total_value": 9999.9, "low_stock_count": 0})
+
+    def test_follows_writes(self):
+        mouse, cable = self.add_items([("Mouse", 20, 19.99), ("Cable", 2, 2.5)])
+        summary = self.assertSummaryCurrent()
+        self.assertEqual((summary["total_skus"], summary["total_units"], summary["low_stock_count"]), (3, 32, 1))
+
+        self.db.update_item(mouse, "Mouse", 4, 19.99)
+        self.assertEqual(self.assertSummaryCurrent()["low_stock_count"], 2)
+        self.db.sell(1, 3)
+        self.db.receive(cable, 10)
+        summary = self.assertSummaryCurrent()
+        self.assertEqual((summary["total_units"], summary["low_stock_count"]), (23, 1))
+        self.db.delete_item(mouse)
+        summary = self.assertSummaryCurrent()
+        self.assertEqual((summary["total_skus"], summary["total_units"], summary["low_stock_count"]), (2, 19, 0))
+
+    def test_batch_rollback(self):
+        before = self.db.get_inventory_summary()
+        with self.assertRaises(RuntimeError):
+            with self.db.batch():
+                self.db.add_item("Mouse", 1, 5.0)
+                raise RuntimeError("cancelled")
+        self.assertEqual(self.db.get_inventory_summary(), before)
+
+
+class LowStockTest(DatabaseTestCase):
+    """Each item is low once its quantity reaches its own reorder point."""
+
+    def setUp(self):
+        super().setUp()
+        with self.db.batch():
+            self.mouse = self.db.add_item("Mouse", 5, 19.99)[0]                       # default point 5
+            self.cable = self.db.add_item("Cable", 40, 2.5, reorder_point=50, reorder_qty=100)[0]
+            self.stand = self.db.add_item("Stand", 1, 30.0, reorder_point=0)[0]
+
+    def test_uses_each_items_reorder_point(self):
+        self.assertEqual(self.db.get_low_stock_items(), [
+            (self.mouse, "Mouse", 5, 5, 0),
+            (self.cable, "Cable", 40, 50, 100),
+        ])
+        self.assertEqual(self.db.get_low_stock_items(limit=1), [(self.mouse, "Mouse", 5, 5, 0)])
+
+    def test_follows_stock_movements(self):
+        self.db.receive(self.mouse, 1)
+        self.db.sell(self.stand, 1)
+        self.db.update_item(self.cable, "Cable", 40, 2.5, reorder_point=10)
+        self.db.flush()
+        self.assertEqual(self.db.get_low_stock_items(), [(self.stand, "Stand", 0, 0, 0)])
+        self.assertEqual(self.db.get_inventory_summary()["low_stock_count"], 1)
+
+    def test_query_uses_partial_index(self):
+        with self.db.pool.reader() as conn:
+            plan = " ".join(row[-1] for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT id FROM InventoryItems INDEXED BY idx_items_low_stock "
+                "WHERE quantity <= reorder_point ORDER BY id"))
+        self.assertIn("idx_items_low_stock", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+
+class ChangeFeedTest(DatabaseTestCase):
+    """Another terminal's writes reach this one through the ItemChanges sequence."""
+
+    def setUp(self):
+        super().setUp()
+        self.other = DatabaseManager(self.path)
+        self.addCleanup(self.other.close)
+        self.seq = self.db.get_item_changes()[0]
+
+    def poll(self, limit=50):
+        seq, changes = self.db.get_item_changes(self.seq, limit=limit)
+        self.assertGreaterEqual(seq, self.seq)
+        self.seq = seq
+        return changes
+
+    def test_writes_in_commit_order(self):
+        self.assertEqual(self.poll(), [])
+        with self.other.batch():
+            mouse = self.other.add_item("Mouse", 20, 19.99)
+            cable = self.other.add_item("Cable", 2, 2.5)
+            self.other.update_item(1, "Laptop Pro", 10, 1299.0)
+        self.assertEqual(self.poll(), [(mouse[0], mouse), (cable[0], cable), (1, self.db.get_item(1))])
+        self.assertEqual(self.poll(), [])
+
+        # One entry per item however often it was written, at its latest position
+        with self.other.batch():
+            self.other.sell(mouse[0], 1)
+            self.other.sell(cable[0], 1)
+            self.other.sell(mouse[0], 1)
+        self.assertEqual([item_id for item_id, _ in self.poll()], [cable[0], mouse[0]])
+
+    def test_deleted_item(self):
+        self.other.delete_item(1)
+        self.other.flush()
+        self.assertEqual(self.poll(), [(1, None)])
+
+    def test_reload_when_too_many(self):
+        with self.other.batch():
+            for n in range(5):
+                self.other.add_item(f"Item {n}", n, 1.0)
+        self.assertIsNone(self.poll(limit=4))
+        self.assertEqual(self.poll(), [])  # the position still moved past them
+
+    def test_reload_when_pruned(self):
+        with self.other.batch():
+            for n in range(3):
+                self.other.add_item(f"Item {n}", n, 1.0)
+        self.other.conn.execute("DELETE FROM ItemChanges WHERE seq <= ?", (self.seq + 1,))
+        self.other.conn.commit()
+        self.assertIsNone(self.poll())
+
+
+class StockMovementTest(DatabaseTestCase):
+    """sell/receive/adjust/checkout change quantities relatively and log each movement."""
+
+    def setUp(self):
+        super().setUp()
+        self.mouse, self.cable = self.add_items([("Mouse", 5, 20.0), ("Cable", 1, 2.5)])
+
+    def history(self):
+        self.db.flush()
+        return self.db.conn.execute(
+            "SELECT item_id, quantity, price, transaction_type FROM Transactions ORDER BY id").fetchall()
+
+    def quantities(self):
+        return {row[0]: row[2] for row in self.db.get_all_items()}
+
+    def test_movements_logged(self):
+        self.assertEqual(self.db.sell(self.mouse, 2)[2], 3)
+        self.assertEqual(self.db.receive(self.mouse, 10, price=12.0)[2], 13)
+        self.assertEqual(self.db.adjust(self.mouse, -1)[2], 12)
+        self.assertEqual(self.history(), [
+            (self.mouse, 2, 20.0, "sale"),
+            (self.mouse, 10, 12.0, "purchase"),
+            (self.mouse, -1, 20.0, "adjustment"),
+        ])
+
+    def test_checkout(self):
+        rows = self.db.checkout([(self.mouse, 2), (self.cable, 1, 2.0)])
+        self.assertEqual([(row[0], row[2]) for row in rows], [(self.mouse, 3), (self.cable, 0)])
+        self.assertEqual(self.history(), [(self.mouse, 2, 20.0, "sale"), (self.cable, 1, 2.0, "sale")])
+        self.assertEqual(self.db.checkout([]), [])
+
+    def test_short_line_sells_nothing(self):
+        before = self.quantities()
+        with self.assertRaises(StockError) as caught:
+            self.db.checkout([(self.mouse, 2), (self.cable, 2)])
+        self.assertEqual(caught.exception.item_id, self.cable)
+        self.assertEqual(self.quantities(), before)
+        self.assertEqual(self.history(), [])
+
+    def test_failed_movement_keeps_earlier_writes(self):
+        self.db.sell(self.mouse, 1)
+        with self.assertRaises(ItemNotFound):
+            self.db.checkout([(self.cable, 1), (9999, 1)])
+        with self.assertRaises(StockError):
+            self.db.adjust(self.cable, -2)
+        self.assertEqual(self.history(), [(self.mouse, 1, 20.0, "sale")])
+        self.assertEqual(self.quantities()[self.cable], 1)
+
+    def test_rejects_bad_quantities(self):
+        for call in (lambda: self.db.sell(self.mouse, 0), lambda: self.db.receive(self.mouse, 1.5),
+                     lambda: self.db.adjust(self.mouse, 0), lambda: self.db.checkout([(self.mouse, -1)])):
+            with self.assertRaises(ValueError):
+                call()
+        self.assertEqual(self.history(), [])
+
+    def test_concurrent_terminals_never_oversell(self):
+        other = DatabaseManager(self.path)
+        self.addCleanup(other.close)
+        sold = []
+
+        def till(db):
+            for _ in range(5):
+                try:
+                    db.sell(self.mouse, 1)
+                    db.flush()
+                    sold.append(1)
+                except StockError:
+                    pass
+
+        threads = [threading.Thread(target=till, args=(db,)) for db in (self.db, other)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(sold), 5)
+        self.assertEqual(self.quantities()[self.mouse], 0)
+        self.assertEqual(len(self.history()), 5)
+
+
+class SkuTest(DatabaseTestCase):
+    """SKUs are unique when set, trimmed on the way in, and blank means none."""
+
+    def setUp(self):
+        super().setUp()
+        self.mouse = self.db.add_item("Mouse", 5, 20.0, sku=" 4800016\t")
+
+    def test_lookup(self):
+        self.assertEqual(self.mouse[6], "4800016")
+        self.assertEqual(self.db.get_item_by_sku("4800016"), self.mouse)  # before the group commit
+        self.db.flush()
+        self.assertEqual(self.db.get_item_by_sku("4800016\n"), self.mouse)
+        self.assertIsNone(self.db.get_item_by_sku("4800017"))
+        self.assertIsNone(self.db.get_item_by_sku("   "))
+
+    def test_conflicts(self):
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.db.add_item("Mouse copy", 1, 20.0, sku="4800016 ")
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.db.update_item(1, "Laptop", 10, 999.99, sku="4800016")
+        self.assertIsNone(self.db.get_item(1)[6])
+
+    def test_blank_skus_do_not_conflict(self):
+        self.db.add_item("Cable", 1, 2.5, sku="")
+        self.db.add_item("Stand", 1, 30.0, sku="  ")
+        self.db.update_item(self.mouse[0], "Mouse", 5, 20.0, sku="")   # "" removes it
+        self.db.flush()
+        self.assertEqual([row[6] for row in self.db.get_all_items()], [None, None, None, None])
+        self.db.add_item("Keyboard", 1, 40.0, sku="4800016")              # free again
+
+    def test_import_conflict_rolls_back(self):
+        path = os.path.join(self.tmp.name, "items.csv")
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            f.write("name,quantity,price,sku\nCable,1,2.5,\nKeyboard,1,40,4800016\n")
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.db.import_items_csv(path)
+        self.assertEqual(sorted(row[1] for row in self.db.get_all_items()), ["Laptop", "Mouse"])
+
+
+class SortedPagingTest(DatabaseTestCase):
+    """Sorted, range-filtered pages agree with item_sort_key/range_matches, ties included."""
+
+    RANGES = ({}, {"quantity": (2, 6)}, {"price": (None, 3.0)}, {"quantity": (1, None), "price": (2.0, 4.0)})
+
+    def setUp(self):
+        super().setUp()
+        # Few distinct quantities and prices, so most pages start or end inside a run of ties
+        names = ["apple", "Banana", "cherry", "Apple", "banana", "date"]
+        self.add_items([(f"{names[n % 6]} {n % 4}", n % 8, 1.0 + n % 5) for n in range(40)])
+        self.items = self.db.get_all_items()
+
+    def expected(self, sort, descending, ranges):
+        rows = [item for item in self.items if range_matches(item, ranges)]
+        return sorted(rows, key=lambda item: item_sort_key(item, sort), reverse=descending)
+
+    def walk(self, sort, descending, ranges, size=7):
+        pages = [self.db.get_items_page(limit=size, sort=sort, descending=descending, ranges=ranges)]
+        while len(pages[-1]) == size:
+            pages.append(self.db.get_items_page(before_id=pages[-1][-1][0], limit=size, sort=sort,
+                                                descending=descending, ranges=ranges))
+        if not pages[-1] and len(pages) > 1:
+            pages.pop()  # the rows ran out exactly at a page boundary
+        # ...and back up from the last page, which must give the same pages again
+        back = [pages[-1]]
+        while len(back) < len(pages):
+            back.append(self.db.get_items_page(after_id=back[-1][0][0], limit=size, sort=sort,
+                                               descending=descending, ranges=ranges))
+        self.assertEqual(back[::-1][:-1], pages[:-1])
+        return [row for page in pages for row in page]
+
+    def test_pages_match_python_order(self):
+        for sort in ITEM_SORTS:
+            for descending in (True, False):
+                for ranges in self.RANGES:
+                    with self.subTest(sort=sort, descending=descending, ranges=ranges):
+                        expected = self.expected(sort, descending, ranges)
+                        self.assertEqual(self.walk(sort, descending, ranges), expected)
+                        self.assertEqual(self.db.get_all_items(sort=sort, descending=descending, ranges=ranges),
+                                         expected)
+                        self.assertEqual(self.db.count_items(ranges=ranges), len(expected))
+
+    def test_wide_range_walks_sort_index(self):
+        # Every range counts as wide, so it is checked row by row along the sort index
+        with mock.patch("database_manager.RANGE_SORT_MAX_ROWS", 3):
+            for ranges in self.RANGES[1:]:
+                with self.subTest(ranges=ranges):
+                    self.assertEqual(self.walk("name", False, ranges), self.expected("name", False, ranges))
+
+    def test_unknown_sort_or_range(self):
+        with self.assertRaises(ValueError):
+            self.db.get_items_page(sort="sku")
+        with self.assertRaises(ValueError):
+            self.db.get_all_items(sort="sku")
+        with self.assertRaises(ValueError):
+            self.db.get_items_page(ranges={"reorder_point": (0, 5)})
+
+
+if __name__ == "__main__":
+    unittest.main()
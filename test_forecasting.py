@@ -0,0 +1,99 @@
+# test_forecasting.py
+"""Tests for ReorderEngine suggestions (run with: python -m pytest -q, or python -m unittest)."""
+import os
+import tempfile
+import unittest
+from datetime import date, datetime, timedelta
+
+import forecasting
+from database_manager import DatabaseManager
+
+AS_OF = date(2025, 3, 1)
+
+
+@unittest.skipUnless(forecasting.AVAILABLE, "NumPy is not installed")
+class SuggestTest(unittest.TestCase):
+    """A fixed February of sales, forecast as of 1 March 2025.
+
+    Laptop (qty 10) sells 2 a day all month, Mouse (qty 100) 1 a day, Tea (qty 0) 3 a day
+    for the last week only; Cable (qty 2, at its reorder point) and Stand never sell.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.db = DatabaseManager(os.path.join(self.tmp.name, "inventory.db"))
+        self.addCleanup(self.db.close)
+        with self.db.batch():
+            self.mouse = self.db.add_item("Mouse", 100, 20.0)[0]
+            self.tea = self.db.add_item("Tea", 0, 3.0)[0]
+            self.cable = self.db.add_item("Cable", 2, 2.5, reorder_point=5, reorder_qty=50)[0]
+            self.db.add_item("Stand", 10, 30.0)
+        for days_back in range(1, 29):
+            self.sell_on(AS_OF - timedelta(days=days_back), 1, "Laptop", 2)
+            self.sell_on(AS_OF - timedelta(days=days_back), self.mouse, "Mouse", 1)
+            if days_back <= 7:
+                self.sell_on(AS_OF - timedelta(days=days_back), self.tea, "Tea", 3)
+        self.engine = forecasting.ReorderEngine(self.db)
+
+    def sell_on(self, day, item_id, name, quantity):
+        # A sale recorded at local noon on `day`; the rollup trigger files it under that day
+        ts = int(datetime.combine(day, datetime.min.time()).replace(hour=12).timestamp())
+        self.db.conn.execute(
+            "INSERT INTO Transactions (item_name, quantity, price, transaction_type, date, item_id, ts) "
+            "VALUES (?, ?, 1.0, 'sale', ?, ?, ?)", (name, quantity, f"{day} 12:00:00", item_id, ts))
+        self.db.conn.commit()
+
+    def by_name(self, suggestions):
+        return {row[1]: row for row in suggestions.rows(needed_only=False)}
+
+    def test_moving_average(self):
+        suggestions = self.engine.suggest("moving_average", history_days=90, as_of=AS_OF)
+        self.assertEqual(suggestions.as_of, date(2025, 2, 28))
+        rows = self.by_name(suggestions)
+        # demand * (7 lead + 14 cover) - on hand; steady sales add no safety stock
+        self.assertEqual(rows["Laptop"][3:], (10, 2.0, 5.0, 32))
+        self.assertEqual(rows["Mouse"][3:], (100, 1.0, 100.0, 0))
+        # Only the week Tea has been on sale counts, so it is not averaged down to 0.75 a day
+        self.assertEqual(rows["Tea"][3:], (0, 3.0, 0.0, 63))
+        # No demand, but at its reorder point: at least reorder_qty
+        self.assertEqual(rows["Cable"][3:], (2, 0.0, None, 50))
+        self.assertEqual(rows["Stand"][3:], (10, 0.0, None, 0))
+        self.assertEqual(suggestions.needed, 3)
+        self.assertEqual([row[1] for row in suggestions.rows()], ["Tea", "Laptop", "Cable"])
+        self.assertEqual([row[1] for row in suggestions.rows("suggested", descending=True, limit=2)], ["Tea", "Cable"])
+
+    def test_ewma_matches_steady_demand(self):
+        rows = self.by_name(self.engine.suggest("ewma", history_days=90, as_of=AS_OF))
+        self.assertEqual({name: row[4] for name, row in rows.items()},
+                         {"Laptop": 2.0, "Mouse": 1.0, "Tea": 3.0, "Cable": 0.0, "Stand": 0.0})
+
+    def test_history_window(self):
+        # as_of is exclusive: the last week of February only, and Laptop's older sales fall outside
+        rows = self.by_name(self.engine.suggest("moving_average", history_days=7, as_of=AS_OF))
+        self.assertEqual((rows["Laptop"][4], rows["Tea"][4]), (2.0, 3.0))
+        rows = self.by_name(self.engine.suggest("moving_average", history_days=90, as_of=AS_OF - timedelta(days=7)))
+        self.assertEqual((rows["Laptop"][4], rows["Tea"][4]), (2.0, 0.0))
+
+    def test_cache_follows_rollups(self):
+        first = self.engine.suggest("moving_average", history_days=90, as_of=AS_OF)
+        self.assertTrue(os.path.isfile(os.path.join(self.db.sidecar_path(forecasting.CACHE_SUFFIX), "meta.json")))
+        again = forecasting.ReorderEngine(self.db).suggest("moving_average", history_days=90, as_of=AS_OF)
+        self.assertEqual(again.rows(needed_only=False), first.rows(needed_only=False))
+
+        # A late entry on the newest cached day no longer matches the cache's check totals
+        self.sell_on(AS_OF - timedelta(days=1), 1, "Laptop", 28)
+        rows = self.by_name(self.engine.suggest("moving_average", history_days=90, as_of=AS_OF))
+        self.assertEqual(rows["Laptop"][4], 3.0)
+
+    def test_bad_arguments(self):
+        with self.assertRaises(ValueError):
+            self.engine.suggest("median")
+        with self.assertRaises(ValueError):
+            self.engine.suggest(alpha=0)
+        with self.assertRaises(ValueError):
+            self.engine.suggest(as_of=AS_OF).rows("price")
+
+
+if __name__ == "__main__":
+    unittest.main()
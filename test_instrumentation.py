@@ -0,0 +1,50 @@
+# test_instrumentation.py
+"""Tests for the opt-in DatabaseManager timing (run with: python -m pytest -q, or python -m unittest)."""
+import os
+import tempfile
+import time
+import unittest
+
+from database_manager import DatabaseManager
+
+
+class StreamedCallTimingTest(unittest.TestCase):
+    """iter_* methods are timed over their whole iteration, not just creating the generator."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = DatabaseManager(os.path.join(self.tmp.name, "inventory.db"))
+        with self.db.batch():
+            for n in range(50):
+                self.db.add_item(f"Item {n}", 5, 1.0)
+        self.db.enable_instrumentation()
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+
+    def methods(self):
+        return self.db.instrumentation.snapshot()["methods"]
+
+    def test_iteration_is_timed(self):
+        rows = sum(len(chunk) for chunk in self.db.iter_items(chunk_size=10))
+        self.assertEqual(rows, 51)
+        stats = self.methods()["iter_items"]
+        self.assertEqual(stats["calls"], 1)
+        self.assertGreater(stats["statements"], 0)
+        self.assertGreater(stats["total_ms"], 0)
+
+    def test_time_between_chunks_left_out(self):
+        for _chunk in self.db.iter_items(chunk_size=10):
+            time.sleep(0.05)
+        self.assertLess(self.methods()["iter_items"]["total_ms"], 250)
+
+    def test_closed_early(self):
+        stream = self.db.iter_transactions()
+        next(stream, None)
+        stream.close()
+        self.assertEqual(self.methods()["iter_transactions"]["calls"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+# test_reporting.py
+"""Tests for SalesReports over DailyRollup (run with: python -m pytest -q, or python -m unittest)."""
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+from database_manager import DatabaseManager
+from reporting import SalesReports
+
+
+class ReportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = DatabaseManager(os.path.join(self.tmp.name, "inventory.db"))
+        self.reports = SalesReports(self.db)
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+
+    def sell_on(self, day, name, quantity, price):
+        # A sale recorded at local noon on `day`, as if it had been rung up then
+        ts = int(datetime.fromisoformat(day).replace(hour=12).timestamp())
+        self.db.conn.execute(
+            "INSERT INTO Transactions (item_name, quantity, price, transaction_type, date, ts) "
+            "VALUES (?, ?, ?, 'sale', ?, ?)", (name, quantity, price, f"{day} 12:00:00", ts))
+        self.db.conn.commit()
+
+    def test_week_across_new_year(self):
+        # Monday 30 Dec 2024 to Sunday 5 Jan 2025 is one week; the next one starts on 6 Jan
+        for day in ("2024-12-30", "2025-01-01", "2025-01-05", "2025-01-06"):
+            self.sell_on(day, "Coffee", 1, 10.0)
+        rows = self.reports.totals("week", transaction_type="sale")
+        self.assertEqual([(row[0], row[2]) for row in rows], [("2025-01-06", 1), ("2024-12-30", 3)])
+
+    def test_totals_by_month_and_top_items(self):
+        self.sell_on("2025-01-31", "Coffee", 2, 10.0)
+        self.sell_on("2025-02-01", "Tea", 5, 3.0)
+        self.sell_on("2025-02-02", "Coffee", 1, 10.0)
+        rows = self.reports.totals("month", transaction_type="sale")
+        self.assertEqual([(row[0], row[2], row[3]) for row in rows], [("2025-02", 6, 25.0), ("2025-01", 2, 20.0)])
+        top = self.reports.top_items(start="2025-01-01", end="2025-03-01")
+        self.assertEqual([row[1] for row in top], ["Coffee", "Tea"])
+
+    def test_rebuild_matches_trigger(self):
+        self.sell_on("2025-03-01", "Coffee", 2, 10.0)
+        self.sell_on("2025-03-01", "Coffee", 1, 10.0)
+        self.sell_on("2025-03-02", "Tea", 4, 3.0)
+        kept = self.reports.totals("day")
+        self.assertEqual([(row[0], row[2], row[4]) for row in kept], [("2025-03-02", 4, 1), ("2025-03-01", 3, 2)])
+        self.db.conn.execute("DELETE FROM DailyRollup")
+        self.db.conn.commit()
+        self.assertEqual(self.db.rebuild_daily_rollups(), 2)
+        self.assertEqual(self.reports.totals("day"), kept)
+
+    def test_item_velocity(self):
+        self.sell_on("2025-02-28", "Coffee", 50, 10.0)   # the day before the window
+        self.sell_on("2025-03-01", "Coffee", 3, 10.0)
+        self.sell_on("2025-03-05", "Tea", 1, 3.0)
+        self.sell_on("2025-03-10", "Coffee", 3, 10.0)
+        self.sell_on("2025-03-11", "Coffee", 50, 10.0)   # end is exclusive
+        rows = self.reports.item_velocity(days=10, end="2025-03-11")
+        self.assertEqual([row[1:] for row in rows], [("Coffee", 6, 0.6), ("Tea", 1, 0.1)])
+
+    def test_unknown_period(self):
+        with self.assertRaises(ValueError):
+            self.reports.totals("year")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+# test_stores.py
+"""Tests for StoreManager's chain-wide views (run with: python -m pytest -q, or python -m unittest)."""
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+from database_manager import DatabaseManager
+from stores import HOME_STORE, StoreError, StoreManager, registry_path
+
+# Every store also has the default 'Laptop' (qty 10)
+STOCK = {
+    HOME_STORE: [("apple", 3, "A-1"), ("Cherry", 1, None), ("egg", 2, None)],
+    "North": [("Apple", 4, None), ("banana", 5, None), ("date", 6, None), ("Egg", 1, None)],
+    "South": [("BANANA", 2, "B-2"), ("fig", 7, None)] + [(f"zz {n:02}", n, None) for n in range(12)],
+}
+SALES = {
+    HOME_STORE: [("2025-03-01", 2, 10.0), ("2025-03-02", 1, 10.0)],
+    "North": [("2025-03-01", 5, 2.0)],
+    "South": [("2025-03-03", 1, 4.0), ("2025-03-01", 1, 1.0)],
+}
+
+
+class StoreManagerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.home = DatabaseManager(os.path.join(self.tmp.name, "inventory.db"))
+        self.addCleanup(self.home.close)
+        self.fill(self.home, HOME_STORE)
+        for store in ("North", "South"):
+            db = DatabaseManager(os.path.join(self.tmp.name, f"{store.lower()}.db"))
+            self.fill(db, store)
+            db.close()
+        with open(registry_path(self.home.db_file), "w", encoding="utf-8") as f:
+            json.dump({"North": "north.db", "South": "south.db"}, f)
+        self.stores = StoreManager.for_database(self.home)
+        self.addCleanup(self.stores.close)
+
+    @staticmethod
+    def fill(db, store):
+        with db.batch():
+            for name, quantity, sku in STOCK[store]:
+                db.add_item(name, quantity, 1.0, sku=sku)
+            for day, quantity, price in SALES[store]:
+                ts = int(datetime.fromisoformat(day).replace(hour=12).timestamp())
+                db.conn.execute("INSERT INTO Transactions (item_name, quantity, price, transaction_type, date, ts) "
+                                "VALUES ('Laptop', ?, ?, 'sale', ?, ?)", (quantity, price, f"{day} 12:00:00", ts))
+                db._commit()
+
+    def expected_stock(self):
+        grouped = {}
+        for store, items in STOCK.items():
+            for name, quantity, sku in items + [("Laptop", 10, None)]:
+                row = grouped.setdefault(name.lower(), [name, sku or "", 0, {}])
+                row[1] = row[1] or sku or ""
+                row[2] += quantity
+                row[3][store] = quantity
+        return [tuple(grouped[key]) for key in sorted(grouped)]
+
+    def test_registry(self):
+        self.assertEqual(self.stores.names, [HOME_STORE, "North", "South"])
+        other = os.path.join(self.tmp.name, "saved.json")
+        self.stores.save(other)
+        with open(other, encoding="utf-8") as f:
+            self.assertEqual(sorted(json.load(f)), ["North", "South"])
+        with self.assertRaises(ValueError):
+            self.stores.add_store("North", "again.db")
+
+    def test_stock_merged_by_name(self):
+        totals = self.stores.stock_totals()
+        expected = self.expected_stock()
+        # Spellings differ between stores and the merge shows one of them, so compare names folded
+        self.assertEqual([(row[0].lower(),) + row[1:] for row in totals],
+                         [(row[0].lower(),) + row[1:] for row in expected])
+        self.assertEqual(totals[0][1:], ("A-1", 7, {HOME_STORE: 3, "North": 4}))
+        self.assertEqual(totals[1][1:], ("B-2", 7, {"North": 5, "South": 2}))
+
+    def test_limit_matches_full_merge(self):
+        full = self.stores.stock_totals()
+        for limit in (1, 2, 3, 5, 8, len(full), len(full) + 5):
+            with self.subTest(limit=limit):
+                self.assertEqual(self.stores.stock_totals(limit=limit), full[:limit])
+
+    def test_search_and_store_subset(self):
+        self.assertEqual([row[2] for row in self.stores.stock_totals("egg")], [3])
+        totals = self.stores.stock_totals(stores=["North"])
+        self.assertEqual([row[0] for row in totals], ["Apple", "banana", "date", "Egg", "Laptop"])
+
+    def test_sales_totals(self):
+        self.assertEqual(self.stores.sales_totals("day", transaction_type="sale"), [
+            ("2025-03-03", "sale", 1, 4.0, 1),
+            ("2025-03-02", "sale", 1, 10.0, 1),
+            ("2025-03-01", "sale", 8, 31.0, 3),
+        ])
+        self.assertEqual(self.stores.sales_totals("month", stores=["North", "South"]),
+                         [("2025-03", "sale", 7, 15.0, 3)])
+
+    def test_unavailable_store(self):
+        os.remove(os.path.join(self.tmp.name, "south.db"))
+        with self.assertRaises(StoreError) as caught:
+            self.stores.stock_totals()
+        self.assertEqual(caught.exception.store, "South")
+        self.assertEqual(len(self.stores.stock_totals(stores=[HOME_STORE, "North"])), 6)
+        with self.assertRaises(ValueError):
+            self.stores.stock_totals(stores=["West"])
+
+
+if __name__ == "__main__":
+    unittest.main()
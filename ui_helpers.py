@@ -0,0 +1,11 @@
+# ui_helpers.py
+# Small Tk helpers shared by the login window (main.py) and the main window (app_ui.py),
+# kept apart so the login window can open without importing app_ui.
+
+
+def center_window(window, width, height):
+    screen_width = window.winfo_screenwidth()
+    screen_height = window.winfo_screenheight()
+    x = (screen_width / 2) - (width / 2)
+    y = (screen_height / 2) - (height / 2)
+    window.geometry(f'{width}x{height}+{int(x)}+{int(y)}')